@@ -1,79 +1,75 @@
-import whisper
+import argparse
 import sys
-from collections import defaultdict
 
-def round_to_second(timestamp):
-    """Round a timestamp to the nearest second"""
-    return int(round(timestamp))
+from inference import settings_from_args
+from streaming import (DEFAULT_OVERLAP_SECONDS, DEFAULT_WINDOW_SECONDS, add_streaming_arguments,
+                       check_streaming_arguments, stream_entries)
+from timing import bucket_segments
+from transcriber import DEFAULT_MODEL, add_transcription_arguments, transcribe
 
-def transcribe_by_second(audio_path):
+def transcribe_by_second(audio_path, model_name=DEFAULT_MODEL, server_url=None, use_cache=True, settings=None):
     try:
-        # Load the model
-        print("Loading Whisper model...")
-        model = whisper.load_model("base")
-        
-        # Transcribe the audio
+        # Transcribe the audio (through the model server when configured)
         print("Transcribing audio...")
-        result = model.transcribe(audio_path, verbose=False)
-        
-        # Create a dictionary to store words by second
-        words_by_second = defaultdict(list)
+        result = transcribe(audio_path, model_name, server_url, use_cache=use_cache, settings=settings)
         
-        # Process each segment
-        for segment in result["segments"]:
-            # Get start and end times for the segment
-            start_sec = round_to_second(segment["start"])
-            end_sec = round_to_second(segment["end"])
-            text = segment["text"].strip()
-            
-            # If the segment spans multiple seconds, try to distribute words across seconds
-            if start_sec != end_sec:
-                words = text.split()
-                total_duration = end_sec - start_sec
-                words_per_second = len(words) / total_duration
-                
-                for i, word in enumerate(words):
-                    # Estimate which second this word belongs to
-                    word_second = start_sec + int(i / words_per_second)
-                    if word_second <= end_sec:
-                        words_by_second[word_second].append(word)
-            else:
-                # If segment is within one second, add all text to that second
-                words_by_second[start_sec].append(text)
+        # Group words by the second their start time falls in
+        buckets = bucket_segments(result["segments"])
+        if len(buckets.seconds) == 0:
+            raise ValueError("No speech found in transcription")
+        words_by_second = dict(zip(buckets.seconds.tolist(), buckets.text))
         
         # Print results chronologically
-        max_second = max(words_by_second.keys())
+        max_second = int(buckets.seconds[-1])
         
         print("\nTranscription by second:")
         print("------------------------")
         
         for second in range(max_second + 1):
-            if second in words_by_second:
-                minute = second // 60
-                sec = second % 60
-                timestamp = f"{minute:02d}:{sec:02d}"
-                words = " ".join(words_by_second[second])
-                print(f"{timestamp} | {words}")
-            else:
-                minute = second // 60
-                sec = second % 60
-                timestamp = f"{minute:02d}:{sec:02d}"
-                print(f"{timestamp} | ...")
+            minute = second // 60
+            sec = second % 60
+            timestamp = f"{minute:02d}:{sec:02d}"
+            print(f"{timestamp} | {words_by_second.get(second, '...')}")
+
+    except Exception as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+
+def stream_by_second(audio_path, model_name=DEFAULT_MODEL, window_seconds=DEFAULT_WINDOW_SECONDS,
+                     overlap_seconds=DEFAULT_OVERLAP_SECONDS, settings=None):
+    """Print each second as soon as its streaming window has been transcribed"""
+    try:
+        print("Streaming transcription...")
+        print("\nTranscription by second:")
+        print("------------------------")
+        
+        for second, entry in stream_entries(audio_path, model_name, window_seconds, overlap_seconds,
+                                            settings=settings):
+            print(f"{entry['timestamp']} | {entry['text'] or '...'}")
 
     except Exception as e:
         print(f"Error: {str(e)}", file=sys.stderr)
         sys.exit(1)
 
 def main():
-    # Get audio path from user
-    audio_path = input("Please enter the path to your audio file: ").strip()
+    parser = add_transcription_arguments(argparse.ArgumentParser(description="Print a transcription second by second"))
+    add_streaming_arguments(parser)
+    args = parser.parse_args()
+    check_streaming_arguments(parser, args)
+
+    # Get audio path from user if it was not passed on the command line
+    audio_path = args.audio_path or input("Please enter the path to your audio file: ").strip()
     
     if not audio_path:
         print("Error: No audio path provided", file=sys.stderr)
         sys.exit(1)
     
     # Process the audio file
-    transcribe_by_second(audio_path)
+    settings = settings_from_args(args)
+    if args.stream:
+        stream_by_second(audio_path, args.model, args.window, args.overlap, settings)
+        return
+    transcribe_by_second(audio_path, args.model, args.server, not args.no_cache, settings)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
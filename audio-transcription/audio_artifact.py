@@ -0,0 +1,107 @@
+"""Decode a recording once into files next to its markers JSON, shared by transcription and rendering
+
+    <markers stem>.pcm   16 kHz mono 16-bit PCM, memory-mapped for transcription
+    <markers stem>.m4a   AAC, only when the source cannot be stream copied into an MP4
+
+Both come out of a single ffmpeg pass. The markers metadata records them
+under "audio_artifact" with the source file's size and modification time,
+so the renderer can tell when they no longer match the audio and stream
+copies the AAC instead of encoding the source again on every render.
+"""
+import json
+import os
+import re
+import subprocess
+
+import numpy as np
+
+# Whisper models expect 16 kHz mono audio
+SAMPLE_RATE = 16000
+AAC_BITRATE = "192k"
+
+# Audio codecs an .mp4 container can hold as-is (see video-generator/ffmpeg_tools.py)
+MP4_AUDIO_CODECS = ('aac', 'mp3', 'alac')
+
+
+def artifact_paths(markers_file):
+    """(PCM path, AAC path) for a markers file"""
+    stem = os.path.splitext(markers_file)[0]
+    return f"{stem}.pcm", f"{stem}.m4a"
+
+
+def _source_stamp(audio_path):
+    stat = os.stat(audio_path)
+    return {"source_size": stat.st_size, "source_mtime": stat.st_mtime}
+
+
+def _audio_codec(audio_path):
+    """The first audio stream's codec name, from ffmpeg's description of the file"""
+    result = subprocess.run(["ffmpeg", "-hide_banner", "-i", audio_path],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    match = re.search(r"Stream #\S+.*?: Audio: (\w+)", result.stderr.decode('utf-8', errors='replace'))
+    if match is None:
+        raise RuntimeError(f"No audio stream found in {audio_path}")
+    return match.group(1)
+
+
+def is_current(entry, audio_path=None):
+    """Whether the artifact files exist and were made from the audio file as it is now"""
+    if not entry or not os.path.exists(entry["pcm"]):
+        return False
+    if entry.get("aac") and not os.path.exists(entry["aac"]):
+        return False
+    audio_path = audio_path or entry["source"]
+    return os.path.exists(audio_path) and _source_stamp(audio_path) == {
+        "source_size": entry["source_size"], "source_mtime": entry["source_mtime"]}
+
+
+def prepare_audio(audio_path, markers_file, previous=None, aac_bitrate=AAC_BITRATE):
+    """Decode audio_path once and return the metadata entry describing its artifacts
+
+    previous is the entry from an earlier markers file; it is returned
+    unchanged when its files still match the audio.
+    """
+    if previous and previous.get("source") == audio_path and is_current(previous):
+        print(f"Reusing decoded audio: {previous['pcm']}")
+        return previous
+
+    pcm_path, aac_path = artifact_paths(markers_file)
+    codec = _audio_codec(audio_path)
+    if codec in MP4_AUDIO_CODECS:
+        aac_path = None
+
+    # One decode feeds both outputs; temp names plus rename keep a crash from leaving half a file
+    print(f"Decoding audio once: {audio_path}")
+    cmd = ["ffmpeg", "-nostdin", "-y", "-loglevel", "error", "-i", audio_path,
+           "-map", "0:a:0", "-ac", "1", "-ar", str(SAMPLE_RATE), "-f", "s16le", "-c:a", "pcm_s16le",
+           f"{pcm_path}.tmp"]
+    if aac_path:
+        cmd += ["-map", "0:a:0", "-c:a", "aac", "-b:a", aac_bitrate, "-f", "mp4", f"{aac_path}.tmp"]
+    result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        for path in (pcm_path, aac_path):
+            if path and os.path.exists(f"{path}.tmp"):
+                os.remove(f"{path}.tmp")
+        raise RuntimeError(f"ffmpeg failed to decode audio: {result.stderr.decode('utf-8', errors='replace')}")
+
+    os.replace(f"{pcm_path}.tmp", pcm_path)
+    if aac_path:
+        os.replace(f"{aac_path}.tmp", aac_path)
+
+    return dict({"source": audio_path, "source_codec": codec, "pcm": pcm_path, "sample_rate": SAMPLE_RATE,
+                 "aac": aac_path}, **_source_stamp(audio_path))
+
+
+def load_samples(entry):
+    """The PCM artifact as float32 samples, read through a memory map"""
+    pcm = np.memmap(entry["pcm"], dtype='<i2', mode='r')
+    return pcm.astype(np.float32) / 32768.0
+
+
+def recorded_artifact(markers_file):
+    """The artifact entry of an existing markers JSON, or None"""
+    try:
+        with open(markers_file, 'r', encoding='utf-8') as f:
+            return json.load(f)["metadata"].get("audio_artifact")
+    except (OSError, ValueError, KeyError):
+        return None
@@ -0,0 +1,232 @@
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from inference import add_inference_arguments, inference_settings, settings_from_args
+from markers import build_markers, save_markers
+from transcriber import DEFAULT_MODEL, load_model, transcribe
+
+AUDIO_EXTENSIONS = ('.mp3', '.wav', '.m4a', '.flac', '.ogg', '.aac', '.mp4', '.webm')
+
+# Approximate resident memory of one loaded model on CPU, in GB
+MODEL_MEMORY_GB = {
+    'tiny': 1,
+    'base': 1,
+    'small': 2,
+    'medium': 5,
+    'large': 10,
+    'turbo': 6
+}
+
+# Per-worker state, set up once by _init_worker
+_worker_model = None
+_worker_server = None
+_worker_use_cache = True
+_worker_settings = None
+
+
+def find_audio_files(inputs, extensions=AUDIO_EXTENSIONS):
+    """Expand directories and glob patterns into a sorted list of audio files"""
+    files = []
+    for item in inputs:
+        if os.path.isdir(item):
+            candidates = [os.path.join(item, name) for name in os.listdir(item)]
+        else:
+            candidates = glob.glob(item, recursive=True)
+
+        for path in candidates:
+            if os.path.isfile(path) and path.lower().endswith(extensions):
+                files.append(os.path.abspath(path))
+
+    return sorted(set(files))
+
+
+def _available_memory_gb():
+    """Memory available for new processes, or None when it cannot be read"""
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) / (1024 ** 2)
+    except OSError:
+        pass
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE') / (1024 ** 3)
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def default_worker_count(model_name, file_count):
+    """Size the pool to the cores and to how many model copies fit in memory"""
+    workers = os.cpu_count() or 1
+
+    memory = _available_memory_gb()
+    if memory is not None:
+        per_model = MODEL_MEMORY_GB.get(model_name.split('.')[0].split('-')[0], 2)
+        workers = min(workers, max(1, int(memory // per_model)))
+
+    return max(1, min(workers, file_count))
+
+
+def output_path_for(audio_path, output_dir=None):
+    """Markers JSON path for one audio file, e.g. talk.mp3 -> talk_markers.json"""
+    stem = os.path.splitext(os.path.basename(audio_path))[0]
+    directory = output_dir or os.path.dirname(audio_path)
+    return os.path.join(directory, f"{stem}_markers.json")
+
+
+def output_paths_for(audio_files, output_dir=None):
+    """Markers JSON path for each audio file, unique across the batch
+
+    Files that would share a markers file (and with it the decoded audio
+    next to it) are told apart: with output_dir they keep their directory
+    below the inputs' common directory, and files differing only in
+    extension keep it in the name, e.g. talk.wav -> talk_wav_markers.json.
+    """
+    paths = {audio_path: output_path_for(audio_path, output_dir) for audio_path in audio_files}
+
+    if output_dir and len(audio_files) > 1:
+        root = os.path.commonpath([os.path.dirname(audio_path) for audio_path in audio_files])
+        for audio_path in _colliding(paths):
+            subdirectory = os.path.relpath(os.path.dirname(audio_path), root)
+            paths[audio_path] = output_path_for(audio_path, os.path.join(output_dir, subdirectory))
+
+    for audio_path in _colliding(paths):
+        stem = paths[audio_path][:-len("_markers.json")]
+        extension = os.path.splitext(audio_path)[1].lstrip('.')
+        paths[audio_path] = f"{stem}_{extension}_markers.json"
+
+    # Anything still shared would overwrite another file's results
+    duplicates = _colliding(paths)
+    if duplicates:
+        raise ValueError(f"Audio files would share markers files: {', '.join(sorted(duplicates))}")
+    return paths
+
+
+def _colliding(paths):
+    """Audio files whose output path is also another file's"""
+    counts = {}
+    for output_path in paths.values():
+        counts[output_path] = counts.get(output_path, 0) + 1
+    return [audio_path for audio_path, output_path in paths.items() if counts[output_path] > 1]
+
+
+def _init_worker(model_name, server_url, settings, use_cache):
+    """Load this worker's own model once, before it takes any files"""
+    global _worker_model, _worker_server, _worker_use_cache, _worker_settings
+
+    _worker_server = server_url
+    _worker_use_cache = use_cache
+    _worker_settings = settings
+    if not server_url:
+        _worker_model = load_model(model_name, settings)
+
+
+def _transcribe_file(audio_path, output_path, model_name):
+    start = time.time()
+    result = transcribe(audio_path, model_name, _worker_server, model=_worker_model,
+                        use_cache=_worker_use_cache, settings=_worker_settings)
+
+    json_data = build_markers(result, audio_path, verbose=False)
+    save_markers(json_data, output_path)
+
+    markers = sum(1 for entry in json_data["segments"].values() if entry["marker"] is not None)
+    return markers, time.time() - start
+
+
+def transcribe_batch(audio_files, model_name=DEFAULT_MODEL, workers=None, output_dir=None,
+                     server_url=None, skip_existing=False, use_cache=True, settings=None):
+    """Transcribe many files in parallel, returning (succeeded, failed) lists"""
+    jobs = []
+    output_paths = output_paths_for(audio_files, output_dir)
+    for audio_path in audio_files:
+        output_path = output_paths[audio_path]
+        if skip_existing and os.path.exists(output_path):
+            print(f"Skipping {audio_path}: {output_path} exists")
+            continue
+        jobs.append((audio_path, output_path))
+
+    succeeded, failed = [], []
+    if not jobs:
+        return succeeded, failed
+
+    if output_dir:
+        for directory in {os.path.dirname(output_path) for audio_path, output_path in jobs}:
+            os.makedirs(directory, exist_ok=True)
+
+    workers = workers or default_worker_count(model_name, len(jobs))
+    settings = settings or inference_settings()
+    # Split the cores between workers so they do not oversubscribe each other
+    if not settings.threads:
+        settings = settings._replace(threads=max(1, (os.cpu_count() or 1) // workers))
+    print(f"Transcribing {len(jobs)} files with {workers} workers "
+          f"({settings.threads} threads each, {settings.backend})...")
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(model_name, server_url, settings, use_cache)) as pool:
+        futures = {
+            pool.submit(_transcribe_file, audio_path, output_path, model_name): (audio_path, output_path)
+            for audio_path, output_path in jobs
+        }
+
+        for done, future in enumerate(as_completed(futures), start=1):
+            audio_path, output_path = futures[future]
+            try:
+                markers, elapsed = future.result()
+            except Exception as e:
+                # One bad file must not abort the rest of the batch
+                failed.append((audio_path, str(e)))
+                print(f"[{done}/{len(jobs)}] FAILED {audio_path}: {str(e)}", file=sys.stderr)
+            else:
+                succeeded.append((audio_path, output_path))
+                print(f"[{done}/{len(jobs)}] {audio_path} -> {output_path} "
+                      f"({markers} markers, {elapsed:.1f}s)")
+
+    return succeeded, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcribe a directory or glob of audio files into markers JSON files")
+    parser.add_argument("inputs", nargs="+", help="Audio files, directories or glob patterns")
+    parser.add_argument("--model", default=DEFAULT_MODEL,
+                        help=f"Whisper model size (default: {DEFAULT_MODEL})")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes (default: sized to cores and memory)")
+    parser.add_argument("--output-dir", default=None,
+                        help="Directory for the markers files (default: next to each audio file)")
+    parser.add_argument("--server", metavar="URL", default=None,
+                        help="Send audio to a running model server instead of loading models per worker")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Ignore cached transcriptions and always run inference")
+    parser.add_argument("--skip-existing", action="store_true",
+                        help="Skip files whose markers JSON already exists")
+    add_inference_arguments(parser)
+    args = parser.parse_args()
+
+    audio_files = find_audio_files(args.inputs)
+    if not audio_files:
+        print("Error: No audio files found", file=sys.stderr)
+        sys.exit(1)
+
+    start = time.time()
+    succeeded, failed = transcribe_batch(audio_files, args.model, args.workers, args.output_dir,
+                                         args.server, args.skip_existing, not args.no_cache,
+                                         settings_from_args(args))
+
+    print("\nBatch summary:")
+    print("------------------------")
+    print(f"Transcribed: {len(succeeded)}")
+    print(f"Failed: {len(failed)}")
+    for audio_path, error in failed:
+        print(f"  {audio_path}: {error}")
+    print(f"Total time: {time.time() - start:.1f}s")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+import argparse
+import csv
+import glob
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from marker_store import MarkerStore
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp', '.bmp', '.gif')
+
+# Leading bytes of the image formats moviepy/Pillow can open
+IMAGE_SIGNATURES = (
+    b'\xff\xd8\xff',            # JPEG
+    b'\x89PNG\r\n\x1a\n',       # PNG
+    b'GIF87a', b'GIF89a',       # GIF
+    b'BM',                      # BMP
+    b'RIFF'                     # WebP (RIFF....WEBP)
+)
+
+
+def _parse_markers(spec):
+    """'7' -> [7], '10-14' -> [10, 11, 12, 13, 14]"""
+    spec = str(spec).strip()
+    if '-' in spec:
+        first, last = (int(part) for part in spec.split('-', 1))
+        if last < first:
+            raise ValueError(f"Invalid marker range '{spec}'")
+        return list(range(first, last + 1))
+    return [int(spec)]
+
+
+def _read_rows(mapping_file):
+    """Yield (marker spec, image spec) pairs from a CSV or JSON mapping file"""
+    if mapping_file.lower().endswith('.json'):
+        with open(mapping_file, 'r', encoding='utf-8') as f:
+            mapping = json.load(f)
+        if isinstance(mapping, dict):
+            yield from mapping.items()
+        else:
+            for row in mapping:
+                yield row["marker"], row["image"]
+        return
+
+    with open(mapping_file, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        first = True
+        for row in reader:
+            if not row or row[0].strip().startswith('#'):
+                continue
+            # Only the first row may be a header such as "marker,image"
+            if first and not row[0].strip()[:1].isdigit():
+                first = False
+                continue
+            first = False
+            if len(row) < 2:
+                raise ValueError(f"{mapping_file} line {reader.line_num}: expected 'marker,image' "
+                                 f"but got: {','.join(row)}")
+            try:
+                _parse_markers(row[0])
+            except ValueError:
+                raise ValueError(f"{mapping_file} line {reader.line_num}: '{row[0]}' is not a marker "
+                                 f"number or range")
+            yield row[0], row[1]
+
+
+def load_mapping(mapping_file):
+    """Read a mapping file into {marker: image path}, expanding ranges and globs
+
+    A glob mapped to a single marker takes its first match in sorted order; a
+    glob mapped to a marker range hands out its matches to the markers in order.
+    """
+    base_dir = os.path.dirname(os.path.abspath(mapping_file))
+    assignments = {}
+
+    for marker_spec, image_spec in _read_rows(mapping_file):
+        markers = _parse_markers(marker_spec)
+        pattern = os.path.expanduser(str(image_spec).strip())
+        if not os.path.isabs(pattern):
+            pattern = os.path.join(base_dir, pattern)
+
+        if glob.has_magic(pattern):
+            images = sorted(glob.glob(pattern))
+            if not images:
+                raise ValueError(f"No files match '{image_spec}' for marker {marker_spec}")
+            if len(markers) > 1 and len(images) < len(markers):
+                raise ValueError(f"'{image_spec}' matches {len(images)} files but "
+                                 f"marker range {marker_spec} needs {len(markers)}")
+        else:
+            images = [pattern] * len(markers)
+
+        for marker, image_path in zip(markers, images):
+            assignments[marker] = image_path
+
+    return assignments
+
+
+def _check_image(image_path):
+    """Return an error message for an unusable image, or None"""
+    if not os.path.isfile(image_path):
+        return "file not found"
+    if not image_path.lower().endswith(IMAGE_EXTENSIONS):
+        return f"unsupported extension (expected one of {', '.join(IMAGE_EXTENSIONS)})"
+    try:
+        with open(image_path, 'rb') as f:
+            header = f.read(12)
+    except OSError as e:
+        return str(e)
+    if not header.startswith(IMAGE_SIGNATURES) or (header.startswith(b'RIFF') and header[8:12] != b'WEBP'):
+        return "not a recognised image file"
+    return None
+
+
+def validate_images(image_paths, workers=16):
+    """Check every distinct image path concurrently, returning {path: error}"""
+    unique_paths = sorted(set(image_paths))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(_check_image, unique_paths)
+    return {path: error for path, error in zip(unique_paths, results) if error}
+
+
+def bulk_assign(json_file, assignments, skip_invalid=False, dry_run=False):
+    """Validate and apply {marker: image path} in one pass and one write
+
+    Returns (applied, errors) where errors maps marker to a message.
+    """
+    store = MarkerStore(json_file, use_edit_log=False)
+    errors = {}
+
+    for marker in assignments:
+        if marker not in store.index:
+            errors[marker] = "marker not found"
+
+    invalid_images = validate_images(path for marker, path in assignments.items() if marker not in errors)
+    for marker, image_path in assignments.items():
+        if image_path in invalid_images:
+            errors[marker] = f"{image_path}: {invalid_images[image_path]}"
+
+    if errors and not skip_invalid:
+        return {}, errors
+
+    applied = {marker: path for marker, path in assignments.items() if marker not in errors}
+    if not dry_run:
+        store.assign_images(applied)
+        store.flush()
+    return applied, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Assign images to many markers at once from a CSV or JSON mapping")
+    parser.add_argument("mapping", help="CSV rows 'marker,image' or JSON {marker: image}; "
+                                        "markers may be ranges like 10-14 and images may be globs")
+    parser.add_argument("--json", default="transcription_markers.json",
+                        help="Markers JSON to update (default: transcription_markers.json)")
+    parser.add_argument("--skip-invalid", action="store_true",
+                        help="Apply the valid assignments even if some fail validation")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Validate only, without writing the markers JSON")
+    args = parser.parse_args()
+
+    try:
+        assignments = load_mapping(args.mapping)
+        applied, errors = bulk_assign(args.json, assignments, args.skip_invalid, args.dry_run)
+    except (OSError, ValueError, json.JSONDecodeError) as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+
+    for marker in sorted(errors):
+        print(f"Marker {marker}: {errors[marker]}", file=sys.stderr)
+
+    if errors and not args.skip_invalid:
+        print(f"\n{len(errors)} of {len(assignments)} assignments are invalid; nothing was written",
+              file=sys.stderr)
+        sys.exit(1)
+
+    action = "Validated" if args.dry_run else "Assigned"
+    print(f"{action} images for {len(applied)} markers in {args.json}")
+
+
+if __name__ == "__main__":
+    main()
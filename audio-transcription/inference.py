@@ -0,0 +1,276 @@
+"""CPU inference backends for Whisper: fp32 or int8-quantized, with thread settings and batched decoding"""
+import os
+from collections import namedtuple
+
+# vad is imported where it is used: it pulls in numpy, which the
+# media_pipeline CLI does not need to parse its arguments
+
+DEFAULT_MODEL = "base"
+DEFAULT_BACKEND = "fp32"
+BACKENDS = ("fp32", "int8")
+
+# Environment variables read when a setting is not passed explicitly, so the
+# model server, batch workers and streaming pick up the same configuration
+BACKEND_ENV = "WHISPER_BACKEND"
+THREADS_ENV = "WHISPER_THREADS"
+INTEROP_THREADS_ENV = "WHISPER_INTEROP_THREADS"
+BATCH_SIZE_ENV = "WHISPER_BATCH_SIZE"
+VAD_ENV = "WHISPER_VAD"
+
+# Whisper's defaults for treating a window as silence
+NO_SPEECH_THRESHOLD = 0.6
+LOGPROB_THRESHOLD = -1.0
+
+InferenceSettings = namedtuple("InferenceSettings", ["backend", "threads", "interop_threads", "batch_size", "vad"],
+                               defaults=(None,))
+
+
+def _env_int(name):
+    value = os.environ.get(name)
+    return int(value) if value else None
+
+
+def inference_settings(backend=None, threads=None, interop_threads=None, batch_size=None, vad=None):
+    """Settings from the arguments, falling back to the WHISPER_* environment variables
+
+    threads and interop_threads of None leave PyTorch's defaults; a
+    batch_size above 1 selects the batched decoder. vad (vad.VadSettings)
+    turns on the speech detection pre-pass; WHISPER_VAD=1 turns it on with
+    the default thresholds.
+    """
+    if vad is None and os.environ.get(VAD_ENV, "") not in ("", "0"):
+        from vad import VadSettings
+        vad = VadSettings()
+    backend = backend or os.environ.get(BACKEND_ENV) or DEFAULT_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{backend}' (choose from {', '.join(BACKENDS)})")
+    return InferenceSettings(
+        backend,
+        threads or _env_int(THREADS_ENV),
+        interop_threads or _env_int(INTEROP_THREADS_ENV),
+        batch_size or _env_int(BATCH_SIZE_ENV) or 1,
+        vad
+    )
+
+
+def cache_model_name(model_name, settings):
+    """Model name for transcription cache keys; plain fp32 keeps the bare name so older entries stay valid"""
+    name = model_name
+    if settings.backend != DEFAULT_BACKEND:
+        name += f"@{settings.backend}"
+    if settings.batch_size > 1:
+        name += f"/batch{settings.batch_size}"
+    if settings.vad:
+        # Different thresholds send different audio to the model
+        name += "+vad(" + ",".join(f"{value:g}" for value in settings.vad) + ")"
+    return name
+
+
+def settings_to_json(settings):
+    """The settings that change what a transcription returns (not thread counts), as JSON values"""
+    return {"backend": settings.backend, "batch_size": settings.batch_size,
+            "vad": list(settings.vad) if settings.vad else None}
+
+
+def settings_from_json(values):
+    """InferenceSettings from settings_to_json's output, with the thread counts left unset"""
+    vad = None
+    if values.get("vad"):
+        from vad import VadSettings
+        vad = VadSettings(*values["vad"])
+    return InferenceSettings(values["backend"], None, None, values["batch_size"], vad)
+
+
+def configure_threads(threads=None, interop_threads=None):
+    """Set PyTorch's intra-op and inter-op thread pools"""
+    import torch
+
+    if threads:
+        torch.set_num_threads(threads)
+    if interop_threads:
+        try:
+            torch.set_num_interop_threads(interop_threads)
+        except RuntimeError:
+            # Only possible before the first parallel operation in this process
+            print("Warning: inter-op threads can no longer be changed in this process")
+
+
+def quantize_int8(model):
+    """Dynamically quantize the model's Linear layers to int8
+
+    Weights are stored as int8 and activations quantized on the fly, which
+    cuts memory and speeds up the matrix multiplies that dominate CPU
+    inference.
+    """
+    import torch
+    import whisper.model
+
+    # Pick the quantized kernels this CPU has (fbgemm on x86, qnnpack on ARM)
+    engines = torch.backends.quantized.supported_engines
+    if 'fbgemm' not in engines and 'qnnpack' in engines:
+        torch.backends.quantized.engine = 'qnnpack'
+
+    # Whisper's Linear subclass only adds a dtype cast for fp16; as a plain
+    # nn.Linear it is recognised by quantize_dynamic
+    for module in model.modules():
+        if isinstance(module, whisper.model.Linear):
+            module.__class__ = torch.nn.Linear
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def load_whisper(model_name, settings):
+    """Load a Whisper model configured by settings; returns an object with transcribe()"""
+    import whisper
+
+    configure_threads(settings.threads, settings.interop_threads)
+    print(f"Loading Whisper model '{model_name}' ({settings.backend})...")
+    if settings.backend == "int8":
+        # Quantized kernels are CPU only
+        model = quantize_int8(whisper.load_model(model_name, device="cpu"))
+    else:
+        model = whisper.load_model(model_name)
+
+    if settings.batch_size > 1:
+        model = BatchedDecoder(model, settings.batch_size)
+    if settings.vad:
+        from vad import SpeechOnlyModel
+        model = SpeechOnlyModel(model, settings.vad)
+    return model
+
+
+class BatchedDecoder:
+    """Transcribes fixed 30 second windows several at a time through model.decode
+
+    Whisper's transcribe() decodes one window after another, seeking to the
+    last timestamp it produced; here the windows are fixed, so a whole batch
+    goes through the encoder and decoder together. A word cut by a window
+    edge can be lost or split; the benchmarks report the word error rate
+    against the sequential decoder. Returns the same result dict as
+    transcribe(); options it does not use are ignored.
+    """
+
+    def __init__(self, model, batch_size=8):
+        self.model = model
+        self.batch_size = batch_size
+
+    def _segments(self, result, tokenizer, seek, num_frames):
+        """Split one window's tokens into segments at its timestamp tokens"""
+        from whisper.audio import HOP_LENGTH, SAMPLE_RATE
+
+        offset = seek * HOP_LENGTH / SAMPLE_RATE
+        precision = HOP_LENGTH * 2 / SAMPLE_RATE
+        window_end = num_frames * HOP_LENGTH / SAMPLE_RATE
+
+        segments = []
+        start = None
+        last_end = 0.0
+        tokens = []
+
+        def close(end):
+            if tokens:
+                segments.append({
+                    "seek": seek,
+                    "start": offset + start,
+                    "end": offset + max(start, end),
+                    "text": tokenizer.decode(tokens),
+                    "tokens": list(tokens),
+                    "temperature": result.temperature,
+                    "avg_logprob": result.avg_logprob,
+                    "compression_ratio": result.compression_ratio,
+                    "no_speech_prob": result.no_speech_prob
+                })
+
+        for token in result.tokens:
+            if token >= tokenizer.timestamp_begin:
+                time = (token - tokenizer.timestamp_begin) * precision
+                if tokens:
+                    close(time)
+                    tokens = []
+                    start = None
+                    last_end = time
+                elif start is None:
+                    start = time
+            elif token < tokenizer.eot:
+                if start is None:
+                    start = last_end
+                tokens.append(token)
+        close(window_end)
+        return segments
+
+    def transcribe(self, audio, language=None, word_timestamps=False, initial_prompt=None,
+                   temperature=0.0, **options):
+        import torch
+        import whisper
+        from whisper.audio import N_FRAMES, N_SAMPLES, log_mel_spectrogram, pad_or_trim
+        from whisper.timing import add_word_timestamps
+        from whisper.tokenizer import get_tokenizer
+
+        if isinstance(audio, str):
+            audio = whisper.load_audio(audio)
+        # Pad with real silence, as transcribe() does, so the last window decodes the same way
+        mel = log_mel_spectrogram(audio, self.model.dims.n_mels, padding=N_SAMPLES)
+        content_frames = mel.shape[-1] - N_FRAMES
+
+        if language is None:
+            language = "en"
+            if self.model.is_multilingual:
+                _, probs = self.model.detect_language(pad_or_trim(mel, N_FRAMES).to(self.model.device))
+                language = max(probs, key=probs.get)
+
+        tokenizer = get_tokenizer(self.model.is_multilingual, num_languages=self.model.num_languages,
+                                  language=language, task="transcribe")
+        if isinstance(temperature, (list, tuple)):
+            temperature = temperature[0]
+        decode_options = whisper.DecodingOptions(language=language, task="transcribe", temperature=temperature,
+                                                 prompt=initial_prompt, fp16=False)
+
+        segments = []
+        last_speech_timestamp = 0.0
+        seeks = list(range(0, content_frames, N_FRAMES))
+        for batch_start in range(0, len(seeks), self.batch_size):
+            batch = seeks[batch_start:batch_start + self.batch_size]
+            mels = torch.stack([mel[:, seek:seek + N_FRAMES] for seek in batch]).to(self.model.device)
+            results = self.model.decode(mels, decode_options)
+
+            for seek, window_mel, result in zip(batch, mels, results):
+                if result.no_speech_prob > NO_SPEECH_THRESHOLD and result.avg_logprob < LOGPROB_THRESHOLD:
+                    continue
+                num_frames = min(N_FRAMES, content_frames - seek)
+                window_segments = self._segments(result, tokenizer, seek, num_frames)
+                if word_timestamps and window_segments:
+                    add_word_timestamps(segments=window_segments, model=self.model, tokenizer=tokenizer,
+                                        mel=window_mel, num_frames=num_frames,
+                                        last_speech_timestamp=last_speech_timestamp)
+                    words = [word for segment in window_segments for word in segment.get("words", [])]
+                    if words:
+                        last_speech_timestamp = words[-1]["end"]
+                segments.extend(window_segments)
+
+        for index, segment in enumerate(segments):
+            segment["id"] = index
+        return {"text": "".join(segment["text"] for segment in segments), "segments": segments,
+                "language": language}
+
+
+def add_inference_arguments(parser):
+    """Add the --backend, thread and batching flags shared by the transcription scripts"""
+    from vad import add_vad_arguments
+
+    parser.add_argument("--backend", choices=BACKENDS, default=None,
+                        help=f"Inference backend (default: ${BACKEND_ENV} or {DEFAULT_BACKEND})")
+    parser.add_argument("--threads", type=int, default=None,
+                        help=f"PyTorch intra-op threads (default: ${THREADS_ENV} or PyTorch's choice)")
+    parser.add_argument("--interop-threads", type=int, default=None,
+                        help=f"PyTorch inter-op threads (default: ${INTEROP_THREADS_ENV} or PyTorch's choice)")
+    parser.add_argument("--batch-size", type=int, default=None,
+                        help=f"Decode this many 30 s windows at once; 1 uses Whisper's sequential "
+                             f"decoder (default: ${BATCH_SIZE_ENV} or 1)")
+    add_vad_arguments(parser)
+    return parser
+
+
+def settings_from_args(args):
+    from vad import vad_settings_from_args
+
+    return inference_settings(args.backend, args.threads, args.interop_threads, args.batch_size,
+                              vad_settings_from_args(args))
@@ -1,91 +1,106 @@
 import json
 import os
-from typing import Dict, List
+import sys
+
+# Previews render through the pipeline package at the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import media_pipeline
+from marker_store import MarkerStore, sidecar_path_for
 
 def read_markers(json_file: str = "transcription_markers.json"):
     try:
-        # Read the JSON file
-        with open(json_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        # While a streaming transcription runs, only its JSONL sidecar exists
+        if not os.path.exists(json_file) and os.path.exists(sidecar_path_for(json_file)):
+            json_file = sidecar_path_for(json_file)
         
-        # Extract segments from new JSON structure
-        segments = data["segments"]
+        # Read the JSON file and index entries by marker
+        store = MarkerStore(json_file)
+        metadata = store.metadata
         
         # Show metadata
-        print("\nAudio file:", data["metadata"]["audio_file"])
-        print(f"Duration: {data['metadata']['total_duration']} seconds")
-        print("Processed on:", data["metadata"]["processed_date"])
+        print("\nAudio file:", metadata["audio_file"])
+        print(f"Duration: {metadata['total_duration']} seconds")
+        print("Processed on:", metadata["processed_date"])
         
         # Get all unique markers (excluding None)
-        markers = set()
-        for entry in segments.values():
-            if entry["marker"] is not None:
-                markers.add(entry["marker"])
+        markers = store.markers()
         
         total_markers = len(markers)
         print(f"\nTotal number of markers: {total_markers}")
         print(f"Marker range: 1 to {max(markers)}\n")
+        if store.partial:
+            print("Partial streaming transcription: browsing only, images can be added once it finishes")
+        
+        try:
+            _edit_loop(store)
+        finally:
+            # Write all of this session's edits in one atomic rewrite
+            if store.flush():
+                print(f"Changes saved to {json_file}")
+                
+    except FileNotFoundError:
+        print(f"Error: Could not find {json_file}")
+    except json.JSONDecodeError:
+        print(f"Error: Invalid JSON format in {json_file}")
+    except Exception as e:
+        print(f"Error: {str(e)}")
+
+def _edit_loop(store: MarkerStore):
+    while True:
+        # Get user input
+        user_input = input("\nEnter a marker number to view (or 'q' to quit): ").strip()
         
-        while True:
-            # Get user input
-            user_input = input("\nEnter a marker number to view (or 'q' to quit): ").strip()
+        if user_input.lower() == 'q':
+            break
+        
+        try:
+            marker_num = int(user_input)
             
-            if user_input.lower() == 'q':
-                break
+            # Find all entries with this marker
+            found_entries = [entry for second, entry in store.entries(marker_num)]
             
-            try:
-                marker_num = int(user_input)
+            if found_entries:
+                print(f"\nFound entries for marker {marker_num}:")
+                print("-" * 50)
+                for entry in found_entries:
+                    print(f"Time: {entry['timestamp']} | {entry['text']}")
+                    if "image_path" in entry:
+                        print(f"Associated image: {entry['image_path']}")
+                print("-" * 50)
                 
-                # Find all entries with this marker
-                found_entries = []
-                for second, entry in segments.items():
-                    if entry["marker"] == marker_num:
-                        found_entries.append(entry)
+                # Ask if user wants to add an image
+                if store.partial:
+                    continue
+                add_image = input("\nWould you like to add an image to this marker? (y/n): ").strip().lower()
                 
-                if found_entries:
-                    print(f"\nFound entries for marker {marker_num}:")
-                    print("-" * 50)
-                    for entry in found_entries:
-                        print(f"Time: {entry['timestamp']} | {entry['text']}")
-                        if "image_path" in entry:
-                            print(f"Associated image: {entry['image_path']}")
-                    print("-" * 50)
-                    
-                    # Ask if user wants to add an image
-                    add_image = input("\nWould you like to add an image to this marker? (y/n): ").strip().lower()
+                if add_image == 'y':
+                    image_path = input("Enter the path to the image: ").strip()
                     
-                    if add_image == 'y':
-                        image_path = input("Enter the path to the image: ").strip()
-                        
-                        # Verify the image path exists
-                        if os.path.exists(image_path):
-                            # Add image path to all segments with this marker
-                            modified = False
-                            for second, entry in segments.items():
-                                if entry["marker"] == marker_num:
-                                    entry["image_path"] = image_path
-                                    modified = True
+                    # Verify the image path exists
+                    if os.path.exists(image_path):
+                        # Add image path to all segments with this marker; the JSON
+                        # itself is rewritten once when the session ends
+                        if store.assign_image(marker_num, image_path):
+                            print(f"\nImage path added to marker {marker_num}")
                             
-                            if modified:
-                                # Save the updated JSON
-                                data["segments"] = segments
-                                with open(json_file, 'w', encoding='utf-8') as f:
-                                    json.dump(data, f, indent=2, ensure_ascii=False)
-                                print(f"\nImage path added to marker {marker_num}")
-                        else:
-                            print("Error: Image file not found")
-                else:
-                    print(f"No entries found for marker {marker_num}")
-                    
-            except ValueError:
-                print("Please enter a valid number")
+                            preview = input("Render a preview of this marker? (y/n): ").strip().lower()
+                            if preview == 'y':
+                                _preview_marker(store, marker_num)
+                    else:
+                        print("Error: Image file not found")
+            else:
+                print(f"No entries found for marker {marker_num}")
                 
-    except FileNotFoundError:
-        print(f"Error: Could not find {json_file}")
-    except json.JSONDecodeError:
-        print(f"Error: Invalid JSON format in {json_file}")
+        except ValueError:
+            print("Please enter a valid number")
+
+def _preview_marker(store: MarkerStore, marker_num: int):
+    # Rendered from the data in memory, so the preview includes edits not saved yet
+    output_path = f"{os.path.splitext(store.json_file)[0]}_marker_{marker_num}_preview.mp4"
+    try:
+        media_pipeline.preview(store.data, output_path, marker=marker_num)
     except Exception as e:
-        print(f"Error: {str(e)}")
+        print(f"Error rendering preview: {str(e)}")
 
 if __name__ == "__main__":
     read_markers()
\ No newline at end of file
@@ -0,0 +1,140 @@
+import json
+import os
+import tempfile
+from collections import defaultdict
+
+
+def edit_log_path_for(json_file):
+    return f"{json_file}.edits"
+
+
+def sidecar_path_for(output_file):
+    """The JSONL file a streaming transcription writes entries to before the markers JSON exists"""
+    return f"{output_file}l" if output_file.endswith(".json") else f"{output_file}.jsonl"
+
+
+class MarkerStore:
+    """Markers JSON held in memory with a marker -> seconds index
+
+    Edits are appended to a small log next to the JSON as they happen, so each
+    one costs O(changed entries) on disk. flush() folds them into the JSON with
+    a single atomic rewrite and removes the log.
+
+    A streaming sidecar (.jsonl) opens read-only with the entries written so
+    far, so markers can be browsed while the transcription is still running.
+    """
+
+    def __init__(self, json_file, use_edit_log=True):
+        self.json_file = json_file
+        self.use_edit_log = use_edit_log
+        self.edit_log = edit_log_path_for(json_file)
+        self.partial = json_file.endswith(".jsonl")
+
+        if self.partial:
+            # markers pulls in numpy; plain JSON stores start without it
+            from markers import load_partial_markers
+            self.data = load_partial_markers(json_file)
+        else:
+            with open(json_file, 'r', encoding='utf-8') as f:
+                self.data = json.load(f)
+
+        self.segments = self.data["segments"]
+        self.metadata = self.data["metadata"]
+        self.dirty = False
+        self._build_index()
+
+        # Recover edits left by a session that did not flush
+        if os.path.exists(self.edit_log):
+            replayed = self._replay_edit_log()
+            if replayed:
+                print(f"Recovered {replayed} unsaved edits from {self.edit_log}")
+
+    def _build_index(self):
+        self.index = defaultdict(list)
+        for second, entry in self.segments.items():
+            if entry["marker"] is not None:
+                self.index[entry["marker"]].append(second)
+
+    def _replay_edit_log(self):
+        replayed = 0
+        with open(self.edit_log, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    edit = json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash can leave the last line half written
+                    break
+                self._apply(edit["marker"], edit["image_path"])
+                replayed += 1
+        return replayed
+
+    def markers(self):
+        """Sorted list of marker numbers"""
+        return sorted(self.index)
+
+    def entries(self, marker):
+        """(second, entry) pairs for one marker, in time order"""
+        return [(second, self.segments[second]) for second in self.index.get(marker, [])]
+
+    def _apply(self, marker, image_path):
+        seconds = self.index.get(marker, [])
+        for second in seconds:
+            self.segments[second]["image_path"] = image_path
+        if seconds:
+            self.dirty = True
+        return len(seconds)
+
+    def assign_image(self, marker, image_path):
+        """Attach an image to every entry of a marker, returning the entries changed"""
+        return self.assign_images({marker: image_path})
+
+    def assign_images(self, assignments):
+        """Apply several marker -> image assignments, logging them in one append"""
+        if self.partial:
+            raise ValueError(f"{self.json_file} is still being transcribed; "
+                             f"assign images in its markers JSON once it is written")
+
+        changed = 0
+        lines = []
+        for marker, image_path in assignments.items():
+            count = self._apply(marker, image_path)
+            if count:
+                changed += count
+                lines.append(json.dumps({"marker": marker, "image_path": image_path}, ensure_ascii=False))
+
+        if lines and self.use_edit_log:
+            with open(self.edit_log, 'a', encoding='utf-8') as f:
+                f.write("\n".join(lines) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+        return changed
+
+    def flush(self):
+        """Write the JSON atomically through a temp file plus rename"""
+        if not self.dirty:
+            return False
+
+        directory = os.path.dirname(os.path.abspath(self.json_file))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".markers-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self.data, f, indent=2, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.json_file)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        if os.path.exists(self.edit_log):
+            os.remove(self.edit_log)
+        self.dirty = False
+        return True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.flush()
+        return False
@@ -0,0 +1,95 @@
+import datetime
+import json
+
+from timing import bucket_segments, to_ms
+
+DEFAULT_MARKERS_FILE = "transcription_markers.json"
+
+
+def make_entry(second, text, marker, start=None, end=None):
+    """One per-second entry of the markers JSON, with word times in milliseconds"""
+    timestamp = f"{second // 60:02d}:{second % 60:02d}"
+    if not text:
+        return {"timestamp": timestamp, "text": "", "marker": None}
+
+    entry = {"timestamp": timestamp, "text": text, "marker": marker}
+    if start is not None:
+        entry["start_ms"] = to_ms(start)
+        entry["end_ms"] = to_ms(end)
+    return entry
+
+
+def make_metadata(audio_path, total_duration):
+    return {
+        "audio_file": audio_path,
+        "total_duration": total_duration,
+        "processed_date": str(datetime.datetime.now()),
+        "timestamp_precision": "ms"
+    }
+
+
+def build_markers(result, audio_path, verbose=True):
+    """Turn a Whisper result into the per-second markers JSON structure"""
+    # Bucket words by the second they start in; each non-empty second gets a marker
+    buckets = bucket_segments(result["segments"])
+
+    if len(buckets.seconds) == 0:
+        raise ValueError("No speech found in transcription")
+
+    # Create JSON structure with metadata and automatic markers
+    max_second = int(buckets.seconds[-1])
+    json_data = {
+        "metadata": make_metadata(audio_path, max_second + 1),
+        "segments": {}
+    }
+    # Keep the speech detection stats with the markers they produced
+    if "vad" in result:
+        json_data["metadata"]["vad"] = result["vad"]
+
+    if verbose:
+        print("\nTranscription with markers:")
+        print("------------------------")
+
+    # Fill every second chronologically, leaving gaps as empty entries
+    segments = json_data["segments"]
+    for second in range(max_second + 1):
+        segments[str(second)] = make_entry(second, "", None)
+
+    for second, start, end, text, marker in zip(buckets.seconds.tolist(), buckets.start.tolist(),
+                                                buckets.end.tolist(), buckets.text,
+                                                buckets.marker.tolist()):
+        entry = make_entry(second, text, marker, start, end)
+        segments[str(second)] = entry
+        if verbose:
+            print(f"{entry['timestamp']} | {text} -> {marker}")
+
+    return json_data
+
+
+def save_markers(json_data, output_file=DEFAULT_MARKERS_FILE):
+    """Write the markers JSON to disk"""
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(json_data, f, indent=2, ensure_ascii=False)
+
+
+def load_partial_markers(jsonl_file):
+    """Read a streaming sidecar (one JSON object per line) into the markers JSON structure"""
+    json_data = {"metadata": {}, "segments": {}}
+    with open(jsonl_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # The writer may be halfway through the last line
+                break
+            if "metadata" in record:
+                json_data["metadata"] = record["metadata"]
+            else:
+                second = record.pop("second")
+                json_data["segments"][str(second)] = record
+
+    json_data["metadata"]["total_duration"] = len(json_data["segments"])
+    return json_data
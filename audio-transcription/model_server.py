@@ -0,0 +1,247 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from inference import add_inference_arguments, inference_settings, settings_from_args, settings_to_json
+from transcriber import DEFAULT_MODEL, DEFAULT_SERVER_URL, load_model
+from transcription_cache import json_default
+
+
+class ServerBusy(Exception):
+    """Raised when the request queue is full"""
+
+
+class ModelPool:
+    """Keeps Whisper models warm and serializes inference per model"""
+
+    def __init__(self, allowed_models=None, idle_timeout=600, max_concurrent=1, max_queue=16, settings=None):
+        self.allowed_models = set(allowed_models) if allowed_models else None
+        self.settings = settings or inference_settings()
+        self.idle_timeout = idle_timeout
+        self.max_queue = max_queue
+
+        self._models = {}
+        self._model_locks = {}
+        self._last_used = {}
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._waiting = 0
+        self._completed = 0
+
+    def _model_lock(self, model_name):
+        with self._lock:
+            if model_name not in self._model_locks:
+                self._model_locks[model_name] = threading.Lock()
+            return self._model_locks[model_name]
+
+    def _get_model(self, model_name):
+        """Return a loaded model, loading it on first use (model lock must be held)"""
+        model = self._models.get(model_name)
+        if model is None:
+            start = time.time()
+            model = load_model(model_name, self.settings)
+            print(f"Loaded '{model_name}' in {time.time() - start:.1f}s")
+            self._models[model_name] = model
+        self._last_used[model_name] = time.time()
+        return model
+
+    def transcribe(self, model_name, audio_path, options):
+        if self.allowed_models is not None and model_name not in self.allowed_models:
+            raise ValueError(f"Model '{model_name}' is not served here")
+
+        # Queue the request, rejecting it once too many are waiting
+        with self._lock:
+            if self._waiting >= self.max_queue:
+                raise ServerBusy(f"{self._waiting} requests already queued")
+            self._waiting += 1
+
+        try:
+            self._slots.acquire()
+        finally:
+            with self._lock:
+                self._waiting -= 1
+
+        try:
+            with self._model_lock(model_name):
+                model = self._get_model(model_name)
+                options = dict(options, verbose=False)
+                result = model.transcribe(audio_path, **options)
+                self._last_used[model_name] = time.time()
+        finally:
+            self._slots.release()
+
+        with self._lock:
+            self._completed += 1
+        # Clients key their transcription cache on the settings that made the result
+        return dict(result, inference=settings_to_json(self.settings))
+
+    def unload_idle(self):
+        """Drop models that have not been used within the idle timeout"""
+        now = time.time()
+        for model_name in list(self._models):
+            lock = self._model_lock(model_name)
+            # Skip models that are busy transcribing right now
+            if not lock.acquire(blocking=False):
+                continue
+            try:
+                if now - self._last_used.get(model_name, now) >= self.idle_timeout:
+                    del self._models[model_name]
+                    print(f"Unloaded idle model '{model_name}'")
+            finally:
+                lock.release()
+
+    def start_reaper(self):
+        """Run unload_idle periodically in a daemon thread"""
+        if not self.idle_timeout:
+            return
+
+        def reap():
+            interval = max(1, min(30, self.idle_timeout / 2))
+            while True:
+                time.sleep(interval)
+                self.unload_idle()
+
+        threading.Thread(target=reap, name="model-reaper", daemon=True).start()
+
+    def status(self):
+        with self._lock:
+            now = time.time()
+            return {
+                "loaded_models": {
+                    name: {"idle_seconds": round(now - self._last_used.get(name, now), 1)}
+                    for name in self._models
+                },
+                "queued_requests": self._waiting,
+                "completed_requests": self._completed,
+                "idle_timeout": self.idle_timeout,
+                "inference": settings_to_json(self.settings)
+            }
+
+
+class TranscriptionHandler(BaseHTTPRequestHandler):
+    pool = None
+    default_model = DEFAULT_MODEL
+
+    def _send_json(self, code, payload):
+        body = json.dumps(payload, default=json_default, ensure_ascii=False).encode('utf-8')
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if urlparse(self.path).path == "/status":
+            self._send_json(200, self.pool.status())
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != "/transcribe":
+            self._send_json(404, {"error": "Not found"})
+            return
+
+        query = parse_qs(url.query)
+        model_name = query.get("model", [self.default_model])[0]
+        filename = os.path.basename(query.get("filename", ["audio"])[0])
+        try:
+            options = json.loads(query.get("options", ["{}"])[0])
+        except json.JSONDecodeError:
+            self._send_json(400, {"error": "Invalid options JSON"})
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        if length <= 0:
+            self._send_json(400, {"error": "Empty audio body"})
+            return
+
+        # Spool the upload to disk so Whisper's ffmpeg decoder can read it
+        suffix = os.path.splitext(filename)[1]
+        with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
+            remaining = length
+            while remaining > 0:
+                chunk = self.rfile.read(min(remaining, 1 << 20))
+                if not chunk:
+                    break
+                tmp.write(chunk)
+                remaining -= len(chunk)
+            audio_path = tmp.name
+
+        try:
+            start = time.time()
+            result = self.pool.transcribe(model_name, audio_path, options)
+            print(f"Transcribed {filename} with '{model_name}' in {time.time() - start:.1f}s")
+            self._send_json(200, result)
+        except ServerBusy as e:
+            self._send_json(503, {"error": f"Server busy: {str(e)}"})
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+        except Exception as e:
+            self._send_json(500, {"error": str(e)})
+        finally:
+            os.remove(audio_path)
+
+    def log_message(self, format, *args):
+        # Keep the console to one line per transcription
+        pass
+
+
+def serve(host="127.0.0.1", port=8765, models=None, preload=False, idle_timeout=600,
+          max_concurrent=1, max_queue=16, settings=None):
+    pool = ModelPool(models, idle_timeout, max_concurrent, max_queue, settings)
+    if preload and models:
+        for model_name in models:
+            with pool._model_lock(model_name):
+                pool._get_model(model_name)
+    pool.start_reaper()
+
+    TranscriptionHandler.pool = pool
+    if models:
+        TranscriptionHandler.default_model = models[0]
+
+    server = ThreadingHTTPServer((host, port), TranscriptionHandler)
+    server.daemon_threads = True
+    print(f"Whisper model server listening on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down model server")
+    finally:
+        server.server_close()
+
+
+def main():
+    default_url = urlparse(DEFAULT_SERVER_URL)
+    parser = argparse.ArgumentParser(description="Keep Whisper models warm for the transcription scripts")
+    parser.add_argument("--host", default=default_url.hostname)
+    parser.add_argument("--port", type=int, default=default_url.port)
+    parser.add_argument("--models", nargs="+", default=None,
+                        help="Model sizes to serve (default: any requested model)")
+    parser.add_argument("--preload", action="store_true",
+                        help="Load the --models at startup instead of on first request")
+    parser.add_argument("--idle-timeout", type=float, default=600,
+                        help="Seconds before an unused model is unloaded (0 keeps models forever)")
+    parser.add_argument("--max-concurrent", type=int, default=1,
+                        help="Transcriptions run at the same time across all models")
+    parser.add_argument("--max-queue", type=int, default=16,
+                        help="Requests allowed to wait before the server answers 503")
+    add_inference_arguments(parser)
+    args = parser.parse_args()
+
+    if args.max_concurrent < 1:
+        print("Error: --max-concurrent must be at least 1", file=sys.stderr)
+        sys.exit(1)
+
+    serve(args.host, args.port, args.models, args.preload, args.idle_timeout,
+          args.max_concurrent, args.max_queue, settings_from_args(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+import json
+import subprocess
+
+import numpy as np
+
+from marker_store import sidecar_path_for
+from markers import make_entry, make_metadata, save_markers
+from timing import WORD_TIMESTAMP_OPTIONS, bucket_words, extract_words
+from transcriber import DEFAULT_MODEL, load_model
+from vad import combine_stats, describe_stats
+
+# Whisper models expect 16 kHz mono audio
+SAMPLE_RATE = 16000
+DEFAULT_WINDOW_SECONDS = 60
+DEFAULT_OVERLAP_SECONDS = 4
+
+
+def _read_exact(stream, size):
+    """Read size bytes from a pipe, returning fewer only at end of stream"""
+    chunks = []
+    while size > 0:
+        chunk = stream.read(size)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def _decode_windows(audio_path, window_seconds, overlap_seconds):
+    """Yield (start_time, samples) windows decoded incrementally by ffmpeg"""
+    cmd = [
+        "ffmpeg", "-nostdin", "-loglevel", "error",
+        "-threads", "0",
+        "-i", audio_path,
+        "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(SAMPLE_RATE),
+        "-"
+    ]
+    window = int(window_seconds * SAMPLE_RATE)
+    step = window - int(overlap_seconds * SAMPLE_RATE)
+
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        tail = np.zeros(0, dtype=np.float32)
+        offset = 0
+        while True:
+            data = _read_exact(process.stdout, (window - len(tail)) * 2)
+            if not data and offset > 0:
+                break
+
+            samples = np.frombuffer(data, np.int16).astype(np.float32) / 32768.0
+            buffer = np.concatenate([tail, samples])
+            yield offset / SAMPLE_RATE, buffer
+
+            if len(buffer) < window:
+                break
+
+            # Carry the overlap into the next window
+            tail = buffer[step:]
+            offset += step
+    finally:
+        process.stdout.close()
+        stderr = process.stderr.read()
+        process.stderr.close()
+        returncode = process.wait()
+
+    if returncode != 0:
+        raise RuntimeError(f"ffmpeg failed to decode audio: {stderr.decode('utf-8', errors='replace')}")
+
+
+def _with_last_flag(windows):
+    """Look one window ahead so the consumer knows which window is final"""
+    previous = None
+    for window in windows:
+        if previous is not None:
+            yield previous + (False,)
+        previous = window
+    if previous is not None:
+        yield previous + (True,)
+
+
+def _shift_segment(segment, offset):
+    segment = dict(segment, start=segment["start"] + offset, end=segment["end"] + offset)
+    if "words" in segment:
+        segment["words"] = [
+            dict(word, start=word["start"] + offset, end=word["end"] + offset)
+            for word in segment["words"]
+        ]
+    return segment
+
+
+def transcribe_stream(audio_path, model_name=DEFAULT_MODEL, window_seconds=DEFAULT_WINDOW_SECONDS,
+                      overlap_seconds=DEFAULT_OVERLAP_SECONDS, model=None, settings=None, **options):
+    """Transcribe window by window, yielding (segments, committed_until, is_last)
+
+    Segments are on the original timeline and are final once yielded; no later
+    segment starts before committed_until.
+    """
+    if overlap_seconds * 2 >= window_seconds:
+        raise ValueError("Overlap must be less than half the window length")
+
+    if model is None:
+        model = load_model(model_name, settings)
+
+    options = dict(WORD_TIMESTAMP_OPTIONS, **options)
+    committed_until = 0.0
+    prompt = None
+    windows = _decode_windows(audio_path, window_seconds, overlap_seconds)
+    vad_stats = []
+
+    for start, samples, is_last in _with_last_flag(windows):
+        end = start + len(samples) / SAMPLE_RATE
+        result = model.transcribe(samples, verbose=False, initial_prompt=prompt, **options)
+        if "vad" in result:
+            vad_stats.append(result["vad"])
+            if is_last:
+                print(describe_stats(combine_stats(vad_stats)))
+
+        # Segments in the second half of the overlap belong to the next window
+        boundary = end if is_last else end - overlap_seconds / 2
+        segments = []
+        for segment in result["segments"]:
+            segment = _shift_segment(segment, start)
+            if committed_until <= segment["start"] < boundary:
+                segments.append(segment)
+
+        if segments:
+            committed_until = max(boundary, segments[-1]["end"])
+            # Give the next window the preceding text as context
+            prompt = " ".join(segment["text"].strip() for segment in segments[-3:])
+        else:
+            committed_until = max(committed_until, boundary)
+
+        yield segments, committed_until, is_last
+
+
+def stream_entries(audio_path, model_name=DEFAULT_MODEL, window_seconds=DEFAULT_WINDOW_SECONDS,
+                   overlap_seconds=DEFAULT_OVERLAP_SECONDS, **options):
+    """Yield (second, entry) markers JSON entries as soon as each second is final"""
+    pending_starts = np.zeros(0)
+    pending_ends = np.zeros(0)
+    pending_words = np.zeros(0, dtype=object)
+    next_second = 0
+    current_marker = 1
+
+    for segments, committed_until, is_last in transcribe_stream(
+            audio_path, model_name, window_seconds, overlap_seconds, **options):
+        starts, ends, words = extract_words(segments)
+        pending_starts = np.concatenate([pending_starts, starts])
+        pending_ends = np.concatenate([pending_ends, ends])
+        pending_words = np.concatenate([pending_words, np.asarray(words, dtype=object)])
+
+        # Later words start at or after committed_until, so earlier seconds cannot change
+        if is_last:
+            final_second = int(pending_starts.max()) + 1 if len(pending_starts) else next_second
+        else:
+            final_second = int(committed_until)
+
+        ready = np.floor(pending_starts) < final_second
+        buckets = bucket_words(pending_starts[ready], pending_ends[ready], list(pending_words[ready]),
+                               first_marker=current_marker)
+        pending_starts = pending_starts[~ready]
+        pending_ends = pending_ends[~ready]
+        pending_words = pending_words[~ready]
+
+        bucket_index = {second: i for i, second in enumerate(buckets.seconds.tolist())}
+        while next_second < final_second:
+            i = bucket_index.get(next_second)
+            if i is None:
+                entry = make_entry(next_second, "", None)
+            else:
+                entry = make_entry(next_second, buckets.text[i], int(buckets.marker[i]),
+                                   float(buckets.start[i]), float(buckets.end[i]))
+            yield next_second, entry
+            next_second += 1
+
+        current_marker += len(buckets.seconds)
+
+
+def write_streaming_markers(audio_path, output_file, model_name=DEFAULT_MODEL,
+                            window_seconds=DEFAULT_WINDOW_SECONDS,
+                            overlap_seconds=DEFAULT_OVERLAP_SECONDS, **options):
+    """Stream entries into a JSONL sidecar, then write the full markers JSON at the end"""
+    sidecar = sidecar_path_for(output_file)
+    json_data = {"metadata": make_metadata(audio_path, 0), "segments": {}}
+
+    print(f"Streaming entries to {sidecar}")
+    print("\nTranscription with markers:")
+    print("------------------------")
+
+    with open(sidecar, 'w', encoding='utf-8') as f:
+        f.write(json.dumps({"metadata": json_data["metadata"]}, ensure_ascii=False) + "\n")
+        f.flush()
+
+        for second, entry in stream_entries(audio_path, model_name, window_seconds,
+                                            overlap_seconds, **options):
+            json_data["segments"][str(second)] = entry
+            # Flush each line so marker editing can follow the file live
+            f.write(json.dumps(dict(entry, second=second), ensure_ascii=False) + "\n")
+            f.flush()
+
+            if entry["marker"] is not None:
+                print(f"{entry['timestamp']} | {entry['text']} -> {entry['marker']}")
+
+    # Drop trailing silence so the final file matches the non-streaming output
+    segments = json_data["segments"]
+    while segments and segments[str(len(segments) - 1)]["marker"] is None:
+        del segments[str(len(segments) - 1)]
+    if not segments:
+        raise ValueError("No speech found in transcription")
+
+    json_data["metadata"]["total_duration"] = len(segments)
+    save_markers(json_data, output_file)
+    return json_data
+
+
+def add_streaming_arguments(parser):
+    """Add the --stream flags shared by the transcription scripts"""
+    parser.add_argument("--stream", action="store_true",
+                        help="Decode and transcribe in overlapping windows, emitting seconds as they finish")
+    parser.add_argument("--window", type=float, default=DEFAULT_WINDOW_SECONDS,
+                        help=f"Streaming window length in seconds (default: {DEFAULT_WINDOW_SECONDS})")
+    parser.add_argument("--overlap", type=float, default=DEFAULT_OVERLAP_SECONDS,
+                        help=f"Overlap between windows in seconds (default: {DEFAULT_OVERLAP_SECONDS})")
+    return parser
+
+
+def check_streaming_arguments(parser, args):
+    """Reject flags --stream cannot honour: it always runs a local model and never reads the cache"""
+    if not args.stream:
+        return
+    for flag, given in (("--server", args.server), ("--no-cache", args.no_cache)):
+        if given:
+            parser.error(f"{flag} cannot be combined with --stream, which always transcribes locally "
+                         f"without the cache")
@@ -0,0 +1,74 @@
+import json
+import os
+import shutil
+import sys
+import wave
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from audio_artifact import SAMPLE_RATE, artifact_paths, is_current, load_samples, prepare_audio, recorded_artifact
+
+
+def write_wav(path, samples):
+    with wave.open(str(path), 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes(samples.astype('<i2').tobytes())
+    return str(path)
+
+
+def test_artifact_paths_sit_next_to_the_markers():
+    assert artifact_paths("/data/talk_markers.json") == ("/data/talk_markers.pcm", "/data/talk_markers.m4a")
+
+
+def test_samples_are_read_as_float32(tmp_path):
+    pcm = tmp_path / "talk.pcm"
+    pcm.write_bytes(np.array([0, 16384, -32768, 32767], dtype='<i2').tobytes())
+    samples = load_samples({"pcm": str(pcm)})
+    assert samples.dtype == np.float32
+    np.testing.assert_allclose(samples, [0.0, 0.5, -1.0, 32767 / 32768])
+
+
+def test_artifact_goes_stale_when_the_audio_changes(tmp_path):
+    audio = tmp_path / "talk.wav"
+    audio.write_bytes(b"RIFF")
+    pcm = tmp_path / "talk.pcm"
+    pcm.write_bytes(b"")
+    stat = os.stat(audio)
+    entry = {"source": str(audio), "pcm": str(pcm), "aac": None,
+             "source_size": stat.st_size, "source_mtime": stat.st_mtime}
+    assert is_current(entry)
+
+    assert not is_current(dict(entry, aac=str(tmp_path / "talk.m4a")))
+    os.utime(audio, (stat.st_atime, stat.st_mtime + 10))
+    assert not is_current(entry)
+    assert not is_current(None)
+
+
+def test_recorded_artifact(tmp_path):
+    markers = tmp_path / "talk.json"
+    markers.write_text(json.dumps({"metadata": {"audio_artifact": {"pcm": "talk.pcm"}}, "segments": {}}))
+    assert recorded_artifact(str(markers)) == {"pcm": "talk.pcm"}
+    markers.write_text("{not json")
+    assert recorded_artifact(str(markers)) is None
+    assert recorded_artifact(str(tmp_path / "missing.json")) is None
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg is not installed")
+def test_wav_is_decoded_once_and_reused(tmp_path):
+    tone = (8000 * np.sin(2 * np.pi * 440 * np.arange(SAMPLE_RATE) / SAMPLE_RATE)).astype(np.int16)
+    audio = write_wav(tmp_path / "talk.wav", tone)
+    markers = str(tmp_path / "talk_markers.json")
+
+    entry = prepare_audio(audio, markers)
+    # pcm_s16le cannot go into an MP4 as-is, so an AAC copy is made alongside
+    assert entry["source_codec"] == "pcm_s16le"
+    assert entry["aac"] == artifact_paths(markers)[1] and os.path.exists(entry["aac"])
+    np.testing.assert_array_equal(load_samples(entry), tone / 32768.0)
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+    assert prepare_audio(audio, markers, previous=entry) is entry
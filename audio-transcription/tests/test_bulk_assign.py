@@ -0,0 +1,38 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bulk_assign import load_mapping
+
+
+def write(tmp_path, text):
+    path = tmp_path / "images.csv"
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+def test_header_comments_and_ranges(tmp_path):
+    mapping = write(tmp_path, "marker,image\n# intro\n1,a.png\n\n3-4,b.png\n")
+    assert load_mapping(mapping) == {1: str(tmp_path / "a.png"), 3: str(tmp_path / "b.png"),
+                                     4: str(tmp_path / "b.png")}
+
+
+def test_glob_hands_out_matches_in_order(tmp_path):
+    for name in ("s2.png", "s1.png", "s3.png"):
+        (tmp_path / name).write_bytes(b"")
+    assert load_mapping(write(tmp_path, "5-6,s*.png\n")) == {5: str(tmp_path / "s1.png"),
+                                                             6: str(tmp_path / "s2.png")}
+
+
+@pytest.mark.parametrize("text, line", [
+    ("1,a.png\nl2,b.png\n", 2),
+    ("marker,image\n1,a.png\n\nimage,marker\n", 4),
+    ("1,a.png\n2-x,b.png\n", 2),
+    ("1,a.png\n2\n", 2),
+])
+def test_malformed_rows_name_their_line(tmp_path, text, line):
+    with pytest.raises(ValueError, match=f"line {line}:"):
+        load_mapping(write(tmp_path, text))
@@ -0,0 +1,104 @@
+import os
+import sys
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+whisper = pytest.importorskip("whisper")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import whisper.timing
+from whisper.tokenizer import get_tokenizer
+
+from inference import BatchedDecoder
+
+TOKENIZER = get_tokenizer(True, num_languages=99, language="en", task="transcribe")
+
+
+def at(seconds):
+    """The timestamp token for seconds into a window"""
+    return TOKENIZER.timestamp_begin + round(seconds / 0.02)
+
+
+def text(words):
+    return TOKENIZER.encode(words)
+
+
+class ScriptedModel:
+    """Stands in for a Whisper model; decode returns the scripted result for each window in turn"""
+
+    dims = SimpleNamespace(n_mels=80)
+    is_multilingual = True
+    num_languages = 99
+    device = "cpu"
+
+    def __init__(self, windows):
+        self.windows = list(windows)
+        self.batches = []
+
+    def decode(self, mels, options):
+        self.batches.append(tuple(mels.shape))
+        return [self.windows.pop(0) for _ in range(len(mels))]
+
+
+def window(tokens, no_speech_prob=0.1, avg_logprob=-0.3):
+    return SimpleNamespace(tokens=tokens, temperature=0.0, avg_logprob=avg_logprob,
+                           compression_ratio=1.2, no_speech_prob=no_speech_prob)
+
+
+def scripted():
+    return ScriptedModel([
+        # Two segments, the second closed by its timestamp
+        window([at(0.0)] + text(" Hello") + [at(1.0), at(1.0)] + text(" world") + [at(2.5), TOKENIZER.eot]),
+        # Silence: skipped like Whisper's transcribe() does
+        window([at(0.0)] + text(" noise") + [at(3.0)], no_speech_prob=0.9, avg_logprob=-1.5),
+        # Confident despite a high no-speech probability, so kept
+        window(text(" Still") + [at(4.0)], no_speech_prob=0.9, avg_logprob=-0.5),
+        # The last window runs out before a closing timestamp
+        window([at(0.5)] + text(" end")),
+    ])
+
+
+def transcribe(model, seconds=100, **options):
+    return BatchedDecoder(model, batch_size=3).transcribe(np.zeros(16000 * seconds, dtype=np.float32),
+                                                           language="en", **options)
+
+
+def test_windows_are_decoded_in_batches():
+    model = scripted()
+    transcribe(model)
+    assert model.batches == [(3, 80, 3000), (1, 80, 3000)]
+
+
+def test_segments_are_offset_by_their_window():
+    result = transcribe(scripted())
+    spans = [(segment["seek"], segment["start"], segment["end"], segment["text"])
+             for segment in result["segments"]]
+    assert spans == [
+        (0, 0.0, 1.0, " Hello"),
+        (0, 1.0, 2.5, " world"),
+        (6000, 60.0, 64.0, " Still"),
+        # Closed at the end of the 10 s of audio in the last window
+        (9000, 90.5, 100.0, " end"),
+    ]
+    assert [segment["id"] for segment in result["segments"]] == [0, 1, 2, 3]
+    assert result["text"] == " Hello world Still end"
+    assert result["language"] == "en"
+
+
+def test_word_timestamps_see_each_window(monkeypatch):
+    calls = []
+
+    def add_word_timestamps(segments, model, tokenizer, mel, num_frames, last_speech_timestamp):
+        calls.append((segments[0]["seek"], tuple(mel.shape), num_frames, last_speech_timestamp))
+        for segment in segments:
+            segment["words"] = [{"word": segment["text"], "start": segment["start"], "end": segment["end"]}]
+    monkeypatch.setattr(whisper.timing, "add_word_timestamps", add_word_timestamps)
+
+    result = transcribe(scripted(), word_timestamps=True)
+    assert calls == [(0, (80, 3000), 3000, 0.0), (6000, (80, 3000), 3000, 2.5),
+                     (9000, (80, 3000), 1000, 64.0)]
+    assert result["segments"][3]["words"][0]["end"] == 100.0
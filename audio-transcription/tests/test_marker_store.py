@@ -0,0 +1,98 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from marker_store import MarkerStore, edit_log_path_for
+
+
+def write_markers(path):
+    data = {
+        "metadata": {"audio_file": "talk.mp3", "total_duration": 4, "processed_date": "2024-01-01 00:00:00"},
+        "segments": {
+            "0": {"timestamp": "00:00", "text": "one", "marker": 1},
+            "1": {"timestamp": "00:01", "text": "one more", "marker": 1},
+            "2": {"timestamp": "00:02", "text": "", "marker": None},
+            "3": {"timestamp": "00:03", "text": "two", "marker": 2}
+        }
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    return str(path)
+
+
+def read_json(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_index_lists_seconds_per_marker(tmp_path):
+    store = MarkerStore(write_markers(tmp_path / "m.json"))
+    assert store.markers() == [1, 2]
+    assert [second for second, entry in store.entries(1)] == ["0", "1"]
+    assert store.entries(5) == []
+
+
+def test_unflushed_edits_are_replayed_on_reopen(tmp_path):
+    json_file = write_markers(tmp_path / "m.json")
+    store = MarkerStore(json_file)
+    assert store.assign_image(1, "a.png") == 2
+    assert store.assign_image(2, "b.png") == 1
+    # The session ends without a flush, as after a crash
+    assert "image_path" not in read_json(json_file)["segments"]["0"]
+
+    store = MarkerStore(json_file)
+    assert [entry["image_path"] for second, entry in store.entries(1)] == ["a.png", "a.png"]
+    assert store.entries(2)[0][1]["image_path"] == "b.png"
+    assert store.dirty
+
+
+def test_later_edits_win_on_replay(tmp_path):
+    json_file = write_markers(tmp_path / "m.json")
+    store = MarkerStore(json_file)
+    store.assign_images({1: "a.png", 2: "b.png"})
+    store.assign_image(1, "c.png")
+
+    store = MarkerStore(json_file)
+    assert store.entries(1)[0][1]["image_path"] == "c.png"
+    assert store.entries(2)[0][1]["image_path"] == "b.png"
+
+
+def test_half_written_last_edit_is_ignored(tmp_path):
+    json_file = write_markers(tmp_path / "m.json")
+    with open(edit_log_path_for(json_file), 'w', encoding='utf-8') as f:
+        f.write(json.dumps({"marker": 1, "image_path": "a.png"}) + "\n")
+        f.write('{"marker": 2, "image_pa')
+
+    store = MarkerStore(json_file)
+    assert store.entries(1)[0][1]["image_path"] == "a.png"
+    assert "image_path" not in store.entries(2)[0][1]
+
+
+def test_flush_writes_json_and_removes_edit_log(tmp_path):
+    json_file = write_markers(tmp_path / "m.json")
+    with MarkerStore(json_file) as store:
+        store.assign_image(2, "b.png")
+        assert os.path.exists(store.edit_log)
+
+    assert not os.path.exists(edit_log_path_for(json_file))
+    assert read_json(json_file)["segments"]["3"]["image_path"] == "b.png"
+    assert not MarkerStore(json_file).flush()
+
+
+def test_unknown_marker_changes_nothing(tmp_path):
+    json_file = write_markers(tmp_path / "m.json")
+    store = MarkerStore(json_file)
+    assert store.assign_image(9, "a.png") == 0
+    assert not os.path.exists(store.edit_log)
+    assert not store.flush()
+
+
+def test_without_edit_log_only_flush_writes(tmp_path):
+    json_file = write_markers(tmp_path / "m.json")
+    store = MarkerStore(json_file, use_edit_log=False)
+    store.assign_image(1, "a.png")
+    assert not os.path.exists(edit_log_path_for(json_file))
+    assert store.flush()
+    assert read_json(json_file)["segments"]["1"]["image_path"] == "a.png"
@@ -0,0 +1,66 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from timing import bucket_segments, bucket_words, extract_words, to_ms
+
+
+def word(text, start, end):
+    return {"word": text, "start": start, "end": end}
+
+
+SEGMENTS = [
+    {"start": 0.0, "end": 2.6, "text": " Hello there, world",
+     "words": [word(" Hello", 0.12, 0.5), word(" there,", 0.62, 0.98), word(" world", 1.05, 2.6)]},
+    # Whitespace-only words are dropped
+    {"start": 3.0, "end": 3.9, "text": " again", "words": [word(" ", 3.0, 3.1), word(" again", 3.2, 3.9)]},
+]
+
+
+def test_words_keep_their_own_times():
+    starts, ends, words = extract_words(SEGMENTS)
+    assert words == ["Hello", "there,", "world", "again"]
+    np.testing.assert_allclose(starts, [0.12, 0.62, 1.05, 3.2])
+    np.testing.assert_allclose(ends, [0.5, 0.98, 2.6, 3.9])
+
+
+def test_segments_without_word_times_are_spread_evenly():
+    starts, ends, words = extract_words([{"start": 10.0, "end": 12.0, "text": " one two three four"},
+                                         {"start": 12.0, "end": 13.0, "text": "   "}])
+    assert words == ["one", "two", "three", "four"]
+    np.testing.assert_allclose(starts, [10.0, 10.5, 11.0, 11.5])
+    np.testing.assert_allclose(ends, [10.5, 11.0, 11.5, 12.0])
+
+
+def test_words_are_bucketed_by_the_second_they_start_in():
+    buckets = bucket_segments(SEGMENTS, first_marker=5)
+    assert buckets.seconds.tolist() == [0, 1, 3]
+    assert buckets.text == ["Hello there,", "world", "again"]
+    np.testing.assert_allclose(buckets.start, [0.12, 1.05, 3.2])
+    # A word running into the next second still ends its own bucket
+    np.testing.assert_allclose(buckets.end, [0.98, 2.6, 3.9])
+    assert buckets.marker.tolist() == [5, 6, 7]
+
+
+def test_out_of_order_words_are_sorted_stably():
+    buckets = bucket_words(np.array([2.5, 0.2, 2.1, 0.2]), np.array([2.9, 0.4, 2.4, 0.6]),
+                           ["c", "a", "b", "a2"])
+    assert buckets.seconds.tolist() == [0, 2]
+    assert buckets.text == ["a a2", "b c"]
+    np.testing.assert_allclose(buckets.end, [0.6, 2.9])
+
+
+def test_no_words_gives_empty_buckets():
+    buckets = bucket_segments([])
+    assert buckets.seconds.shape == (0,)
+    assert buckets.text == []
+    assert buckets.marker.dtype == np.int64
+
+
+def test_times_round_to_milliseconds():
+    assert to_ms(1.2344) == 1234
+    assert to_ms(1.2346) == 1235
+    assert to_ms(0) == 0
@@ -0,0 +1,92 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import transcriber
+from inference import inference_settings, settings_from_json, settings_to_json
+from transcription_cache import TranscriptionCache
+
+SERVER = "http://127.0.0.1:8765"
+INT8 = settings_from_json({"backend": "int8", "batch_size": 4, "vad": None})
+RESULT = {"text": " hello", "language": "en", "segments": [{"start": 0.0, "end": 1.0, "text": " hello"}]}
+
+
+@pytest.fixture
+def audio(tmp_path, monkeypatch):
+    monkeypatch.setenv("WHISPER_CACHE_DIR", str(tmp_path / "cache"))
+    for name in ("WHISPER_BACKEND", "WHISPER_BATCH_SIZE", "WHISPER_VAD", transcriber.SERVER_URL_ENV):
+        monkeypatch.delenv(name, raising=False)
+    path = tmp_path / "talk.wav"
+    path.write_bytes(b"RIFF not really audio")
+    return str(path)
+
+
+def server_down(monkeypatch):
+    def unreachable(server_url, timeout=None):
+        raise ConnectionError(f"Could not reach model server at {server_url}")
+    monkeypatch.setattr(transcriber, "server_settings", unreachable)
+    monkeypatch.setattr(transcriber, "transcribe_remote", unreachable)
+
+
+def server_up(monkeypatch, settings):
+    calls = []
+
+    def transcribe_remote(audio_path, model_name, server_url, **options):
+        calls.append(audio_path)
+        return dict(RESULT, inference=settings_to_json(settings))
+    monkeypatch.setattr(transcriber, "server_settings", lambda server_url, timeout=None: settings)
+    monkeypatch.setattr(transcriber, "transcribe_remote", transcribe_remote)
+    return calls
+
+
+def put(audio, settings):
+    cache = TranscriptionCache()
+    options = dict(transcriber.WORD_TIMESTAMP_OPTIONS)
+    cache.put(cache.key_for(audio, transcriber.cache_model_name("base", settings), options), RESULT)
+    return cache
+
+
+def test_cache_hit_does_not_need_the_server(audio, monkeypatch):
+    put(audio, inference_settings())
+    server_down(monkeypatch)
+    assert transcriber.transcribe(audio, server_url=SERVER)["text"] == " hello"
+
+
+def test_server_settings_are_remembered_for_later_hits(audio, monkeypatch):
+    calls = server_up(monkeypatch, INT8)
+    transcriber.transcribe(audio, server_url=SERVER)
+    assert len(calls) == 1
+    assert transcriber.last_known_settings(TranscriptionCache(), SERVER + "/") == INT8
+
+    server_down(monkeypatch)
+    assert transcriber.transcribe(audio, server_url=SERVER)["text"] == " hello"
+
+
+def test_miss_asks_the_server_and_caches_under_its_settings(audio, monkeypatch):
+    # A default result is not what was asked for, so it is not reused
+    cache = put(audio, inference_settings())
+    calls = server_up(monkeypatch, INT8)
+    assert transcriber.transcribe(audio, server_url=SERVER, settings=INT8)["text"] == " hello"
+    assert len(calls) == 1
+    assert len(cache.entries()) == 2
+
+    transcriber.transcribe(audio, server_url=SERVER, settings=INT8)
+    assert len(calls) == 1
+
+
+def test_other_non_default_settings_are_rejected(audio, monkeypatch):
+    server_up(monkeypatch, INT8)
+    with pytest.raises(ValueError, match="start the server with these settings"):
+        transcriber.transcribe(audio, server_url=SERVER, settings=inference_settings("int8"))
+
+
+def test_restarted_server_updates_the_remembered_settings(audio, monkeypatch):
+    transcriber.remember_settings(TranscriptionCache(), SERVER, INT8)
+    calls = server_up(monkeypatch, inference_settings())
+    transcriber.transcribe(audio, server_url=SERVER)
+    assert len(calls) == 1
+    assert transcriber.last_known_settings(TranscriptionCache(), SERVER) == settings_from_json(
+        settings_to_json(inference_settings()))
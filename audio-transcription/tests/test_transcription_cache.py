@@ -0,0 +1,30 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import transcription_cache
+from transcription_cache import TranscriptionCache
+
+RESULT = {"text": " hi", "language": "en", "segments": [{"start": 0.0, "end": 1.0, "text": " hi"}]}
+
+
+def test_hit_survives_the_entry_being_pruned_meanwhile(tmp_path, monkeypatch):
+    cache = TranscriptionCache(str(tmp_path))
+    cache.put("key", RESULT)
+
+    def pruned_by_another_process(path):
+        os.remove(path)
+        raise FileNotFoundError(path)
+    monkeypatch.setattr(transcription_cache.os, "utime", pruned_by_another_process)
+    assert cache.get("key") == RESULT
+    assert cache.get("key") is None
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = TranscriptionCache(str(tmp_path))
+    for key, used in (("old", 100), ("new", 200)):
+        cache.put(key, RESULT)
+        os.utime(cache._path(key), (used, used))
+    cache.prune(cache.entries()[0]["size"])
+    assert [entry["key"] for entry in cache.entries()] == ["new"]
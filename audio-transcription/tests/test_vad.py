@@ -0,0 +1,166 @@
+import argparse
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from vad import (SAMPLE_RATE, SpeechOnlyModel, TimeMap, VadSettings, add_vad_arguments, fallback_reason,
+                 pack_regions, remap_result, speech_regions, vad_settings_from_args)
+
+
+def level(db, seconds, seed=0):
+    """White noise at an RMS level of db dBFS"""
+    rng = np.random.default_rng(seed)
+    return (rng.normal(0, 10 ** (db / 20), int(seconds * SAMPLE_RATE))).astype(np.float32)
+
+
+def with_bursts(samples, bursts, db=-20):
+    """Replace [start, end) second ranges with louder noise"""
+    samples = samples.copy()
+    for start, end in bursts:
+        samples[start * SAMPLE_RATE:end * SAMPLE_RATE] = level(db, end - start, seed=start)
+    return samples
+
+
+class EchoModel:
+    """Returns one segment spanning whatever audio it was given, and remembers its length"""
+
+    def __init__(self):
+        self.seconds = None
+
+    def transcribe(self, audio, **options):
+        self.seconds = len(audio) / SAMPLE_RATE
+        return {"text": "speech", "language": "en",
+                "segments": [{"start": 0.0, "end": self.seconds, "text": "speech",
+                              "words": [{"word": "speech", "start": 0.0, "end": self.seconds}]}]}
+
+
+def test_regions_cover_bursts_with_padding():
+    samples = with_bursts(level(-70, 20), [(3, 5), (12, 14)])
+    regions = speech_regions(samples)
+    assert regions.shape == (2, 2)
+    np.testing.assert_allclose(regions, [[2.8, 5.2], [11.8, 14.2]], atol=0.04)
+
+
+def test_short_pauses_do_not_split_regions():
+    samples = with_bursts(level(-70, 10), [(2, 4)])
+    samples[3 * SAMPLE_RATE:int(3.3 * SAMPLE_RATE)] = 0
+    assert len(speech_regions(samples)) == 1
+
+
+def test_blips_are_dropped():
+    samples = level(-70, 10)
+    samples[5 * SAMPLE_RATE:int(5.1 * SAMPLE_RATE)] = level(-20, 0.1)
+    assert len(speech_regions(samples)) == 0
+
+
+def test_quiet_audio_has_no_regions():
+    samples = level(-70, 10)
+    regions = speech_regions(samples)
+    assert len(regions) == 0
+    assert fallback_reason(samples, regions) is None
+
+
+def test_empty_audio():
+    assert speech_regions(np.zeros(0, dtype=np.float32)).shape == (0, 2)
+
+
+def test_continuous_tone_is_all_speech():
+    t = np.arange(20 * SAMPLE_RATE) / SAMPLE_RATE
+    tone = (0.1 * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+    np.testing.assert_allclose(speech_regions(tone), [[0.0, 20.0]])
+
+
+def test_speech_over_a_music_bed_is_kept():
+    # A constant bed at -23 dBFS with bursts 3 dB louder, and no silence anywhere
+    t = np.arange(20 * SAMPLE_RATE) / SAMPLE_RATE
+    bed = 10 ** (-23 / 20) * np.sqrt(2) * np.sin(2 * np.pi * 220 * t)
+    louder = np.ones_like(t)
+    louder[3 * SAMPLE_RATE:5 * SAMPLE_RATE] = 10 ** (3 / 20)
+    regions = speech_regions((bed * louder).astype(np.float32))
+    np.testing.assert_allclose(regions, [[0.0, 20.0]])
+
+
+def test_margin_applies_over_a_low_noise_floor():
+    # A -50 dBFS floor raises the bar from -45 to -40
+    samples = with_bursts(level(-50, 20), [(8, 10)], db=-43)
+    assert len(speech_regions(samples)) == 0
+    assert len(speech_regions(samples, VadSettings(margin_db=5.0))) == 1
+
+
+def test_speech_lost_under_a_noisy_floor_falls_back():
+    samples = with_bursts(level(-50, 20), [(4, 6)], db=-42)
+    regions = speech_regions(samples)
+    assert len(regions) == 0
+    assert fallback_reason(samples, regions) == "no speech detected"
+
+
+def test_time_map_moves_packed_times_back():
+    regions = np.array([[2.0, 4.0], [10.0, 11.0], [20.0, 23.0]])
+    time_map = TimeMap(regions, gap=0.5)
+    np.testing.assert_allclose(time_map.packed_starts, [0.0, 2.5, 4.0])
+    assert time_map(0.0) == 2.0
+    assert time_map(1.5) == 3.5
+    assert time_map(2.5) == 10.0
+    assert time_map(3.0) == 10.5
+    assert time_map(5.0) == 21.0
+
+
+def test_time_map_clamps_into_regions():
+    time_map = TimeMap(np.array([[2.0, 4.0], [10.0, 11.0]]), gap=0.5)
+    # Inside the gap after the first region, and past the end of the last one
+    assert time_map(2.2) == 4.0
+    assert time_map(9.0) == 11.0
+    assert time_map(-1.0) == 2.0
+
+
+def test_packing_and_remapping_round_trip():
+    samples = level(-20, 30)
+    regions = np.array([[2.0, 4.0], [10.0, 11.0]])
+    packed, time_map = pack_regions(samples, regions, gap=0.5)
+    assert len(packed) == int(3.5 * SAMPLE_RATE)
+
+    result = {"segments": [{"start": 0.5, "end": 3.2, "text": "a",
+                            "words": [{"word": "a", "start": 2.6, "end": 3.0}]}]}
+    remapped = remap_result(result, time_map)
+    segment = remapped["segments"][0]
+    assert (segment["start"], segment["end"]) == (2.5, pytest.approx(10.7))
+    assert segment["words"][0]["start"] == pytest.approx(10.1)
+    assert result["segments"][0]["start"] == 0.5
+
+
+def test_model_only_hears_the_speech():
+    model = EchoModel()
+    result = SpeechOnlyModel(model).transcribe(with_bursts(level(-70, 60), [(10, 12), (40, 41)]))
+    assert model.seconds == pytest.approx(2.4 + 0.5 + 1.4, abs=0.1)
+    assert result["vad"]["regions"] == 2
+    assert result["segments"][0]["start"] == pytest.approx(9.8, abs=0.04)
+    assert result["segments"][0]["end"] == pytest.approx(41.2, abs=0.04)
+
+
+def test_silent_audio_skips_the_model():
+    model = EchoModel()
+    result = SpeechOnlyModel(model).transcribe(level(-70, 30))
+    assert model.seconds is None
+    assert result["segments"] == []
+    assert result["vad"]["skipped_fraction"] == 1.0
+
+
+def test_untrusted_detection_transcribes_everything():
+    model = EchoModel()
+    result = SpeechOnlyModel(model).transcribe(with_bursts(level(-50, 20), [(4, 6)], db=-42))
+    assert model.seconds == 20
+    assert result["vad"]["fallback"] == "no speech detected"
+    assert result["vad"]["skipped_seconds"] == 0
+
+
+def test_every_setting_has_a_flag():
+    parser = add_vad_arguments(argparse.ArgumentParser())
+    assert vad_settings_from_args(parser.parse_args([])) is None
+    args = parser.parse_args(["--vad", "--vad-threshold-db", "-40", "--vad-margin-db", "6", "--vad-min-speech-ms",
+                              "100", "--vad-min-silence-ms", "300", "--vad-padding-ms", "50"])
+    assert vad_settings_from_args(args) == VadSettings(-40.0, 6.0, 100, 300, 50)
+    assert vad_settings_from_args(parser.parse_args(["--vad"])) == VadSettings()
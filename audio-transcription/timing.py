@@ -0,0 +1,70 @@
+from collections import namedtuple
+
+import numpy as np
+
+# Decode options that make Whisper return per-word start/end times
+WORD_TIMESTAMP_OPTIONS = {"word_timestamps": True}
+
+# Parallel arrays, one element per non-empty second (and therefore per marker)
+Buckets = namedtuple("Buckets", ["seconds", "start", "end", "text", "marker"])
+
+
+def extract_words(segments):
+    """Flatten Whisper segments into parallel arrays of word start, end and text
+
+    Segments without word timestamps (older cache entries, other backends) fall
+    back to spreading their words evenly, but keep float times.
+    """
+    starts, ends, words = [], [], []
+
+    for segment in segments:
+        segment_words = segment.get("words")
+        if segment_words:
+            for word in segment_words:
+                text = word["word"].strip()
+                if text:
+                    starts.append(word["start"])
+                    ends.append(word["end"])
+                    words.append(text)
+            continue
+
+        texts = segment["text"].split()
+        if not texts:
+            continue
+        edges = np.linspace(segment["start"], segment["end"], len(texts) + 1)
+        starts.extend(edges[:-1])
+        ends.extend(edges[1:])
+        words.extend(texts)
+
+    return np.asarray(starts, dtype=np.float64), np.asarray(ends, dtype=np.float64), words
+
+
+def bucket_words(starts, ends, words, first_marker=1):
+    """Group words by the second their start falls in, in one vectorized pass"""
+    if len(words) == 0:
+        empty = np.zeros(0)
+        return Buckets(empty.astype(np.int64), empty, empty, [], empty.astype(np.int64))
+
+    order = np.argsort(starts, kind="stable")
+    starts, ends = starts[order], ends[order]
+    words = np.asarray(words, dtype=object)[order]
+
+    seconds = np.floor(starts).astype(np.int64)
+    # Index of the first word of each second
+    group_starts = np.flatnonzero(np.r_[True, seconds[1:] != seconds[:-1]])
+
+    bucket_seconds = seconds[group_starts]
+    bucket_start = np.minimum.reduceat(starts, group_starts)
+    bucket_end = np.maximum.reduceat(ends, group_starts)
+    bucket_text = [" ".join(group) for group in np.split(words, group_starts[1:])]
+    markers = np.arange(first_marker, first_marker + len(group_starts), dtype=np.int64)
+
+    return Buckets(bucket_seconds, bucket_start, bucket_end, bucket_text, markers)
+
+
+def bucket_segments(segments, first_marker=1):
+    return bucket_words(*extract_words(segments), first_marker=first_marker)
+
+
+def to_ms(seconds):
+    return int(round(seconds * 1000))
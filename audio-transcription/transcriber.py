@@ -0,0 +1,212 @@
+import json
+import os
+import tempfile
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from inference import (DEFAULT_BACKEND, DEFAULT_MODEL, InferenceSettings, add_inference_arguments,
+                       cache_model_name, inference_settings, load_whisper, settings_from_json, settings_to_json)
+from timing import WORD_TIMESTAMP_OPTIONS
+from transcription_cache import TranscriptionCache
+from vad import describe_stats
+
+DEFAULT_SERVER_URL = "http://127.0.0.1:8765"
+
+# Environment variable that switches every script into client mode
+SERVER_URL_ENV = "WHISPER_SERVER_URL"
+
+# File in the cache directory recording the settings each model server last reported
+KNOWN_SERVERS_FILE = "servers.state"
+
+
+def load_model(model_name=DEFAULT_MODEL, settings=None):
+    """Load a Whisper model in this process, with the backend and threads from settings"""
+    return load_whisper(model_name, settings or inference_settings())
+
+
+def transcribe_local(audio_path, model_name=DEFAULT_MODEL, model=None, settings=None, samples=None,
+                     **options):
+    """Transcribe with a model held by this process, from already decoded samples when given"""
+    if model is None:
+        model = load_model(model_name, settings)
+
+    options.setdefault("verbose", False)
+    return model.transcribe(audio_path if samples is None else samples, **options)
+
+
+def transcribe_remote(audio_path, model_name=DEFAULT_MODEL, server_url=DEFAULT_SERVER_URL,
+                      timeout=None, **options):
+    """Send the audio file to a running model server and return its result"""
+    query = urllib.parse.urlencode({
+        "model": model_name,
+        "filename": os.path.basename(audio_path),
+        "options": json.dumps(options)
+    })
+    url = f"{server_url.rstrip('/')}/transcribe?{query}"
+
+    with open(audio_path, 'rb') as audio_file:
+        # Stream the file body instead of reading it into memory
+        request = urllib.request.Request(
+            url,
+            data=audio_file,
+            method="POST",
+            headers={
+                "Content-Type": "application/octet-stream",
+                "Content-Length": str(os.path.getsize(audio_path))
+            }
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                return json.load(response)
+        except urllib.error.HTTPError as e:
+            message = e.read().decode('utf-8', errors='replace')
+            raise RuntimeError(f"Model server returned {e.code}: {message}")
+        except urllib.error.URLError as e:
+            raise ConnectionError(f"Could not reach model server at {server_url}: {e.reason}")
+
+
+def server_settings(server_url, timeout=None):
+    """The inference settings a running model server transcribes with, from its /status"""
+    try:
+        with urllib.request.urlopen(f"{server_url.rstrip('/')}/status", timeout=timeout) as response:
+            return settings_from_json(json.load(response)["inference"])
+    except urllib.error.URLError as e:
+        raise ConnectionError(f"Could not reach model server at {server_url}: {e.reason}")
+
+
+def _is_default(settings):
+    return settings_to_json(settings) == settings_to_json(InferenceSettings(DEFAULT_BACKEND, None, None, 1))
+
+
+def _check_server_settings(model_name, settings, server):
+    """Fail when settings ask for different results than the server gives; the server's own win"""
+    if not _is_default(settings) and settings_to_json(settings) != settings_to_json(server):
+        raise ValueError(f"The model server transcribes as '{cache_model_name(model_name, server)}', not "
+                         f"'{cache_model_name(model_name, settings)}'; start the server with these settings "
+                         f"or transcribe without it")
+
+
+def _known_servers_path(cache):
+    return os.path.join(cache.cache_dir, KNOWN_SERVERS_FILE)
+
+
+def _read_known_servers(cache):
+    try:
+        with open(_known_servers_path(cache), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def last_known_settings(cache, server_url):
+    """The settings server_url last transcribed with, as remembered in the cache directory, or None"""
+    values = _read_known_servers(cache).get(server_url.rstrip('/'))
+    return settings_from_json(values) if values else None
+
+
+def remember_settings(cache, server_url, settings):
+    """Record the settings server_url transcribes with, so later cache lookups need not ask it"""
+    known = _read_known_servers(cache)
+    known[server_url.rstrip('/')] = settings_to_json(settings)
+    fd, tmp_path = tempfile.mkstemp(dir=cache.cache_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(known, f)
+        os.replace(tmp_path, _known_servers_path(cache))
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def transcribe(audio_path, model_name=DEFAULT_MODEL, server_url=None, model=None, use_cache=True,
+               settings=None, samples=None, **options):
+    """Transcribe through the cache, then the model server when one is configured, then locally
+
+    settings (see inference.inference_settings) choose the local backend; a
+    model passed in is assumed to match them. A model server transcribes
+    with its own settings, which then make the cache key; asking it for
+    other non-default ones raises ValueError. The cache is looked up before
+    the server is contacted, under the requested settings and, for default
+    ones, the settings the server last reported, so a cached result does
+    not need the server to be up. samples, a callable returning the audio
+    already decoded to 16 kHz mono float32, saves the local model decoding
+    the file again; it is only called on a cache miss.
+    """
+    if server_url is None:
+        server_url = os.environ.get(SERVER_URL_ENV)
+    settings = settings or inference_settings()
+
+    # Word timings drive the per-second buckets
+    options = dict(WORD_TIMESTAMP_OPTIONS, **options)
+
+    # Reuse an earlier result for the same audio bytes, model and options;
+    # keys maps each model name looked up to its cache key
+    cache = TranscriptionCache() if use_cache else None
+    keys = {}
+    if cache is not None:
+        candidates = [settings]
+        known = last_known_settings(cache, server_url) if server_url else None
+        if known is not None and _is_default(settings):
+            candidates.append(known)
+        for candidate in candidates:
+            name = cache_model_name(model_name, candidate)
+            if name in keys:
+                continue
+            keys[name] = cache.key_for(audio_path, name, options)
+            result = cache.get(keys[name])
+            if result is not None:
+                print("Using cached transcription")
+                return result
+
+    if server_url:
+        server = server_settings(server_url)
+        _check_server_settings(model_name, settings, server)
+        settings = server
+        if cache is not None:
+            if server != known:
+                remember_settings(cache, server_url, server)
+            name = cache_model_name(model_name, server)
+            if name not in keys:
+                keys[name] = cache.key_for(audio_path, name, options)
+                result = cache.get(keys[name])
+                if result is not None:
+                    print("Using cached transcription")
+                    return result
+            key = keys[name]
+
+        print(f"Sending audio to model server at {server_url}...")
+        result = transcribe_remote(audio_path, model_name, server_url, **options)
+        reported = settings_from_json(result.pop("inference"))
+        if cache is not None and reported != settings:
+            # The server restarted with other settings since /status; cache under what it ran
+            remember_settings(cache, server_url, reported)
+            key = cache.key_for(audio_path, cache_model_name(model_name, reported), options)
+    else:
+        result = transcribe_local(audio_path, model_name, model, settings,
+                                  samples() if samples is not None else None, **options)
+        if cache is not None:
+            key = keys[cache_model_name(model_name, settings)]
+
+    if "vad" in result:
+        print(describe_stats(result["vad"]))
+
+    if cache is not None:
+        cache.put(key, result, audio_path, model_name, options)
+    return result
+
+
+def add_transcription_arguments(parser):
+    """Add the model and server flags shared by the transcription scripts"""
+    parser.add_argument("audio_path", nargs="?",
+                        help="Audio file to transcribe (prompted for when omitted)")
+    parser.add_argument("--model", default=DEFAULT_MODEL,
+                        help=f"Whisper model size (default: {DEFAULT_MODEL})")
+    parser.add_argument("--server", metavar="URL", default=None,
+                        help=f"Send audio to a running model server, e.g. {DEFAULT_SERVER_URL} "
+                             f"(also read from ${SERVER_URL_ENV})")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Ignore cached transcriptions and always run inference")
+    add_inference_arguments(parser)
+    return parser
@@ -1,81 +1,34 @@
-import whisper
+import argparse
 import sys
-import json
-from collections import defaultdict
-import datetime
 
-def transcribe_with_automatic_markers(audio_path):
+from audio_artifact import load_samples, prepare_audio, recorded_artifact
+from inference import settings_from_args
+from markers import DEFAULT_MARKERS_FILE, build_markers, save_markers
+from streaming import (DEFAULT_OVERLAP_SECONDS, DEFAULT_WINDOW_SECONDS, add_streaming_arguments,
+                       check_streaming_arguments, write_streaming_markers)
+from transcriber import DEFAULT_MODEL, add_transcription_arguments, transcribe
+
+def transcribe_with_automatic_markers(audio_path, model_name=DEFAULT_MODEL, server_url=None,
+                                      use_cache=True, output_file=DEFAULT_MARKERS_FILE, settings=None,
+                                      audio_artifact=True):
     try:
-        # Load the model
-        print("Loading Whisper model...")
-        model = whisper.load_model("base")
+        # Decode once into files next to the markers that renders reuse
+        artifact = None
+        if audio_artifact:
+            artifact = prepare_audio(audio_path, output_file, recorded_artifact(output_file))
         
-        # Transcribe the audio
+        # Transcribe the audio (through the model server when configured)
         print("Transcribing audio...")
-        result = model.transcribe(audio_path, verbose=False)
-        
-        # Create dictionaries to store words and markers
-        words_by_second = defaultdict(list)
-        current_marker = 1
-        
-        # Process each segment
-        for segment in result["segments"]:
-            start_sec = int(round(segment["start"]))
-            end_sec = int(round(segment["end"]))
-            text = segment["text"].strip()
-            
-            # If the segment spans multiple seconds, try to distribute words across seconds
-            if start_sec != end_sec:
-                words = text.split()
-                total_duration = end_sec - start_sec
-                words_per_second = len(words) / total_duration
-                
-                for i, word in enumerate(words):
-                    word_second = start_sec + int(i / words_per_second)
-                    if word_second <= end_sec:
-                        words_by_second[word_second].append(word)
-            else:
-                words_by_second[start_sec].append(text)
+        result = transcribe(audio_path, model_name, server_url, use_cache=use_cache, settings=settings,
+                            samples=(lambda: load_samples(artifact)) if artifact else None)
         
-        # Create JSON structure with metadata and automatic markers
-        json_data = {
-            "metadata": {
-                "audio_file": audio_path,
-                "total_duration": max(words_by_second.keys()) + 1,
-                "processed_date": str(datetime.datetime.now())
-            },
-            "segments": {}
-        }
-        
-        print("\nTranscription with markers:")
-        print("------------------------")
-        
-        # Process chronologically and add markers
-        max_second = max(words_by_second.keys())
-        for second in range(max_second + 1):
-            timestamp = f"{second // 60:02d}:{second % 60:02d}"
-            
-            if second in words_by_second:
-                text = " ".join(words_by_second[second])
-                
-                json_data["segments"][str(second)] = {
-                    "timestamp": timestamp,
-                    "text": text,
-                    "marker": current_marker
-                }
-                print(f"{timestamp} | {text} -> {current_marker}")
-                current_marker += 1
-            else:
-                json_data["segments"][str(second)] = {
-                    "timestamp": timestamp,
-                    "text": "",
-                    "marker": None
-                }
+        # Bucket words by second and number the non-empty seconds
+        json_data = build_markers(result, audio_path)
+        if artifact:
+            json_data["metadata"]["audio_artifact"] = artifact
         
         # Save to JSON file
-        output_file = "transcription_markers.json"
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(json_data, f, indent=2, ensure_ascii=False)
+        save_markers(json_data, output_file)
             
         print(f"\nMarkers saved to {output_file}")
 
@@ -83,16 +36,45 @@ def transcribe_with_automatic_markers(audio_path):
         print(f"Error: {str(e)}", file=sys.stderr)
         sys.exit(1)
 
+def stream_with_automatic_markers(audio_path, model_name=DEFAULT_MODEL, output_file=DEFAULT_MARKERS_FILE,
+                                  window_seconds=DEFAULT_WINDOW_SECONDS,
+                                  overlap_seconds=DEFAULT_OVERLAP_SECONDS, settings=None):
+    try:
+        # Entries are appended to a JSONL sidecar while later windows are still transcribing
+        print("Streaming transcription...")
+        write_streaming_markers(audio_path, output_file, model_name, window_seconds, overlap_seconds,
+                                settings=settings)
+        
+        print(f"\nMarkers saved to {output_file}")
+
+    except Exception as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+
 def main():
-    # Get audio path from user
-    audio_path = input("Please enter the path to your audio file: ").strip()
+    parser = add_transcription_arguments(argparse.ArgumentParser(description="Transcribe audio into a markers JSON file"))
+    parser.add_argument("-o", "--output", default=DEFAULT_MARKERS_FILE,
+                        help=f"Markers JSON to write (default: {DEFAULT_MARKERS_FILE})")
+    parser.add_argument("--no-audio-artifact", action="store_true",
+                        help="Do not keep the decoded audio next to the markers for renders to reuse")
+    add_streaming_arguments(parser)
+    args = parser.parse_args()
+    check_streaming_arguments(parser, args)
+
+    # Get audio path from user if it was not passed on the command line
+    audio_path = args.audio_path or input("Please enter the path to your audio file: ").strip()
     
     if not audio_path:
         print("Error: No audio path provided", file=sys.stderr)
         sys.exit(1)
     
     # Process the audio file
-    transcribe_with_automatic_markers(audio_path)
+    settings = settings_from_args(args)
+    if args.stream:
+        stream_with_automatic_markers(audio_path, args.model, args.output, args.window, args.overlap, settings)
+        return
+    transcribe_with_automatic_markers(audio_path, args.model, args.server, not args.no_cache, args.output,
+                                      settings, not args.no_audio_artifact)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,189 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+
+CACHE_DIR_ENV = "WHISPER_CACHE_DIR"
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "whisper-markers")
+DEFAULT_MAX_SIZE_MB = 512
+
+# Options that change how the result is printed but not what it contains
+_IGNORED_OPTIONS = {"verbose"}
+
+
+def json_default(value):
+    """Convert numpy scalars/arrays in a Whisper result to JSON types"""
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def hash_audio(audio_path, chunk_size=1 << 20):
+    """SHA-256 of the audio file contents"""
+    digest = hashlib.sha256()
+    with open(audio_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class TranscriptionCache:
+    """On-disk cache of Whisper results keyed by audio content, model and options"""
+
+    def __init__(self, cache_dir=None, max_size_mb=DEFAULT_MAX_SIZE_MB):
+        self.cache_dir = cache_dir or os.environ.get(CACHE_DIR_ENV) or DEFAULT_CACHE_DIR
+        self.max_size = int(max_size_mb * 1024 * 1024)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def key_for(self, audio_path, model_name, options=None):
+        options = {k: v for k, v in (options or {}).items() if k not in _IGNORED_OPTIONS}
+        parts = [hash_audio(audio_path), model_name, json.dumps(options, sort_keys=True, default=str)]
+        return hashlib.sha256("\0".join(parts).encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key):
+        """Return the cached result for key, or None"""
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+        # Touch the entry so eviction treats it as recently used
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            # Pruned by another process since it was read; the result is still good
+            pass
+        return entry["result"]
+
+    def put(self, key, result, audio_path=None, model_name=None, options=None):
+        """Store a result and evict least recently used entries over the size cap"""
+        entry = {
+            "audio_file": audio_path,
+            "model": model_name,
+            "options": options or {},
+            "created": time.time(),
+            "result": {
+                "text": result.get("text", ""),
+                "language": result.get("language"),
+                "segments": result["segments"]
+            }
+        }
+
+        # Write through a temp file so readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, default=json_default, ensure_ascii=False)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        self.prune()
+
+    def entries(self):
+        """List cache entries as dicts, most recently used first"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append({
+                "key": name[:-len(".json")],
+                "path": path,
+                "size": stat.st_size,
+                "last_used": stat.st_mtime
+            })
+        entries.sort(key=lambda e: e["last_used"], reverse=True)
+        return entries
+
+    def size(self):
+        return sum(entry["size"] for entry in self.entries())
+
+    def prune(self, max_size=None):
+        """Evict least recently used entries until the cache fits max_size bytes"""
+        max_size = self.max_size if max_size is None else max_size
+        entries = self.entries()
+        total = sum(entry["size"] for entry in entries)
+        removed = []
+
+        while entries and total > max_size:
+            entry = entries.pop()
+            try:
+                os.remove(entry["path"])
+            except FileNotFoundError:
+                pass
+            total -= entry["size"]
+            removed.append(entry)
+
+        return removed
+
+    def clear(self):
+        return self.prune(max_size=0)
+
+
+def _describe(entry):
+    """Read the header fields of a cache entry for listing"""
+    try:
+        with open(entry["path"], 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return data.get("audio_file"), data.get("model"), len(data["result"]["segments"])
+    except (OSError, json.JSONDecodeError, KeyError):
+        return None, None, 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or prune the transcription cache")
+    parser.add_argument("--cache-dir", default=None,
+                        help=f"Cache directory (default: ${CACHE_DIR_ENV} or {DEFAULT_CACHE_DIR})")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("info", help="Show cache location and size")
+    subparsers.add_parser("list", help="List cached transcriptions, most recently used first")
+    prune_parser = subparsers.add_parser("prune", help="Evict least recently used entries")
+    prune_parser.add_argument("--max-size-mb", type=float, default=DEFAULT_MAX_SIZE_MB)
+    subparsers.add_parser("clear", help="Remove every cached transcription")
+    args = parser.parse_args()
+
+    cache = TranscriptionCache(args.cache_dir)
+
+    if args.command == "info":
+        entries = cache.entries()
+        total = sum(entry["size"] for entry in entries)
+        print(f"Cache directory: {cache.cache_dir}")
+        print(f"Entries: {len(entries)}")
+        print(f"Size: {total / (1024 * 1024):.1f} MB")
+    elif args.command == "list":
+        for entry in cache.entries():
+            audio_file, model_name, segments = _describe(entry)
+            last_used = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry["last_used"]))
+            print(f"{entry['key'][:12]}  {last_used}  {entry['size'] / 1024:8.1f} KB  "
+                  f"{model_name or '?':<8} {segments:5d} segments  {audio_file or '?'}")
+    elif args.command == "prune":
+        removed = cache.prune(int(args.max_size_mb * 1024 * 1024))
+        print(f"Removed {len(removed)} entries")
+    elif args.command == "clear":
+        removed = cache.clear()
+        print(f"Removed {len(removed)} entries")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except OSError as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        sys.exit(1)
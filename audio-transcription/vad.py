@@ -0,0 +1,233 @@
+"""Energy-based voice activity detection, so Whisper only sees the parts of a recording with speech"""
+import subprocess
+from collections import namedtuple
+
+import numpy as np
+
+# Whisper models expect 16 kHz mono audio
+SAMPLE_RATE = 16000
+FRAME_MS = 30
+
+# Silence put between speech regions when they are packed together, so
+# Whisper still hears a pause where a long one was cut out
+GAP_SECONDS = 0.5
+
+# Detection that keeps less than this share of audio that is not silent is
+# not trusted, and the whole recording is transcribed instead
+MIN_SPEECH_FRACTION = 0.01
+
+# A frame is speech when its level is above threshold_db (dBFS) and, when
+# the recording's noise floor lies below threshold_db, at least margin_db
+# above that floor. Shorter silences than min_silence_ms do not split a
+# region, regions shorter than min_speech_ms are dropped, and every region
+# is widened by padding_ms on both sides.
+VadSettings = namedtuple("VadSettings",
+                         ["threshold_db", "margin_db", "min_speech_ms", "min_silence_ms", "padding_ms"],
+                         defaults=(-45.0, 10.0, 250, 600, 200))
+
+
+def decode_audio(audio_path):
+    """Decode any ffmpeg-readable file to 16 kHz mono float32 samples"""
+    cmd = ["ffmpeg", "-nostdin", "-loglevel", "error", "-threads", "0", "-i", audio_path,
+           "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(SAMPLE_RATE), "-"]
+    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed to decode audio: {result.stderr.decode('utf-8', errors='replace')}")
+    return np.frombuffer(result.stdout, np.int16).astype(np.float32) / 32768.0
+
+
+def frame_levels(samples, frame_samples):
+    """RMS level of each whole frame in dBFS"""
+    count = len(samples) // frame_samples
+    frames = samples[:count * frame_samples].reshape(count, frame_samples)
+    rms = np.sqrt(np.mean(np.square(frames, dtype=np.float64), axis=1))
+    return 20 * np.log10(np.maximum(rms, 1e-10))
+
+
+def _runs(flags):
+    """(start, end) frame index pairs of the runs of True in a boolean array"""
+    edges = np.diff(np.concatenate([[0], flags.astype(np.int8), [0]]))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def speech_regions(samples, settings=None, sample_rate=SAMPLE_RATE):
+    """(start, end) times in seconds of the stretches with speech, as an (n, 2) array"""
+    settings = settings or VadSettings()
+    frame_samples = int(sample_rate * FRAME_MS / 1000)
+    levels = frame_levels(samples, frame_samples)
+    if len(levels) == 0:
+        return np.zeros((0, 2))
+
+    # A floor at or above the threshold is no room noise but a tone or music
+    # bed that never stops; raising the bar over it would drop the speech too
+    threshold = settings.threshold_db
+    noise_floor = np.percentile(levels, 10)
+    if noise_floor < threshold:
+        threshold = max(threshold, noise_floor + settings.margin_db)
+    speech = levels > threshold
+
+    # Fill short pauses, then drop blips too short to be speech
+    starts, ends = _runs(~speech)
+    for start, end in zip(starts, ends):
+        if start > 0 and end < len(speech) and (end - start) * FRAME_MS < settings.min_silence_ms:
+            speech[start:end] = True
+    starts, ends = _runs(speech)
+    keep = (ends - starts) * FRAME_MS >= settings.min_speech_ms
+    starts, ends = starts[keep], ends[keep]
+
+    frame_seconds = FRAME_MS / 1000
+    duration = len(samples) / sample_rate
+    padding = settings.padding_ms / 1000
+    regions = np.stack([np.maximum(starts * frame_seconds - padding, 0),
+                        np.minimum(ends * frame_seconds + padding, duration)], axis=1)
+
+    # Padding can make neighbours overlap; merge them
+    merged = []
+    for start, end in regions.tolist():
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return np.asarray(merged).reshape(-1, 2)
+
+
+def fallback_reason(samples, regions, settings=None, sample_rate=SAMPLE_RATE):
+    """Why the detected regions should be ignored in favour of the whole audio, or None
+
+    That is when they keep (almost) nothing although some of the audio is
+    louder than threshold_db; audio that is quiet throughout is skipped.
+    """
+    settings = settings or VadSettings()
+    duration = len(samples) / sample_rate
+    speech = float(np.sum(regions[:, 1] - regions[:, 0])) if len(regions) else 0.0
+    if duration == 0 or speech >= MIN_SPEECH_FRACTION * duration:
+        return None
+    levels = frame_levels(samples, int(sample_rate * FRAME_MS / 1000))
+    if len(levels) == 0 or levels.max() <= settings.threshold_db:
+        return None
+    return "little speech detected" if len(regions) else "no speech detected"
+
+
+class TimeMap:
+    """Maps times in the packed speech-only audio back to the original recording"""
+
+    def __init__(self, regions, gap=GAP_SECONDS):
+        self.original_starts = regions[:, 0]
+        self.lengths = regions[:, 1] - regions[:, 0]
+        self.packed_starts = np.concatenate([[0], np.cumsum(self.lengths + gap)[:-1]])
+
+    def __call__(self, t):
+        index = max(0, int(np.searchsorted(self.packed_starts, t, side='right')) - 1)
+        # Times inside a gap belong to the end of the region before it
+        local = min(max(t - self.packed_starts[index], 0), self.lengths[index])
+        return float(self.original_starts[index] + local)
+
+
+def pack_regions(samples, regions, gap=GAP_SECONDS, sample_rate=SAMPLE_RATE):
+    """Concatenate the speech regions with short silences between them; returns (samples, TimeMap)"""
+    silence = np.zeros(int(gap * sample_rate), dtype=np.float32)
+    pieces = []
+    for start, end in regions.tolist():
+        if pieces:
+            pieces.append(silence)
+        pieces.append(samples[int(start * sample_rate):int(end * sample_rate)])
+    return np.concatenate(pieces).astype(np.float32), TimeMap(regions, gap)
+
+
+def remap_result(result, time_map):
+    """Move a Whisper result's segment and word times onto the original timeline"""
+    segments = []
+    for segment in result["segments"]:
+        segment = dict(segment, start=time_map(segment["start"]), end=time_map(segment["end"]))
+        if "words" in segment:
+            segment["words"] = [dict(word, start=time_map(word["start"]), end=time_map(word["end"]))
+                                for word in segment["words"]]
+        segments.append(segment)
+    return dict(result, segments=segments)
+
+
+def skip_stats(regions, duration):
+    """How much of the audio the model was spared"""
+    speech = float(np.sum(regions[:, 1] - regions[:, 0])) if len(regions) else 0.0
+    return combine_stats([{"total_seconds": duration, "speech_seconds": speech, "regions": len(regions)}])
+
+
+def combine_stats(stats):
+    """Add up the stats of several windows of one recording"""
+    total = sum(entry["total_seconds"] for entry in stats)
+    speech = sum(entry["speech_seconds"] for entry in stats)
+    return {
+        "total_seconds": round(total, 2),
+        "speech_seconds": round(speech, 2),
+        "skipped_seconds": round(total - speech, 2),
+        "skipped_fraction": round(1 - speech / total, 4) if total else 0.0,
+        "regions": sum(entry["regions"] for entry in stats)
+    }
+
+
+def describe_stats(stats):
+    if stats.get("fallback"):
+        return f"Voice activity: {stats['fallback']} in audio that is not silent, transcribed all of it"
+    return (f"Voice activity: {stats['speech_seconds']}s of speech in {stats['regions']} regions, "
+            f"skipped {stats['skipped_seconds']}s of {stats['total_seconds']}s "
+            f"({stats['skipped_fraction']:.0%})")
+
+
+class SpeechOnlyModel:
+    """Wraps a model so transcribe() only runs inference on the detected speech
+
+    The speech regions are packed into one shorter clip and transcribed in
+    a single call, then every timestamp is mapped back. The result gains a
+    "vad" entry with how much audio was skipped. Energy detection keeps
+    music beds that are as loud as the speech; Whisper still sees those.
+    When detection keeps next to nothing of audio that is not silent, the
+    whole audio is transcribed instead (see fallback_reason).
+    """
+
+    def __init__(self, model, settings=None):
+        self.model = model
+        self.settings = settings or VadSettings()
+
+    def transcribe(self, audio, **options):
+        samples = decode_audio(audio) if isinstance(audio, str) else np.asarray(audio, dtype=np.float32)
+        regions = speech_regions(samples, self.settings)
+        duration = len(samples) / SAMPLE_RATE
+        reason = fallback_reason(samples, regions, self.settings)
+        if reason:
+            result = self.model.transcribe(samples, **options)
+            result["vad"] = dict(skip_stats(np.array([[0.0, duration]]), duration), fallback=reason)
+            return result
+
+        stats = skip_stats(regions, duration)
+        if len(regions) == 0:
+            return {"text": "", "segments": [], "language": options.get("language"), "vad": stats}
+
+        packed, time_map = pack_regions(samples, regions)
+        result = remap_result(self.model.transcribe(packed, **options), time_map)
+        result["vad"] = stats
+        return result
+
+
+def add_vad_arguments(parser):
+    """Add the --vad flags shared by the transcription scripts"""
+    defaults = VadSettings()
+    parser.add_argument("--vad", action="store_true",
+                        help="Detect speech first and only transcribe those parts (default: on when $WHISPER_VAD=1)")
+    parser.add_argument("--vad-threshold-db", type=float, default=defaults.threshold_db,
+                        help=f"Minimum speech level in dBFS (default: {defaults.threshold_db})")
+    parser.add_argument("--vad-margin-db", type=float, default=defaults.margin_db,
+                        help=f"Minimum level above the noise floor (default: {defaults.margin_db})")
+    parser.add_argument("--vad-min-speech-ms", type=int, default=defaults.min_speech_ms,
+                        help=f"Shorter bursts are not speech (default: {defaults.min_speech_ms})")
+    parser.add_argument("--vad-min-silence-ms", type=int, default=defaults.min_silence_ms,
+                        help=f"Shorter pauses do not split speech (default: {defaults.min_silence_ms})")
+    parser.add_argument("--vad-padding-ms", type=int, default=defaults.padding_ms,
+                        help=f"Audio kept around each speech region (default: {defaults.padding_ms})")
+    return parser
+
+
+def vad_settings_from_args(args):
+    if not args.vad:
+        return None
+    return VadSettings(args.vad_threshold_db, args.vad_margin_db, args.vad_min_speech_ms,
+                       args.vad_min_silence_ms, args.vad_padding_ms)
@@ -0,0 +1,44 @@
+"""Compare wall time of the subtitle backends on a synthetic markers JSON.
+
+    python benchmarks/bench_subtitles.py --duration 120 --backends overlay burn soft
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "audio-transcription"))
+sys.path.insert(0, os.path.join(ROOT, "video-generator"))
+
+from synthetic import make_markers
+from video_creator import SUBTITLE_BACKENDS, VideoCreator
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark subtitle backends")
+    parser.add_argument("--duration", type=int, default=60, help="Seconds of synthetic audio")
+    parser.add_argument("--backends", nargs="+", default=list(SUBTITLE_BACKENDS), choices=SUBTITLE_BACKENDS)
+    args = parser.parse_args()
+
+    prefs = {'show_subtitles': True, 'fontsize': 70, 'position': 'bottom', 'margin': 100}
+    results = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        markers_path, data = make_markers(work_dir, args.duration, density=1.0)
+        for backend in args.backends:
+            output_path = os.path.join(work_dir, f"{backend}.mp4")
+            start = time.perf_counter()
+            VideoCreator(data, dict(prefs, backend=backend)).create_video(output_path)
+            results[backend] = time.perf_counter() - start
+
+    print(f"\nSubtitle backends, {args.duration}s of video:")
+    print("------------------------")
+    baseline = results.get('overlay')
+    for backend, elapsed in results.items():
+        speedup = f"  ({baseline / elapsed:.2f}x vs overlay)" if baseline and backend != 'overlay' else ""
+        print(f"{backend:<8} {elapsed:8.2f}s{speedup}")
+
+
+if __name__ == "__main__":
+    main()
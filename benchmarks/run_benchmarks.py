@@ -0,0 +1,375 @@
+"""Offline benchmark suite on synthetic inputs, with throughput regression checks.
+
+    python benchmarks/run_benchmarks.py --quick
+    python benchmarks/run_benchmarks.py --save-baseline benchmarks/baseline.json
+    python benchmarks/run_benchmarks.py --baseline benchmarks/baseline.json --tolerance 0.25
+
+Everything runs on CPU without network access. Inference uses a mock model
+unless --model names a Whisper model (e.g. tiny) that is installed locally;
+then each --inference-backends entry is timed and its transcript compared
+with the first one's by word error rate. Synthetic audio has no words to
+get right, so pass --speech-file for a meaningful accuracy figure. The vad
+benchmark checks the speech detection against the seconds the synthetic
+audio actually speaks in.
+Exits with status 1 when a result is slower than the baseline by more than
+the tolerance.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "audio-transcription"))
+sys.path.insert(0, os.path.join(ROOT, "video-generator"))
+
+from ffmpeg_tools import probe_media
+from inference import inference_settings
+from json_processor import JsonProcessor
+from marker_store import MarkerStore
+from markers import build_markers
+from render_profiles import PROFILES
+from segment_table import COMPACT_EXTENSION, write_compact
+from subtitle_renderer import build_cues
+from synthetic import MockModel, fake_whisper_result, make_audio, make_markers, speech_mask
+from transcriber import SERVER_URL_ENV, load_model, transcribe
+from vad import VadSettings, decode_audio, skip_stats, speech_regions
+from video_creator import COMPOSITORS, SUBTITLE_BACKENDS, VideoCreator
+
+BASELINE_VERSION = 1
+BENCHMARKS = ('startup', 'vad', 'inference', 'postprocess', 'load', 'marker_edit', 'clips', 'render')
+
+# Commands whose start-up time is measured in fresh interpreters, relative to the repository root
+STARTUP_COMMANDS = {
+    "python": ["-c", "pass"],
+    "media_pipeline --help": ["-m", "media_pipeline", "--help"],
+    "generate-video.py --help": [os.path.join("audio-transcription", "generate-video.py"), "--help"],
+    "import marker_store": ["-c", "import sys; sys.path.insert(0, 'audio-transcription'); import marker_store"],
+    "import video_creator": ["-c", "import sys; sys.path.insert(0, 'video-generator'); import video_creator"]
+}
+
+
+def _timed(function, repeat):
+    """Best wall time of `repeat` calls; the minimum is the least noisy estimate"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def _result(seconds, work, unit):
+    return {"seconds": round(seconds, 4), "work": work, "unit": unit,
+            "throughput": round(work / seconds, 3) if seconds > 0 else None}
+
+
+def bench_startup(args, repeat):
+    """Wall time from launching a fresh interpreter to the command exiting"""
+    def start():
+        subprocess.run([sys.executable] + args, cwd=ROOT, check=True, stdout=subprocess.DEVNULL)
+
+    seconds = _timed(start, repeat)
+    return _result(seconds, 1, "starts/s")
+
+
+def word_error_rate(reference, hypothesis):
+    """Word-level edit distance divided by the reference length, ignoring case and punctuation"""
+    reference = re.findall(r"[\w']+", reference.lower())
+    hypothesis = re.findall(r"[\w']+", hypothesis.lower())
+    if not reference:
+        return 0.0 if not hypothesis else 1.0
+
+    previous = list(range(len(hypothesis) + 1))
+    for i, word in enumerate(reference, start=1):
+        current = [i]
+        for j, other in enumerate(hypothesis, start=1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (word != other)))
+        previous = current
+    return previous[-1] / len(reference)
+
+
+def bench_inference(audio_path, duration, model, repeat):
+    """Transcription without the transcription cache; the transcript is kept for the accuracy check"""
+    results = []
+    seconds = _timed(lambda: results.append(transcribe(audio_path, model=model, use_cache=False)), repeat)
+    return dict(_result(seconds, duration, "audio s/s"), text=results[-1]["text"])
+
+
+def load_models(args):
+    """(label, model) for each inference configuration to benchmark"""
+    if args.model == "mock":
+        return [("mock", MockModel())]
+
+    models = []
+    for spec in args.inference_backends:
+        spec_body, _, vad = spec.partition("+")
+        backend, _, batch_size = spec_body.partition(":")
+        settings = inference_settings(backend, args.threads, None, int(batch_size or 1),
+                                      VadSettings() if vad == "vad" else None)
+        with contextlib.redirect_stdout(io.StringIO()):
+            models.append((spec, load_model(args.model, settings)))
+    return models
+
+
+def bench_vad(audio_path, duration, density, repeat):
+    """Speech detection over decoded audio, with how much it skipped and how much speech it missed"""
+    samples = decode_audio(audio_path)
+    regions = []
+    seconds = _timed(lambda: regions.append(speech_regions(samples)), repeat)
+    regions = regions[-1]
+
+    # Seconds the synthetic audio speaks in that no region covers
+    mask = speech_mask(duration, density)
+    covered = [any(start < second + 1 and end > second for start, end in regions.tolist())
+               for second in range(duration)]
+    missed = sum(1 for spoken, hit in zip(mask, covered) if spoken and not hit)
+    return dict(_result(seconds, duration, "audio s/s"),
+                skipped_fraction=skip_stats(regions, duration)["skipped_fraction"],
+                missed_speech_fraction=round(missed / max(1, int(mask.sum())), 4))
+
+
+def bench_postprocess(duration, density, repeat):
+    """Bucketing a Whisper result into the per-second markers JSON"""
+    result = fake_whisper_result(duration, density)
+    seconds = _timed(lambda: build_markers(result, "synthetic.wav", verbose=False), repeat)
+    return _result(seconds, duration, "audio s/s")
+
+
+def bench_load(markers_path, duration, repeat):
+    """Reading a markers file and building the subtitle cues from it"""
+    seconds = _timed(lambda: build_cues(JsonProcessor(markers_path).process()["segments"]), repeat)
+    return _result(seconds, duration, "audio s/s")
+
+
+def bench_marker_edit(work_dir, markers_path, image_path, repeat):
+    """Assigning an image to every marker one at a time, as the marker reader does, then saving"""
+    edit_path = os.path.join(work_dir, "edit.json")
+
+    def edit():
+        shutil.copyfile(markers_path, edit_path)
+        with MarkerStore(edit_path) as store:
+            for marker in store.markers():
+                store.assign_image(marker, image_path)
+
+    with MarkerStore(markers_path, use_edit_log=False) as store:
+        markers = len(store.markers())
+    seconds = _timed(edit, repeat)
+    return _result(seconds, markers, "markers/s")
+
+
+def bench_clips(data, duration, profile, repeat):
+    """Building the moviepy clip tree for the whole timeline, without writing frames
+
+    Images are decoded on the first repeat and come from the image cache after.
+    """
+    prefs = {'show_subtitles': True, 'fontsize': 70, 'position': 'bottom', 'margin': 100,
+             'backend': 'overlay'}
+    creator = VideoCreator(data, prefs, render_mode='composite', use_render_cache=False,
+                           profile=profile, report=False)
+    canvas_size = creator._canvas_size(duration)
+
+    def build():
+        final_video, clips = creator._build_frames(duration, canvas_size, 'overlay')
+        final_video.close()
+        for clip in clips:
+            clip.close()
+
+    return _result(_timed(build, repeat), duration, "video s/s")
+
+
+def bench_render(work_dir, data, duration, backend, profile, compositor='native'):
+    """End-to-end render of the markers to an MP4, once, without the chunk cache"""
+    prefs = {'show_subtitles': True, 'fontsize': 70, 'position': 'bottom', 'margin': 100,
+             'backend': backend}
+    output_path = os.path.join(work_dir, f"render-{backend}.mp4")
+    creator = VideoCreator(data, prefs, use_render_cache=False, profile=profile, report=False,
+                           compositor=compositor)
+    seconds = _timed(lambda: creator.create_video(output_path), 1)
+    os.remove(output_path)
+    return _result(seconds, duration, "video s/s")
+
+
+def run_suite(args, models):
+    """Run the selected benchmarks over every duration and density; returns {name: result}"""
+    results = {}
+
+    def record(name, function):
+        print(f"{name} ...", end=" ", flush=True)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(sys.stdout if args.verbose else output):
+            result = function()
+        results[name] = result
+        print(f"{result['throughput']} {result['unit']}")
+
+    def inference(label, audio_path, duration):
+        reference = None
+        for backend, model in models:
+            name = f"inference[{label},backend={backend}]"
+            record(name, lambda: bench_inference(audio_path, duration, model, args.repeat))
+            text = results[name].pop("text")
+            if reference is None:
+                reference = (backend, text)
+            else:
+                results[name]["wer"] = round(word_error_rate(reference[1], text), 4)
+                print(f"  word error rate vs {reference[0]}: {results[name]['wer']:.1%}")
+
+    if 'startup' in args.only:
+        for name, command in STARTUP_COMMANDS.items():
+            record(f"startup[{name}]", lambda: bench_startup(command, max(args.repeat, 3)))
+
+    if 'inference' in args.only and args.speech_file:
+        inference(f"file={os.path.basename(args.speech_file)}", args.speech_file,
+                  probe_media(args.speech_file)["duration"])
+
+    for duration in args.durations:
+        for density in args.densities:
+            label = f"duration={duration},density={density}"
+            with tempfile.TemporaryDirectory(prefix="bench-") as work_dir:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    markers_path, data = make_markers(work_dir, duration, density, args.image_every)
+                image_path = next(entry["image_path"] for entry in data["segments"].values()
+                                  if entry.get("image_path"))
+
+                if 'vad' in args.only or ('inference' in args.only and not args.speech_file):
+                    audio_path = make_audio(os.path.join(work_dir, "speech.wav"), duration, 'speechlike',
+                                            density)
+                if 'vad' in args.only:
+                    record(f"vad[{label}]", lambda: bench_vad(audio_path, duration, density, args.repeat))
+                    print(f"  skipped {results[f'vad[{label}]']['skipped_fraction']:.1%}, missed speech "
+                          f"{results[f'vad[{label}]']['missed_speech_fraction']:.1%}")
+                if 'inference' in args.only and not args.speech_file:
+                    inference(label, audio_path, duration)
+                if 'postprocess' in args.only:
+                    record(f"postprocess[{label}]", lambda: bench_postprocess(duration, density, args.repeat))
+                if 'load' in args.only:
+                    compact_path = write_compact(data, os.path.join(work_dir, f"markers{COMPACT_EXTENSION}"))
+                    for name, path in (("json", markers_path), ("compact", compact_path)):
+                        record(f"load[{label},format={name}]", lambda: bench_load(path, duration, args.repeat))
+                if 'marker_edit' in args.only:
+                    record(f"marker_edit[{label}]",
+                           lambda: bench_marker_edit(work_dir, markers_path, image_path, args.repeat))
+                if 'clips' in args.only:
+                    record(f"clips[{label}]", lambda: bench_clips(data, duration, args.profile, args.repeat))
+                if 'render' in args.only and duration <= args.max_render_seconds:
+                    for backend in args.backends:
+                        # Only overlay subtitles are composited in Python; the others take the slideshow path
+                        for compositor in args.compositors if backend == 'overlay' else args.compositors[:1]:
+                            name = f"render[{label},backend={backend},profile={args.profile}"
+                            if backend == 'overlay':
+                                name += f",compositor={compositor}"
+                            record(name + "]", lambda: bench_render(work_dir, data, duration, backend,
+                                                                    args.profile, compositor))
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Print each result against the baseline; returns the names that regressed"""
+    regressions = []
+    print(f"\n{'benchmark':<72} {'throughput':>12} {'baseline':>12} {'change':>8}")
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if not previous or not previous.get("throughput") or not result["throughput"]:
+            print(f"{name:<72} {result['throughput']:>12} {'-':>12} {'':>8}")
+            continue
+        change = result["throughput"] / previous["throughput"] - 1
+        flag = ""
+        if change < -tolerance:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:<72} {result['throughput']:>12} {previous['throughput']:>12} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the transcription and rendering pipeline offline")
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, default=list(BENCHMARKS),
+                        help="Benchmarks to run (default: all)")
+    parser.add_argument("--durations", nargs="+", type=int, default=[60, 600],
+                        help="Seconds of synthetic audio (default: 60 600)")
+    parser.add_argument("--densities", nargs="+", type=float, default=[0.3, 0.9],
+                        help="Fractions of seconds with speech (default: 0.3 0.9)")
+    parser.add_argument("--image-every", type=int, default=10, help="Assign an image to every Nth marker")
+    parser.add_argument("--repeat", type=int, default=3, help="Repeats per benchmark; the best time counts")
+    parser.add_argument("--backends", nargs="+", choices=SUBTITLE_BACKENDS, default=list(SUBTITLE_BACKENDS),
+                        help="Subtitle backends for the render benchmark")
+    parser.add_argument("--compositors", nargs="+", choices=COMPOSITORS, default=list(COMPOSITORS),
+                        help="Frame compositors for overlay renders in the render benchmark")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="draft",
+                        help="Render profile for clip construction and renders (default: draft)")
+    parser.add_argument("--max-render-seconds", type=int, default=60,
+                        help="Only render durations up to this many seconds (default: 60)")
+    parser.add_argument("--model", default="mock",
+                        help="'mock', or a locally installed Whisper model such as tiny")
+    parser.add_argument("--inference-backends", nargs="+", default=["fp32", "int8", "fp32:8", "int8:8"],
+                        help="Backends to compare as backend[:batch size][+vad]; the first is the "
+                             "accuracy reference (default: fp32 int8 fp32:8 int8:8)")
+    parser.add_argument("--threads", type=int, default=None, help="PyTorch intra-op threads for inference")
+    parser.add_argument("--speech-file", help="Recorded speech to run the inference benchmark on, once")
+    parser.add_argument("--quick", action="store_true", help="One 30 second input at density 0.8, one repeat")
+    parser.add_argument("--baseline", help="Compare against this baseline JSON")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed throughput drop before a result counts as a regression (default: 0.25)")
+    parser.add_argument("--save-baseline", help="Write the results to this baseline JSON")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--verbose", action="store_true", help="Show the pipeline's own output")
+    args = parser.parse_args()
+
+    if args.quick:
+        args.durations, args.densities, args.repeat = [30], [0.8], 1
+
+    # Stay offline and start from cold caches
+    os.environ.pop(SERVER_URL_ENV, None)
+    cache_dir = tempfile.mkdtemp(prefix="bench-cache-")
+    os.environ["VIDEO_IMAGE_CACHE_DIR"] = os.path.join(cache_dir, "images")
+
+    try:
+        models = load_models(args) if 'inference' in args.only else []
+    except ImportError as e:
+        print(f"Error: --model {args.model} needs Whisper and PyTorch installed ({e})", file=sys.stderr)
+        return 1
+
+    try:
+        results = run_suite(args, models)
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    report = {
+        "version": BASELINE_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "model": args.model,
+        "results": results
+    }
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+            print(f"Results written to {path}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get("platform") != report["platform"] or baseline.get("cpu_count") != report["cpu_count"]:
+            print(f"Warning: baseline was recorded on {baseline.get('platform')} "
+                  f"with {baseline.get('cpu_count')} CPUs")
+        regressions = compare(results, baseline.get("results", {}), args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) regressed by more than {args.tolerance:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
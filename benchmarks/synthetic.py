@@ -0,0 +1,155 @@
+"""Deterministic synthetic inputs for the benchmarks: audio, images, Whisper results and markers."""
+import os
+import wave
+
+import numpy as np
+from PIL import Image
+
+from markers import build_markers, save_markers
+
+SAMPLE_RATE = 16000
+AUDIO_KINDS = ('tone', 'noise', 'speechlike')
+
+WORDS = ("the quick brown fox jumps over a lazy dog while narrators keep on talking about "
+         "images markers videos and seconds of synthetic speech").split()
+
+
+def speech_mask(duration, density, seed=0):
+    """Which whole seconds contain speech, about `density` of them, in runs like real talk"""
+    rng = np.random.default_rng(seed)
+    mask = np.zeros(duration, dtype=bool)
+    if density >= 1:
+        mask[:] = True
+        return mask
+
+    second = 0
+    while second < duration:
+        # Alternate talking and pause runs whose lengths give the requested density
+        pause = int(rng.integers(1, 5))
+        talk = max(1, round(pause * density / (1 - density) * rng.uniform(0.5, 1.5)))
+        mask[second:second + talk] = True
+        second += talk + pause
+    return mask
+
+
+def make_audio(path, duration, kind='tone', density=0.8, seed=0):
+    """Write a 16 kHz mono 16-bit WAV
+
+    'tone' is a steady 440 Hz sine, 'noise' white noise, and 'speechlike'
+    amplitude-modulated noise bursts in the seconds speech_mask marks.
+    """
+    if kind not in AUDIO_KINDS:
+        raise ValueError(f"Unknown audio kind '{kind}'")
+    rng = np.random.default_rng(seed)
+    t = np.arange(duration * SAMPLE_RATE) / SAMPLE_RATE
+
+    if kind == 'tone':
+        signal = 0.3 * np.sin(2 * np.pi * 440 * t)
+    elif kind == 'noise':
+        signal = 0.1 * rng.standard_normal(t.size)
+    else:
+        # Syllable-rate envelope over noise, silent outside the speech seconds
+        envelope = 0.5 * (1 + np.sin(2 * np.pi * 4 * t))
+        active = np.repeat(speech_mask(duration, density, seed), SAMPLE_RATE)
+        signal = 0.3 * rng.standard_normal(t.size) * envelope * active + 0.002 * rng.standard_normal(t.size)
+
+    samples = (np.clip(signal, -1, 1) * 32767).astype(np.int16)
+    with wave.open(path, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes(samples.tobytes())
+    return path
+
+
+def wav_duration(path):
+    with wave.open(path, 'rb') as f:
+        return f.getnframes() / f.getframerate()
+
+
+def make_images(work_dir, count, size=(1920, 1080), seed=0):
+    """Write `count` distinct JPEGs with a gradient, so they compress like photos rather than flat colour"""
+    rng = np.random.default_rng(seed)
+    width, height = size
+    ramp = np.linspace(0, 1, width, dtype=np.float32)[None, :, None]
+    paths = []
+    for i in range(count):
+        colour = rng.integers(40, 255, size=3).astype(np.float32)
+        pixels = (ramp * colour + (1 - ramp) * colour[::-1]).astype(np.uint8)
+        pixels = np.broadcast_to(pixels, (height, width, 3))
+        path = os.path.join(work_dir, f"image_{i:04d}.jpg")
+        Image.fromarray(np.ascontiguousarray(pixels)).save(path, quality=85)
+        paths.append(path)
+    return paths
+
+
+def fake_whisper_result(duration, density=0.8, words_per_second=2.5, seed=0):
+    """A Whisper-shaped result with word timestamps, speaking in the seconds speech_mask marks"""
+    rng = np.random.default_rng(seed)
+    mask = speech_mask(duration, density, seed)
+    segments = []
+    words = []
+
+    def close_segment():
+        if words:
+            segments.append({
+                "id": len(segments),
+                "start": words[0]["start"],
+                "end": words[-1]["end"],
+                "text": "".join(word["word"] for word in words),
+                "words": list(words)
+            })
+            words.clear()
+
+    for second in range(duration):
+        if not mask[second]:
+            close_segment()
+            continue
+        count = max(1, int(rng.poisson(words_per_second)))
+        edges = np.sort(rng.uniform(second, second + 1, size=count * 2))
+        for start, end in zip(edges[0::2], edges[1::2]):
+            words.append({"word": " " + str(rng.choice(WORDS)), "start": float(start), "end": float(end)})
+        # Whisper segments are a sentence or so long
+        if len(words) > 12:
+            close_segment()
+    close_segment()
+
+    return {"text": "".join(segment["text"] for segment in segments), "language": "en", "segments": segments}
+
+
+class MockModel:
+    """Stands in for a Whisper model: returns a synthetic result sized to the audio file or samples"""
+
+    def __init__(self, density=0.8, seed=0):
+        self.density = density
+        self.seed = seed
+
+    def transcribe(self, audio_path, **options):
+        if not isinstance(audio_path, str):
+            return fake_whisper_result(len(audio_path) // SAMPLE_RATE, self.density, seed=self.seed)
+        try:
+            duration = wav_duration(audio_path)
+        except wave.Error:
+            from ffmpeg_tools import probe_media
+            duration = probe_media(audio_path)["duration"]
+        return fake_whisper_result(int(duration), self.density, seed=self.seed)
+
+
+def make_markers(work_dir, duration, density=0.8, image_every=10, image_count=None, audio_kind='tone', seed=0):
+    """Write audio, images and a markers JSON built by the real post-processing
+
+    Every image_every-th marker gets an image, cycling through image_count
+    distinct files. Returns (markers JSON path, data).
+    """
+    audio_path = make_audio(os.path.join(work_dir, "audio.wav"), duration, audio_kind, density, seed)
+    data = build_markers(fake_whisper_result(duration, density, seed=seed), audio_path, verbose=False)
+
+    markers = [entry for entry in data["segments"].values() if entry["marker"] is not None]
+    image_count = image_count or max(1, len(markers) // image_every // 2)
+    images = make_images(work_dir, image_count, seed=seed)
+    for i, entry in enumerate(markers[::image_every]):
+        entry["image_path"] = images[i % len(images)]
+
+    markers_path = os.path.join(work_dir, "markers.json")
+    save_markers(data, markers_path)
+    return markers_path, data
@@ -0,0 +1,25 @@
+"""Transcribe -> annotate -> render, as one importable pipeline
+
+The pipeline drives the tools in audio-transcription/ and video-generator/,
+so both are put on the import path here.
+"""
+import os
+import sys
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for _tool_dir in ("audio-transcription", "video-generator"):
+    _path = os.path.join(_ROOT, _tool_dir)
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
+
+__all__ = ["annotate", "preview", "render", "run", "subtitle_preferences", "transcribe"]
+
+
+def __getattr__(name):
+    # The pipeline is imported on first use, so importing the package, and
+    # the CLI's --help, status and cancel (see cli.py), do not pay for the
+    # rendering and transcription imports
+    if name in __all__:
+        from media_pipeline import pipeline
+        return getattr(pipeline, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
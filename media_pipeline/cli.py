@@ -0,0 +1,366 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+from inference import BACKENDS, DEFAULT_MODEL, inference_settings
+from media_pipeline.jobs import STATUSES, JobQueue
+from profiling import PROFILERS
+from render_profiles import COMPOSITORS, PROFILES, RENDER_MODES, SUBTITLE_BACKENDS
+
+# The pipeline, worker and speech detection are imported by the commands
+# that use them, so --help, status and cancel start without numpy, moviepy
+# or the renderer
+
+# Values used when neither the command line nor the config file sets an option
+DEFAULTS = {
+    "model": DEFAULT_MODEL,
+    "server": None,
+    "no_cache": False,
+    "stream": False,
+    "backend": None,
+    "threads": None,
+    "interop_threads": None,
+    "batch_size": None,
+    "vad": False,
+    "vad_threshold_db": None,
+    "vad_margin_db": None,
+    "vad_min_speech_ms": None,
+    "vad_min_silence_ms": None,
+    "vad_padding_ms": None,
+    "no_audio_artifact": False,
+    "markers": None,
+    "images": None,
+    "skip_invalid": False,
+    "dry_run": False,
+    "profile": None,
+    "workers": None,
+    "render_mode": "auto",
+    "compositor": "native",
+    "subtitles": "burn",
+    "subtitle_position": "bottom",
+    "subtitle_size": "big",
+    "no_render_cache": False,
+    "no_report": False,
+    "profiler": None,
+    "priority": 0,
+    "attempts": 3,
+    "concurrency": 1,
+    "max_load": None,
+    "min_free_memory_mb": None,
+    "job_memory_mb": None,
+    "nice": 0,
+    "until_empty": False
+}
+
+
+def load_config(config_file):
+    """Read a JSON config of option values, e.g. {"profile": "draft", "subtitle-size": "small"}"""
+    with open(config_file, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    if not isinstance(config, dict):
+        raise ValueError(f"{config_file} must contain a JSON object")
+    return {key.replace('-', '_'): value for key, value in config.items()}
+
+
+def _add_transcribe_options(parser):
+    parser.add_argument("--model", default=None, help=f"Whisper model (default: {DEFAULT_MODEL})")
+    parser.add_argument("--server", default=None, help="Transcribe through a model server at this URL")
+    parser.add_argument("--no-cache", action="store_true", default=None,
+                        help="Always transcribe, ignoring the transcription cache")
+    parser.add_argument("--stream", action="store_true", default=None,
+                        help="Transcribe in overlapping windows, writing markers as they are produced")
+    parser.add_argument("--backend", choices=BACKENDS, default=None,
+                        help="Inference backend (default: $WHISPER_BACKEND or fp32)")
+    parser.add_argument("--threads", type=int, default=None, help="PyTorch intra-op threads")
+    parser.add_argument("--interop-threads", type=int, default=None, help="PyTorch inter-op threads")
+    parser.add_argument("--batch-size", type=int, default=None,
+                        help="Decode this many 30 s windows at once (default: 1, sequential)")
+    parser.add_argument("--vad", action="store_true", default=None,
+                        help="Only transcribe the parts with speech (default: off unless $WHISPER_VAD=1)")
+    parser.add_argument("--vad-threshold-db", type=float, default=None,
+                        help="Minimum speech level in dBFS for --vad (default: -45)")
+    parser.add_argument("--vad-margin-db", type=float, default=None,
+                        help="Minimum level above the noise floor for --vad (default: 10)")
+    parser.add_argument("--vad-min-speech-ms", type=int, default=None,
+                        help="Shorter bursts are not speech for --vad (default: 250)")
+    parser.add_argument("--vad-min-silence-ms", type=int, default=None,
+                        help="Shorter pauses do not split speech for --vad (default: 600)")
+    parser.add_argument("--vad-padding-ms", type=int, default=None,
+                        help="Audio kept around each speech region for --vad (default: 200)")
+    parser.add_argument("--no-audio-artifact", action="store_true", default=None,
+                        help="Do not keep the decoded audio (.pcm, plus .m4a for sources an MP4 cannot "
+                             "hold) next to the markers for transcription and renders to reuse")
+
+
+def _add_render_options(parser):
+    parser.add_argument("--profile", choices=sorted(PROFILES), default=None,
+                        help="Render profile (default: $VIDEO_RENDER_PROFILE or standard)")
+    parser.add_argument("--workers", default=None,
+                        help="Processes for composite renders, or 'auto' (default: $VIDEO_RENDER_WORKERS or 1)")
+    parser.add_argument("--render-mode", choices=RENDER_MODES, default=None,
+                        help="Rendering path (default: auto)")
+    parser.add_argument("--compositor", choices=COMPOSITORS, default=None,
+                        help="How composite renders draw frames (default: native)")
+    parser.add_argument("--subtitles", choices=SUBTITLE_BACKENDS + ('none',), default=None,
+                        help="How subtitles are added, or none (default: burn)")
+    parser.add_argument("--subtitle-position", choices=('bottom', 'center'), default=None,
+                        help="Subtitle position (default: bottom)")
+    parser.add_argument("--subtitle-size", choices=('small', 'big'), default=None,
+                        help="Subtitle size (default: big)")
+    parser.add_argument("--no-render-cache", action="store_true", default=None,
+                        help="Encode every chunk instead of reusing cached ones")
+    parser.add_argument("--no-report", action="store_true", default=None,
+                        help="Do not write the <output>.render.json timing report")
+    parser.add_argument("--profiler", choices=PROFILERS, default=None,
+                        help="Also profile the render with cProfile or pyinstrument")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m media_pipeline",
+        description="Transcribe audio, assign images to markers and render videos without prompts",
+        epilog="Every option can also be set in the JSON file given with --config; "
+               "options on the command line take precedence."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    transcribe_parser = subparsers.add_parser("transcribe", help="Transcribe audio into a markers JSON file")
+    transcribe_parser.add_argument("audio", nargs="?", help="Audio file")
+    transcribe_parser.add_argument("-o", "--markers", default=None,
+                                   help="Markers JSON to write (default: <audio>_markers.json)")
+    _add_transcribe_options(transcribe_parser)
+
+    annotate_parser = subparsers.add_parser("annotate", help="Assign images to markers from a mapping file")
+    annotate_parser.add_argument("markers", nargs="?", help="Markers JSON to update")
+    annotate_parser.add_argument("images", nargs="?", help="CSV or JSON mapping of markers to images")
+    annotate_parser.add_argument("--skip-invalid", action="store_true", default=None,
+                                 help="Apply the valid assignments even if some fail validation")
+    annotate_parser.add_argument("--dry-run", action="store_true", default=None,
+                                 help="Validate only, without writing the markers JSON")
+
+    render_parser = subparsers.add_parser("render", help="Render a markers JSON file to a video")
+    render_parser.add_argument("markers", nargs="?", help="Markers JSON file")
+    render_parser.add_argument("-o", "--output", default=None, help="Video file to write")
+    _add_render_options(render_parser)
+
+    preview_parser = subparsers.add_parser("preview", help="Render a low-resolution clip of part of a video")
+    preview_parser.add_argument("markers", nargs="?", help="Markers JSON file")
+    preview_parser.add_argument("-o", "--output", default=None,
+                                help="Video file to write (default: <markers>_preview.mp4)")
+    preview_parser.add_argument("--start", type=float, default=None,
+                                help="Window start in seconds (default: 0)")
+    preview_parser.add_argument("--end", type=float, default=None,
+                                help="Window end in seconds (default: the end of the audio)")
+    preview_parser.add_argument("--marker", type=int, default=None,
+                                help="Preview the seconds of this marker instead of --start/--end")
+    preview_parser.add_argument("--profile", choices=sorted(PROFILES), default=None,
+                                help="Render profile (default: preview)")
+    preview_parser.add_argument("--subtitles", choices=SUBTITLE_BACKENDS + ('none',), default=None,
+                                help="Subtitles are drawn as overlays in previews; none turns them off")
+    preview_parser.add_argument("--subtitle-position", choices=('bottom', 'center'), default=None,
+                                help="Subtitle position (default: bottom)")
+    preview_parser.add_argument("--subtitle-size", choices=('small', 'big'), default=None,
+                                help="Subtitle size (default: big)")
+    preview_parser.add_argument("--compositor", choices=COMPOSITORS, default=None,
+                                help="How frames are drawn (default: native)")
+
+    run_parser = subparsers.add_parser("run", help="Transcribe, assign images and render in one go")
+    run_parser.add_argument("audio", nargs="?", help="Audio file")
+    run_parser.add_argument("-o", "--output", default=None, help="Video file to write")
+    run_parser.add_argument("--markers", default=None,
+                            help="Markers JSON to write (default: <audio>_markers.json)")
+    run_parser.add_argument("--images", default=None, help="CSV or JSON mapping of markers to images")
+    run_parser.add_argument("--skip-invalid", action="store_true", default=None,
+                            help="Skip invalid image assignments instead of stopping")
+    _add_transcribe_options(run_parser)
+    _add_render_options(run_parser)
+
+    submit_parser = subparsers.add_parser("submit", help="Queue a render job for a worker")
+    submit_parser.add_argument("markers", nargs="?", help="Markers JSON file")
+    submit_parser.add_argument("-o", "--output", default=None, help="Video file to write")
+    submit_parser.add_argument("--priority", type=int, default=None,
+                               help="Higher priorities run first (default: 0)")
+    submit_parser.add_argument("--attempts", type=int, default=None,
+                               help="Attempts before the job is marked failed (default: 3)")
+    _add_render_options(submit_parser)
+
+    status_parser = subparsers.add_parser("status", help="Show queued, running and finished jobs")
+    status_parser.add_argument("job_id", nargs="?", type=int, help="Show one job in detail")
+    status_parser.add_argument("--status", choices=STATUSES, default=None, help="Only list jobs with this status")
+    status_parser.add_argument("--json", action="store_true", default=None, help="Print jobs as JSON")
+
+    cancel_parser = subparsers.add_parser("cancel", help="Cancel a queued or running job")
+    cancel_parser.add_argument("job_id", type=int)
+
+    worker_parser = subparsers.add_parser("worker", help="Run queued jobs until stopped")
+    worker_parser.add_argument("--concurrency", type=int, default=None,
+                               help="Jobs rendered at the same time (default: 1)")
+    worker_parser.add_argument("--max-load", type=float, default=None,
+                               help="Start no new job while the load average per core is at or above this")
+    worker_parser.add_argument("--min-free-memory-mb", type=float, default=None,
+                               help="Start no new job while less memory than this is available")
+    worker_parser.add_argument("--job-memory-mb", type=float, default=None,
+                               help="Address space limit for each job")
+    worker_parser.add_argument("--nice", type=int, default=None, help="Niceness added to each job (default: 0)")
+    worker_parser.add_argument("--until-empty", action="store_true", default=None,
+                               help="Exit once the queue is empty instead of waiting for new jobs")
+
+    for name in ("submit", "status", "cancel", "worker"):
+        subparsers.choices[name].add_argument("--queue", default=None,
+                                              help="Queue database (default: $MEDIA_PIPELINE_QUEUE or "
+                                                   "~/.cache/media-pipeline/jobs.db)")
+
+    for subparser in subparsers.choices.values():
+        subparser.add_argument("--config", default=None, help="JSON file of option values")
+
+    return parser
+
+
+def resolve_options(args):
+    """Merge command line, config file and defaults, in that order of precedence"""
+    config = load_config(args.config) if args.config else {}
+    options = {}
+    for key, value in vars(args).items():
+        if value is None:
+            value = config.get(key, DEFAULTS.get(key))
+        options[key] = value
+    return options
+
+
+def _require(options, parser, *keys):
+    missing = [key for key in keys if not options.get(key)]
+    if missing:
+        parser.error(f"missing {', '.join(missing)} (pass on the command line or in --config)")
+
+
+def _render_options(options):
+    from media_pipeline.pipeline import subtitle_preferences
+
+    return {
+        "subtitles": subtitle_preferences(options["subtitles"], options["subtitle_position"],
+                                          options["subtitle_size"]),
+        "profile": options["profile"],
+        "workers": options["workers"],
+        "render_mode": options["render_mode"],
+        "compositor": options["compositor"],
+        "use_render_cache": not options["no_render_cache"],
+        "report": not options["no_report"],
+        "profiler": options["profiler"]
+    }
+
+
+def _inference_settings(options):
+    from vad import VadSettings
+
+    vad = None
+    if options["vad"]:
+        vad = VadSettings()._replace(**{field: options[f"vad_{field}"] for field in VadSettings._fields
+                                        if options[f"vad_{field}"] is not None})
+    return inference_settings(options["backend"], options["threads"], options["interop_threads"],
+                              options["batch_size"], vad)
+
+
+def _print_jobs(jobs):
+    for job in jobs:
+        created = time.strftime("%Y-%m-%d %H:%M", time.localtime(job['created']))
+        print(f"{job['id']:5d}  {job['status']:<10} p{job['priority']:<3} "
+              f"{job['attempts']}/{job['max_attempts']}  {created}  {job['output']}")
+
+
+def _print_job(job):
+    for key in ('id', 'status', 'priority', 'attempts', 'max_attempts', 'markers', 'output', 'log_file'):
+        print(f"{key}: {job[key]}")
+    for key in ('created', 'started', 'finished'):
+        if job[key]:
+            print(f"{key}: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(job[key]))}")
+    print(f"options: {json.dumps(job['options'])}")
+    if job['error']:
+        print(f"error:\n{job['error']}")
+
+
+def queue_command(command, options, parser):
+    """Run one of the job queue commands; returns the exit status"""
+    queue = JobQueue(options["queue"])
+
+    if command == "submit":
+        _require(options, parser, "markers", "output")
+        job_id = queue.submit(options["markers"], options["output"], _render_options(options),
+                              options["priority"], options["attempts"])
+        print(job_id)
+    elif command == "status":
+        if options["job_id"] is not None:
+            job = queue.get(options["job_id"])
+            if job is None:
+                print(f"Error: no job {options['job_id']}", file=sys.stderr)
+                return 1
+            if options["json"]:
+                print(json.dumps(job, indent=2))
+            else:
+                _print_job(job)
+        else:
+            jobs = queue.jobs(options["status"])
+            if options["json"]:
+                print(json.dumps(jobs, indent=2))
+            else:
+                _print_jobs(jobs)
+    elif command == "cancel":
+        status = queue.cancel(options["job_id"])
+        if status is None:
+            print(f"Error: no job {options['job_id']}", file=sys.stderr)
+            return 1
+        print(f"Job {options['job_id']}: {status}")
+    else:
+        from media_pipeline.worker import Worker
+
+        Worker(queue, options["concurrency"], options["max_load"], options["min_free_memory_mb"],
+               options["job_memory_mb"], options["nice"]).run(options["until_empty"])
+    return 0
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    try:
+        options = resolve_options(args)
+
+        if args.command in ("submit", "status", "cancel", "worker"):
+            return queue_command(args.command, options, parser)
+
+        from media_pipeline.pipeline import annotate, preview, render, run, subtitle_preferences, transcribe
+
+        if args.command == "transcribe":
+            _require(options, parser, "audio")
+            result = transcribe(options["audio"], options["markers"], options["model"], options["server"],
+                                not options["no_cache"], options["stream"], _inference_settings(options),
+                                not options["no_audio_artifact"])
+        elif args.command == "annotate":
+            _require(options, parser, "markers", "images")
+            annotate(options["markers"], options["images"], options["skip_invalid"], options["dry_run"])
+            result = options["markers"]
+        elif args.command == "preview":
+            _require(options, parser, "markers")
+            output = options["output"] or f"{os.path.splitext(options['markers'])[0]}_preview.mp4"
+            result = preview(options["markers"], output, options["start"] or 0, options["end"],
+                             options["marker"],
+                             subtitle_preferences(options["subtitles"], options["subtitle_position"],
+                                                  options["subtitle_size"]),
+                             options["profile"] or "preview", options["compositor"])
+        elif args.command == "render":
+            _require(options, parser, "markers", "output")
+            result = render(options["markers"], options["output"], **_render_options(options))
+        else:
+            _require(options, parser, "audio", "output")
+            result = run(options["audio"], options["output"], options["markers"], options["images"],
+                         options["skip_invalid"], options["model"], options["server"],
+                         not options["no_cache"], options["stream"], _inference_settings(options),
+                         not options["no_audio_artifact"], **_render_options(options))
+    except Exception as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        return 1
+
+    # The last line of output is the file produced, for schedulers that collect it
+    print(result)
+    return 0
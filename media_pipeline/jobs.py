@@ -0,0 +1,189 @@
+import json
+import os
+import sqlite3
+import time
+
+QUEUE_ENV = "MEDIA_PIPELINE_QUEUE"
+DEFAULT_QUEUE = os.path.join(os.path.expanduser("~"), ".cache", "media-pipeline", "jobs.db")
+
+# queued -> running -> done | failed | cancelled; a failed attempt goes back to
+# queued until max_attempts is used up, and cancelling a running job marks it
+# 'cancelling' until its worker stops it
+STATUSES = ('queued', 'running', 'cancelling', 'done', 'failed', 'cancelled')
+
+# Seconds to wait before retrying, multiplied by the number of attempts made
+RETRY_DELAY = 30
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    markers TEXT NOT NULL,
+    output TEXT NOT NULL,
+    options TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    not_before REAL NOT NULL DEFAULT 0,
+    worker_pid INTEGER,
+    error TEXT,
+    log_file TEXT,
+    created REAL NOT NULL,
+    started REAL,
+    finished REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_pending ON jobs (status, priority DESC, id);
+"""
+
+
+class JobQueue:
+    """Render jobs in a SQLite database that any number of processes can share"""
+
+    def __init__(self, path=None):
+        self.path = path or os.environ.get(QUEUE_ENV) or DEFAULT_QUEUE
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.log_dir = os.path.join(os.path.dirname(os.path.abspath(self.path)), "logs")
+        conn = self._connect()
+        try:
+            conn.executescript(_SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self):
+        # isolation_level=None: transactions are opened explicitly with BEGIN IMMEDIATE
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _execute(self, sql, params=()):
+        """Run one statement in its own connection and return any rows"""
+        conn = self._connect()
+        try:
+            return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+    def submit(self, markers, output, options=None, priority=0, max_attempts=3):
+        """Queue a render of markers to output; options are render() keyword arguments"""
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                "INSERT INTO jobs (markers, output, options, priority, max_attempts, created) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (os.path.abspath(markers), os.path.abspath(output), json.dumps(options or {}),
+                 priority, max_attempts, time.time()))
+            return cursor.lastrowid
+        finally:
+            conn.close()
+
+    def claim(self, worker_pid):
+        """Mark the highest priority runnable job as running and return it, or None"""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = 'queued' AND not_before <= ? "
+                "ORDER BY priority DESC, id LIMIT 1", (time.time(),)).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            log_file = os.path.join(self.log_dir, f"{row['id']}.log")
+            conn.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, worker_pid = ?, "
+                "started = ?, log_file = ?, error = NULL WHERE id = ?",
+                (worker_pid, time.time(), log_file, row['id']))
+            conn.execute("COMMIT")
+            return self.get(row['id'])
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def get(self, job_id):
+        rows = self._execute("SELECT * FROM jobs WHERE id = ?", (job_id,))
+        return _to_dict(rows[0]) if rows else None
+
+    def jobs(self, status=None):
+        """All jobs, or those with one status, in the order they would run"""
+        if status:
+            rows = self._execute("SELECT * FROM jobs WHERE status = ? ORDER BY priority DESC, id", (status,))
+        else:
+            rows = self._execute("SELECT * FROM jobs ORDER BY priority DESC, id")
+        return [_to_dict(row) for row in rows]
+
+    def finish(self, job_id):
+        self._execute("UPDATE jobs SET status = 'done', finished = ?, worker_pid = NULL WHERE id = ?",
+                      (time.time(), job_id))
+
+    def fail(self, job_id, error):
+        """Record a failed attempt, queueing a retry while attempts remain"""
+        job = self.get(job_id)
+        if job['attempts'] < job['max_attempts']:
+            self._execute(
+                "UPDATE jobs SET status = 'queued', error = ?, worker_pid = NULL, not_before = ? WHERE id = ?",
+                (error, time.time() + RETRY_DELAY * job['attempts'], job_id))
+            return 'queued'
+        self._execute("UPDATE jobs SET status = 'failed', error = ?, finished = ?, worker_pid = NULL WHERE id = ?",
+                      (error, time.time(), job_id))
+        return 'failed'
+
+    def cancel(self, job_id):
+        """Cancel a job; a running one is stopped by its worker. Returns the new status or None"""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            status = {'queued': 'cancelled', 'running': 'cancelling'}.get(row['status'], row['status'])
+            conn.execute("UPDATE jobs SET status = ? WHERE id = ?", (status, job_id))
+            if status == 'cancelled':
+                conn.execute("UPDATE jobs SET finished = ? WHERE id = ?", (time.time(), job_id))
+            conn.execute("COMMIT")
+            return status
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def mark_cancelled(self, job_id):
+        self._execute("UPDATE jobs SET status = 'cancelled', finished = ?, worker_pid = NULL WHERE id = ?",
+                      (time.time(), job_id))
+
+    def requeue(self, job_id):
+        """Put a job that was interrupted, not failed, back in the queue without using up an attempt"""
+        self._execute("UPDATE jobs SET status = 'queued', attempts = MAX(attempts - 1, 0), worker_pid = NULL "
+                      "WHERE id = ? AND status = 'running'", (job_id,))
+
+    def recover(self):
+        """Requeue running jobs whose worker process no longer exists, returning their ids"""
+        recovered = []
+        for job in self.jobs('running') + self.jobs('cancelling'):
+            if job['worker_pid'] and _pid_alive(job['worker_pid']):
+                continue
+            if job['status'] == 'cancelling':
+                self.mark_cancelled(job['id'])
+            else:
+                self.requeue(job['id'])
+                recovered.append(job['id'])
+        return recovered
+
+
+def _to_dict(row):
+    job = dict(row)
+    job['options'] = json.loads(job['options'])
+    return job
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
@@ -0,0 +1,121 @@
+from audio_artifact import load_samples, prepare_audio, recorded_artifact
+from batch_transcriber import output_path_for
+from bulk_assign import bulk_assign, load_mapping
+from json_processor import JsonProcessor
+from markers import build_markers, save_markers
+from streaming import write_streaming_markers
+from subtitle_handler import SubtitleHandler
+from transcriber import DEFAULT_MODEL
+from transcriber import transcribe as transcribe_audio
+from video_creator import VideoCreator
+
+
+def subtitle_preferences(backend='burn', position='bottom', size='big'):
+    """Subtitle preferences for VideoCreator; backend None or 'none' turns subtitles off"""
+    if backend in (None, 'none'):
+        return {'show_subtitles': False}
+    return SubtitleHandler().build_preferences(position, size, backend)
+
+
+def transcribe(audio_path, markers_file=None, model_name=DEFAULT_MODEL, server_url=None,
+               use_cache=True, stream=False, inference=None, audio_artifact=True):
+    """Transcribe audio into a markers JSON file and return its path
+
+    markers_file defaults to <audio stem>_markers.json next to the audio.
+    inference is an InferenceSettings choosing the local backend (default:
+    from the WHISPER_* environment variables). With audio_artifact, the audio
+    is decoded once into files next to the markers (see audio_artifact.py)
+    that transcription and later renders reuse; streaming decodes as it goes
+    and skips them.
+    """
+    markers_file = markers_file or output_path_for(audio_path)
+    if stream and (server_url or not use_cache):
+        raise ValueError("Streaming always transcribes locally without the cache; "
+                         "it cannot be combined with a server URL or with the cache turned off")
+
+    if stream:
+        write_streaming_markers(audio_path, markers_file, model_name, settings=inference)
+    else:
+        artifact = None
+        if audio_artifact:
+            artifact = prepare_audio(audio_path, markers_file, recorded_artifact(markers_file))
+        result = transcribe_audio(audio_path, model_name, server_url, use_cache=use_cache, settings=inference,
+                                  samples=(lambda: load_samples(artifact)) if artifact else None)
+        json_data = build_markers(result, audio_path)
+        if artifact:
+            json_data["metadata"]["audio_artifact"] = artifact
+        save_markers(json_data, markers_file)
+
+    print(f"Markers saved to {markers_file}")
+    return markers_file
+
+
+def annotate(markers_file, images, skip_invalid=False, dry_run=False):
+    """Assign images to markers from a mapping file (CSV/JSON) or a {marker: image path} dict
+
+    Returns the applied {marker: image path}. Raises ValueError listing the
+    invalid assignments unless skip_invalid is set.
+    """
+    assignments = load_mapping(images) if isinstance(images, str) else images
+    applied, errors = bulk_assign(markers_file, assignments, skip_invalid, dry_run)
+
+    if errors and not skip_invalid:
+        details = "; ".join(f"marker {marker}: {errors[marker]}" for marker in sorted(errors))
+        raise ValueError(f"{len(errors)} of {len(assignments)} assignments are invalid: {details}")
+    for marker in sorted(errors):
+        print(f"Skipped marker {marker}: {errors[marker]}")
+
+    print(f"Assigned images for {len(applied)} markers in {markers_file}")
+    return applied
+
+
+def render(markers_file, output_path, subtitles=None, profile=None, workers=None, render_mode='auto',
+           use_render_cache=True, report=True, profiler=None, compositor='native'):
+    """Render a markers JSON file to a video and return its path
+
+    subtitles is a preferences dict as made by subtitle_preferences; None
+    means the default burned-in bottom subtitles. A timing report is written
+    to <output>.render.json unless report is False.
+    """
+    data = JsonProcessor(markers_file).process()
+    if subtitles is None:
+        subtitles = subtitle_preferences()
+
+    creator = VideoCreator(data, subtitles, render_mode=render_mode, workers=workers,
+                           use_render_cache=use_render_cache, profile=profile, report=report,
+                           profiler=profiler, compositor=compositor)
+    creator.create_video(output_path)
+    return output_path
+
+
+def preview(markers, output_path, start=0, end=None, marker=None, subtitles=None, profile='preview',
+            compositor='native'):
+    """Render a low-resolution clip of part of the timeline and return its path
+
+    markers is a markers file or already loaded markers data, so an editor can
+    preview changes it has not saved yet. The window is [start, end) in
+    seconds, or the seconds of marker plus a second either side.
+    """
+    data = JsonProcessor(markers).process() if isinstance(markers, str) else markers
+    if subtitles is None:
+        subtitles = subtitle_preferences()
+
+    creator = VideoCreator(data, subtitles, render_mode='composite', use_render_cache=False, profile=profile,
+                           report=False, compositor=compositor)
+    if marker is not None:
+        start, end = creator.marker_window(marker)
+    return creator.create_preview(output_path, start, end)
+
+
+def run(audio_path, output_path, markers_file=None, images=None, skip_invalid=False,
+        model_name=DEFAULT_MODEL, server_url=None, use_cache=True, stream=False, inference=None,
+        audio_artifact=True, **render_options):
+    """Transcribe, assign images (when a mapping is given) and render in one call
+
+    render_options are passed on to render().
+    """
+    markers_file = transcribe(audio_path, markers_file, model_name, server_url, use_cache, stream, inference,
+                              audio_artifact)
+    if images:
+        annotate(markers_file, images, skip_invalid)
+    return render(markers_file, output_path, **render_options)
@@ -0,0 +1,175 @@
+import multiprocessing
+import os
+import signal
+import sys
+import time
+import traceback
+
+from media_pipeline.jobs import JobQueue
+from media_pipeline.pipeline import render
+
+
+def available_memory_mb():
+    """MemAvailable from /proc/meminfo, or None where it cannot be read"""
+    try:
+        with open("/proc/meminfo", 'r') as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def _tail(path, lines=5):
+    try:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            return "".join(f.readlines()[-lines:]).strip()
+    except OSError:
+        return ""
+
+
+def _run_job(job, nice, memory_limit_mb):
+    """Child process: render one job, with all of its output going to the job's log file"""
+    # Own process group, so cancelling also stops ffmpeg and chunk workers
+    os.setpgid(0, 0)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    os.makedirs(os.path.dirname(job['log_file']), exist_ok=True)
+    log = open(job['log_file'], 'a', encoding='utf-8')
+    os.dup2(log.fileno(), 1)
+    os.dup2(log.fileno(), 2)
+
+    if nice:
+        os.nice(nice)
+    if memory_limit_mb:
+        import resource
+        limit = int(memory_limit_mb * 1024 * 1024)
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+    print(f"--- attempt {job['attempts']} at {time.strftime('%Y-%m-%d %H:%M:%S')}", flush=True)
+    try:
+        render(job['markers'], job['output'], **job['options'])
+    except BaseException:
+        traceback.print_exc()
+        sys.stdout.flush()
+        os._exit(1)
+    sys.stdout.flush()
+    os._exit(0)
+
+
+class Worker:
+    """Runs queued render jobs in child processes, a bounded number at a time
+
+    A new job only starts while the load average per core is below max_load
+    and at least min_free_memory_mb of memory is available; each job can also
+    be niced and capped at job_memory_mb of address space.
+    """
+
+    def __init__(self, queue=None, concurrency=1, max_load=None, min_free_memory_mb=None,
+                 job_memory_mb=None, nice=0, poll_interval=2):
+        self.queue = queue or JobQueue()
+        self.concurrency = concurrency
+        self.max_load = max_load
+        self.min_free_memory_mb = min_free_memory_mb
+        self.job_memory_mb = job_memory_mb
+        self.nice = nice
+        self.poll_interval = poll_interval
+        self.running = {}
+        self.stopping = False
+
+    def _stop(self, signum, frame):
+        print("Stopping worker; interrupted jobs will be requeued")
+        self.stopping = True
+
+    def _has_capacity(self):
+        if len(self.running) >= self.concurrency:
+            return False
+        if self.max_load is not None and os.getloadavg()[0] / (os.cpu_count() or 1) >= self.max_load:
+            return False
+        if self.min_free_memory_mb is not None:
+            memory = available_memory_mb()
+            if memory is not None and memory < self.min_free_memory_mb:
+                return False
+        return True
+
+    def _start_jobs(self):
+        started = 0
+        while self._has_capacity():
+            job = self.queue.claim(os.getpid())
+            if job is None:
+                break
+            process = multiprocessing.Process(target=_run_job, args=(job, self.nice, self.job_memory_mb))
+            process.start()
+            self.running[job['id']] = process
+            print(f"Started job {job['id']} (attempt {job['attempts']}/{job['max_attempts']}): {job['output']}")
+            started += 1
+            # Give the load average and free memory a chance to reflect the new job
+            if self.max_load is not None or self.min_free_memory_mb is not None:
+                break
+        return started
+
+    def _signal(self, process, signum, fallback):
+        try:
+            os.killpg(process.pid, signum)
+        except ProcessLookupError:
+            # No such group: the job already exited, or has not called setpgid yet
+            fallback()
+
+    def _kill(self, process):
+        self._signal(process, signal.SIGTERM, process.terminate)
+        process.join(10)
+        if process.is_alive():
+            self._signal(process, signal.SIGKILL, process.kill)
+            process.join()
+
+    def _reap(self):
+        for job_id, process in list(self.running.items()):
+            if process.is_alive():
+                continue
+            process.join()
+            del self.running[job_id]
+            job = self.queue.get(job_id)
+
+            # A job that completed before its cancellation took effect keeps its output
+            if process.exitcode == 0:
+                self.queue.finish(job_id)
+                print(f"Job {job_id} done: {job['output']}")
+            elif job['status'] == 'cancelling':
+                self.queue.mark_cancelled(job_id)
+                print(f"Job {job_id} cancelled")
+            else:
+                error = _tail(job['log_file']) or f"exited with code {process.exitcode}"
+                status = self.queue.fail(job_id, error)
+                print(f"Job {job_id} failed ({'will retry' if status == 'queued' else 'giving up'}): "
+                      f"{error.splitlines()[-1] if error else ''}")
+
+    def _check_cancellations(self):
+        for job_id, process in list(self.running.items()):
+            if self.queue.get(job_id)['status'] == 'cancelling':
+                print(f"Cancelling job {job_id}...")
+                self._kill(process)
+
+    def run(self, until_empty=False):
+        """Process jobs until stopped by SIGTERM/SIGINT, or once the queue is empty if until_empty"""
+        for job_id in self.queue.recover():
+            print(f"Requeued job {job_id} left running by a worker that exited")
+
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        print(f"Worker {os.getpid()} processing {self.queue.path} with up to {self.concurrency} jobs")
+
+        while not self.stopping:
+            self._reap()
+            self._check_cancellations()
+            started = self._start_jobs()
+            if until_empty and not self.running and not started and not self.queue.jobs('queued'):
+                break
+            time.sleep(self.poll_interval)
+
+        # Interrupted jobs go back to the queue without using up an attempt
+        for job_id, process in list(self.running.items()):
+            self._kill(process)
+            self.queue.requeue(job_id)
+            del self.running[job_id]
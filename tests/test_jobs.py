@@ -0,0 +1,126 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from media_pipeline import jobs
+from media_pipeline.jobs import JobQueue
+
+
+def make_queue(tmp_path):
+    return JobQueue(str(tmp_path / "jobs.db"))
+
+
+def test_claim_takes_highest_priority_then_oldest(tmp_path):
+    queue = make_queue(tmp_path)
+    first = queue.submit("a.json", "a.mp4")
+    urgent = queue.submit("b.json", "b.mp4", priority=5)
+    second = queue.submit("c.json", "c.mp4", {"profile": "draft"})
+
+    claimed = [queue.claim(100)['id'] for _ in range(3)]
+    assert claimed == [urgent, first, second]
+    assert queue.claim(100) is None
+
+    job = queue.get(second)
+    assert job['status'] == 'running'
+    assert job['attempts'] == 1
+    assert job['worker_pid'] == 100
+    assert job['options'] == {"profile": "draft"}
+    assert job['markers'] == os.path.abspath("c.json")
+    assert job['log_file'].endswith(f"{second}.log")
+
+
+def test_finished_job_is_not_claimed_again(tmp_path):
+    queue = make_queue(tmp_path)
+    job_id = queue.submit("a.json", "a.mp4")
+    queue.claim(100)
+    queue.finish(job_id)
+
+    assert queue.get(job_id)['status'] == 'done'
+    assert queue.get(job_id)['worker_pid'] is None
+    assert queue.claim(100) is None
+
+
+def test_failed_attempt_waits_before_retry(tmp_path):
+    queue = make_queue(tmp_path)
+    job_id = queue.submit("a.json", "a.mp4")
+    queue.claim(100)
+
+    assert queue.fail(job_id, "encoder crashed") == 'queued'
+    assert queue.get(job_id)['error'] == "encoder crashed"
+    assert queue.claim(100) is None
+
+
+def test_retries_stop_after_max_attempts(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, "RETRY_DELAY", 0)
+    queue = make_queue(tmp_path)
+    job_id = queue.submit("a.json", "a.mp4", max_attempts=2)
+
+    assert queue.claim(100)['attempts'] == 1
+    assert queue.fail(job_id, "first") == 'queued'
+    job = queue.claim(100)
+    assert job['attempts'] == 2
+    assert job['error'] is None
+    assert queue.fail(job_id, "second") == 'failed'
+
+    job = queue.get(job_id)
+    assert job['status'] == 'failed'
+    assert job['error'] == "second"
+    assert job['finished'] is not None
+    assert queue.claim(100) is None
+
+
+def test_requeue_does_not_use_up_an_attempt(tmp_path):
+    queue = make_queue(tmp_path)
+    job_id = queue.submit("a.json", "a.mp4")
+    queue.claim(100)
+    queue.requeue(job_id)
+
+    assert queue.get(job_id)['status'] == 'queued'
+    assert queue.claim(100)['attempts'] == 1
+
+
+def test_cancel_queued_job(tmp_path):
+    queue = make_queue(tmp_path)
+    job_id = queue.submit("a.json", "a.mp4")
+
+    assert queue.cancel(job_id) == 'cancelled'
+    assert queue.claim(100) is None
+    assert queue.get(job_id)['finished'] is not None
+
+
+def test_cancel_running_job_waits_for_its_worker(tmp_path):
+    queue = make_queue(tmp_path)
+    job_id = queue.submit("a.json", "a.mp4")
+    queue.claim(100)
+
+    assert queue.cancel(job_id) == 'cancelling'
+    queue.mark_cancelled(job_id)
+    assert queue.get(job_id)['status'] == 'cancelled'
+
+
+def test_cancel_leaves_finished_and_unknown_jobs(tmp_path):
+    queue = make_queue(tmp_path)
+    job_id = queue.submit("a.json", "a.mp4")
+    queue.claim(100)
+    queue.finish(job_id)
+
+    assert queue.cancel(job_id) == 'done'
+    assert queue.cancel(job_id + 1) is None
+
+
+def test_recover_requeues_jobs_of_dead_workers(tmp_path):
+    queue = make_queue(tmp_path)
+    orphaned = queue.submit("a.json", "a.mp4")
+    stopping = queue.submit("b.json", "b.mp4")
+    alive = queue.submit("c.json", "c.mp4")
+    dead_pid = 2 ** 22 + 1
+    queue.claim(dead_pid)
+    queue.claim(dead_pid)
+    queue.claim(os.getpid())
+    queue.cancel(stopping)
+
+    assert queue.recover() == [orphaned]
+    assert queue.get(orphaned)['status'] == 'queued'
+    assert queue.get(stopping)['status'] == 'cancelled'
+    assert queue.get(alive)['status'] == 'running'
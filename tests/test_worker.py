@@ -0,0 +1,43 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from media_pipeline.jobs import JobQueue
+from media_pipeline.worker import Worker
+
+
+class ExitedProcess:
+    def __init__(self, exitcode):
+        self.exitcode = exitcode
+
+    def is_alive(self):
+        return False
+
+    def join(self, timeout=None):
+        pass
+
+
+def reap(tmp_path, exitcode, cancel):
+    queue = JobQueue(str(tmp_path / "jobs.db"))
+    job_id = queue.submit("a.json", "a.mp4")
+    queue.claim(os.getpid())
+    if cancel:
+        queue.cancel(job_id)
+    worker = Worker(queue)
+    worker.running[job_id] = ExitedProcess(exitcode)
+    worker._reap()
+    assert not worker.running
+    return queue.get(job_id)['status']
+
+
+def test_completed_job_is_done_even_if_cancelled_meanwhile(tmp_path):
+    assert reap(tmp_path, 0, cancel=True) == 'done'
+
+
+def test_killed_job_is_cancelled(tmp_path):
+    assert reap(tmp_path, -15, cancel=True) == 'cancelled'
+
+
+def test_failed_job_is_retried(tmp_path):
+    assert reap(tmp_path, 1, cancel=False) == 'queued'
@@ -0,0 +1,184 @@
+"""Frame compositor for composite renders: one preallocated canvas streamed to ffmpeg as raw video
+
+moviepy's CompositeVideoClip allocates new full-size arrays and blits every
+clip on each frame. Here the frame lives in a single buffer that only
+changes when what is on screen changes: a new image redraws the canvas, a
+new subtitle cue restores and blends just the cue's bounding box, and any
+other frame is the previous frame's bytes written again.
+"""
+import subprocess
+import time
+from bisect import bisect_right
+
+import numpy as np
+
+from ffmpeg_tools import ffmpeg_binary
+from render_profiles import encoder_args
+from slideshow import compose_on_canvas
+
+
+class IntervalIndex:
+    """Non-overlapping [start, end) intervals with a value each, looked up by time"""
+
+    def __init__(self, intervals):
+        intervals = sorted(intervals, key=lambda interval: interval[0])
+        self.starts = [start for start, end, value in intervals]
+        self.ends = [end for start, end, value in intervals]
+        self.values = [value for start, end, value in intervals]
+
+    def at(self, t):
+        """The value of the interval containing t, or None"""
+        i = bisect_right(self.starts, t) - 1
+        if i >= 0 and t < self.ends[i]:
+            return self.values[i]
+        return None
+
+
+class Overlay:
+    """An RGBA image cropped to its visible pixels and placed on the canvas
+
+    Colours are premultiplied by alpha once, so blending is one multiply-add
+    over the bounding box.
+    """
+
+    def __init__(self, rgba, position, canvas_size):
+        width, height = canvas_size
+        img_h, img_w = rgba.shape[:2]
+
+        # Placement as moviepy resolves it: 'center' or a pixel offset, truncated to ints
+        x, y = position
+        x = int((width - img_w) / 2) if x == 'center' else int(x)
+        y = int((height - img_h) / 2) if y == 'center' else int(y)
+
+        # Shrink to the pixels that show and the part that lies on the canvas
+        rows = np.flatnonzero(rgba[:, :, 3].any(axis=1))
+        cols = np.flatnonzero(rgba[:, :, 3].any(axis=0))
+        top, bottom = (rows[0], rows[-1] + 1) if len(rows) else (0, 0)
+        left, right = (cols[0], cols[-1] + 1) if len(cols) else (0, 0)
+        top, bottom = max(top, -y), min(bottom, height - y)
+        left, right = max(left, -x), min(right, width - x)
+        self.empty = bottom <= top or right <= left
+        if self.empty:
+            return
+
+        self.box = (slice(y + top, y + bottom), slice(x + left, x + right))
+        region = rgba[top:bottom, left:right].astype(np.float32)
+        alpha = region[:, :, 3:4] / 255.0
+        self.premultiplied = region[:, :, :3] * alpha
+        self.inverse = 1.0 - alpha
+
+    def blend(self, frame, base):
+        if not self.empty:
+            frame[self.box] = base[self.box] * self.inverse + self.premultiplied
+
+    def restore(self, frame, base):
+        if not self.empty:
+            frame[self.box] = base[self.box]
+
+
+class FrameCompositor:
+    """Frames of a timeline of image runs and subtitle cues, drawn into reused buffers
+
+    runs are (image_path, start, end) with images {path: scaled array}; cues
+    are subtitle_renderer Cues with cue_images {text: RGBA array} placed at
+    position. Counts of redrawn, blended and reused frames are kept.
+    """
+
+    def __init__(self, canvas_size, runs, images, cues=(), cue_images=None, position=('center', 'center')):
+        width, height = canvas_size
+        self.canvas_size = canvas_size
+        self.images = images
+        self.cue_images = cue_images or {}
+        self.position = position
+        self.image_index = IntervalIndex((start, end, image_path) for image_path, start, end in runs)
+        self.cue_index = IntervalIndex((cue.start, cue.end, cue.text) for cue in cues)
+        self.overlays = {}
+
+        # base holds the current image alone, frame the image with its subtitle
+        self.base = np.zeros((height, width, 3), dtype=np.uint8)
+        self.frame = np.zeros((height, width, 3), dtype=np.uint8)
+        self._image = None
+        self._cue = None
+        self.redrawn = 0
+        self.blended = 0
+        self.reused = 0
+
+    def _overlay(self, text):
+        overlay = self.overlays.get(text)
+        if overlay is None:
+            overlay = self.overlays[text] = Overlay(self.cue_images[text], self.position, self.canvas_size)
+        return overlay
+
+    def frame_at(self, t):
+        """The frame at time t; the returned array is overwritten by the next call"""
+        image = self.image_index.at(t)
+        cue = self.cue_index.at(t)
+
+        if image != self._image or self.redrawn == 0:
+            if image is None:
+                self.base.fill(0)
+            else:
+                compose_on_canvas(self.images[image], self.canvas_size, out=self.base)
+            self.frame[:] = self.base
+            if cue is not None:
+                self._overlay(cue).blend(self.frame, self.base)
+            self.redrawn += 1
+        elif cue != self._cue:
+            if self._cue is not None:
+                self._overlay(self._cue).restore(self.frame, self.base)
+            if cue is not None:
+                self._overlay(cue).blend(self.frame, self.base)
+            self.blended += 1
+        else:
+            self.reused += 1
+
+        self._image = image
+        self._cue = cue
+        return self.frame
+
+
+def encode_frames(compositor, duration, fps, path, encode_settings, video_filters=None):
+    """Pipe the compositor's frames for [0, duration) to ffmpeg as raw RGB; returns frame and time stats
+
+    Frames are taken at the same times as moviepy's writer, so chunks from
+    either compositor join the same way.
+    """
+    width, height = compositor.canvas_size
+    cmd = [ffmpeg_binary(), "-y", "-hide_banner", "-loglevel", "error",
+           "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}", "-r", str(fps), "-i", "-",
+           "-an"]
+    if video_filters:
+        # setpts drops the stream's frame rate; pin it so chunks keep the same timing
+        cmd += ["-vf", ",".join(video_filters), "-r", str(fps)]
+    cmd += encoder_args(encode_settings) + ["-pix_fmt", "yuv420p", path]
+
+    process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    frames = 0
+    compose_seconds = 0.0
+    start = time.perf_counter()
+    try:
+        for t in np.arange(0, duration, 1.0 / fps):
+            compose_start = time.perf_counter()
+            frame = compositor.frame_at(t)
+            compose_seconds += time.perf_counter() - compose_start
+            # The buffer is contiguous, so ffmpeg reads it without a copy
+            process.stdin.write(frame.data)
+            frames += 1
+    except BrokenPipeError:
+        # ffmpeg exited early; its error output says why
+        pass
+    finally:
+        process.stdin.close()
+        error = process.stderr.read().decode('utf-8', errors='replace').strip()
+        process.wait()
+    if process.returncode != 0:
+        raise RuntimeError(f"Encoding frames failed: {error}")
+
+    return {
+        "frames": frames,
+        "compose_seconds": compose_seconds,
+        "encode_seconds": time.perf_counter() - start - compose_seconds,
+        "frames_redrawn": compositor.redrawn,
+        "frames_blended": compositor.blended,
+        "frames_reused": compositor.reused
+    }
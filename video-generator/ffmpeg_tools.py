@@ -0,0 +1,73 @@
+import re
+import subprocess
+
+
+def ffmpeg_binary():
+    """The ffmpeg executable moviepy is configured to use"""
+    from moviepy.config import get_setting
+
+    return get_setting("FFMPEG_BINARY")
+
+
+def run_ffmpeg(args, description="ffmpeg"):
+    """Run ffmpeg with the given arguments, raising with its error output on failure"""
+    cmd = [ffmpeg_binary(), "-y", "-hide_banner", "-loglevel", "error"] + list(args)
+    result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        message = result.stderr.decode('utf-8', errors='replace').strip()
+        raise RuntimeError(f"{description} failed: {message}")
+
+
+def escape_filter_path(path):
+    """Quote a file path for use as a filter argument in an ffmpeg filtergraph
+
+    Inside single quotes everything is literal, so a quote in the path ends
+    the quoting, is escaped and reopens it. The filtergraph parser then
+    removes one level of quoting and escaping itself, so the quoted value
+    is escaped again for it.
+    """
+    quoted = "'" + path.replace("'", r"'\''") + "'"
+    return re.sub(r"([\\':,;\[\]])", r"\\\1", quoted)
+
+
+# Audio codecs an .mp4 container can hold as-is, so they can be stream copied
+MP4_AUDIO_CODECS = ('aac', 'mp3', 'alac')
+
+
+def audio_codec_args(audio_codec, audio_bitrate='192k', copy=True):
+    """Copy an mp4-compatible source track if allowed, otherwise encode it as AAC"""
+    if copy and audio_codec in MP4_AUDIO_CODECS:
+        return ["-c:a", "copy"]
+    return ["-c:a", "aac", "-b:a", audio_bitrate]
+
+
+def mux_audio_window(video_path, audio_path, start, length, output_path, audio_bitrate='64k'):
+    """Add [start, start + length) of an audio file to a silent video, seeking rather than decoding to start"""
+    run_ffmpeg([
+        "-i", video_path,
+        "-ss", f"{start:.3f}", "-t", f"{length:.3f}", "-i", audio_path,
+        "-map", "0:v:0", "-map", "1:a:0",
+        "-c:v", "copy",
+        "-c:a", "aac", "-b:a", audio_bitrate,
+        "-movflags", "+faststart",
+        output_path
+    ], "Adding audio")
+
+
+def probe_media(path):
+    """Read duration (seconds) and audio codec from ffmpeg's description of a file"""
+    cmd = [ffmpeg_binary(), "-hide_banner", "-i", path]
+    # ffmpeg exits non-zero without an output file; the description is on stderr
+    result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    info = result.stderr.decode('utf-8', errors='replace')
+
+    duration_match = re.search(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)", info)
+    if duration_match is None:
+        raise RuntimeError(f"Could not read media information from {path}")
+    hours, minutes, seconds = duration_match.groups()
+
+    audio_match = re.search(r"Stream #\S+.*?: Audio: (\w+)", info)
+    return {
+        "duration": int(hours) * 3600 + int(minutes) * 60 + float(seconds),
+        "audio_codec": audio_match.group(1) if audio_match else None
+    }
@@ -0,0 +1,180 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+CACHE_DIR_ENV = "VIDEO_IMAGE_CACHE_DIR"
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "video-generator", "images")
+DEFAULT_MAX_DISK_MB = 2048
+
+
+def load_scaled_image(image_path, target_height):
+    """Decode an image and scale it to target_height, keeping its aspect ratio"""
+    with Image.open(image_path) as img:
+        # Keep an alpha channel so ImageClip can build a mask from it
+        mode = 'RGBA' if img.mode in ('RGBA', 'LA') or 'transparency' in img.info else 'RGB'
+        img = img.convert(mode)
+
+        width, height = img.size
+        if height != target_height:
+            new_width = max(1, round(width * target_height / height))
+            img = img.resize((new_width, target_height), Image.LANCZOS)
+
+        return np.asarray(img)
+
+
+class PreloadedImages(Mapping):
+    """{path: array} view of preloaded images that fetches each one through the cache on access
+
+    The view holds no arrays itself, so the cache's memory bound still
+    applies while a render works through them; an evicted image comes back
+    from its .npy file.
+    """
+
+    def __init__(self, cache, keys):
+        self.cache = cache
+        self.keys = keys
+
+    def __getitem__(self, image_path):
+        return self.cache._load(self.keys[image_path], image_path)
+
+    def __iter__(self):
+        return iter(self.keys)
+
+    def __len__(self):
+        return len(self.keys)
+
+
+class ImageCache:
+    """Decoded, pre-scaled images kept in a bounded memory LRU backed by .npy files on disk
+
+    The .npy files are evicted least recently used first once they pass
+    max_disk_mb.
+    """
+
+    def __init__(self, target_height, max_memory_mb=512, cache_dir=None, workers=None,
+                 max_disk_mb=DEFAULT_MAX_DISK_MB):
+        self.target_height = target_height
+        self.max_memory = int(max_memory_mb * 1024 * 1024)
+        self.max_disk = int(max_disk_mb * 1024 * 1024)
+        self.cache_dir = cache_dir or os.environ.get(CACHE_DIR_ENV) or DEFAULT_CACHE_DIR
+        self.workers = workers or min(8, (os.cpu_count() or 1) + 2)
+
+        self._memory = OrderedDict()
+        self._memory_size = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _key(self, image_path):
+        stat = os.stat(image_path)
+        raw = f"{os.path.abspath(image_path)}|{stat.st_mtime_ns}|{stat.st_size}|{self.target_height}"
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def _remember(self, key, array):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return
+            self._memory[key] = array
+            self._memory_size += array.nbytes
+            # Evict least recently used images, always keeping the newest one
+            while self._memory_size > self.max_memory and len(self._memory) > 1:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_size -= evicted.nbytes
+
+    def _save_to_disk(self, key, array):
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".npy.tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, array)
+            os.replace(tmp_path, os.path.join(self.cache_dir, f"{key}.npy"))
+        except OSError:
+            # The disk cache is an optimisation; a failed write is not fatal
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def get(self, image_path):
+        """Return the scaled image as an array, decoding it at most once"""
+        return self._load(self._key(image_path), image_path)
+
+    def _load(self, key, image_path):
+        with self._lock:
+            array = self._memory.get(key)
+            if array is not None:
+                self._memory.move_to_end(key)
+                return array
+
+        disk_path = os.path.join(self.cache_dir, f"{key}.npy")
+        try:
+            array = np.load(disk_path)
+            # Touch the file so eviction treats it as recently used
+            os.utime(disk_path)
+        except (OSError, ValueError):
+            array = load_scaled_image(image_path, self.target_height)
+            self._save_to_disk(key, array)
+
+        self._remember(key, array)
+        return array
+
+    def preload(self, image_paths):
+        """Decode and scale every distinct image in a thread pool
+
+        Returns a {path: array} mapping (PreloadedImages); Pillow releases the
+        GIL while decoding and resizing, so the work spreads across cores.
+        The disk cache is pruned afterwards, keeping this batch's files.
+        """
+        unique_paths = list(dict.fromkeys(image_paths))
+        if not unique_paths:
+            return {}
+
+        keys = {image_path: self._key(image_path) for image_path in unique_paths}
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(unique_paths))) as pool:
+            list(pool.map(self._load, keys.values(), keys))
+        self.prune(keep=set(keys.values()))
+        return PreloadedImages(self, keys)
+
+    def entries(self):
+        """List the .npy files as dicts, most recently used first"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".npy"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append({"key": name[:-len(".npy")], "path": path,
+                            "size": stat.st_size, "last_used": stat.st_mtime})
+        entries.sort(key=lambda e: e["last_used"], reverse=True)
+        return entries
+
+    def prune(self, max_size=None, keep=()):
+        """Evict least recently used .npy files until they fit max_size bytes; keys in keep stay"""
+        max_size = self.max_disk if max_size is None else max_size
+        entries = self.entries()
+        total = sum(entry["size"] for entry in entries)
+        removed = []
+
+        for entry in reversed(entries):
+            if total <= max_size:
+                break
+            if entry["key"] in keep:
+                continue
+            try:
+                os.remove(entry["path"])
+            except FileNotFoundError:
+                pass
+            total -= entry["size"]
+            removed.append(entry)
+
+        return removed
+
+    def clear(self):
+        return self.prune(max_size=0)
@@ -1,14 +1,20 @@
 import json
 
+from segment_table import is_compact, read_compact
+
 class JsonProcessor:
     def __init__(self, json_path):
         self.json_path = json_path
     
     def process(self):
-        """Read and process the JSON file"""
+        """Read and process the markers file, JSON or compact"""
         try:
-            with open(self.json_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            if is_compact(self.json_path):
+                # Segments come back as a memory-mapped SegmentTable
+                data = read_compact(self.json_path)
+            else:
+                with open(self.json_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
             
             # Validate JSON structure
             self._validate_json(data)
@@ -9,6 +9,23 @@ def setup_result_directory():
         os.makedirs("Result")
         print("Created Result directory")
 
+def parse_window(window, video_creator):
+    """(start, end) in seconds from a marker number or a start-end range; raises ValueError if invalid"""
+    if '-' in window:
+        start, end = window.split('-', 1)
+        try:
+            start, end = float(start), float(end)
+        except ValueError:
+            raise ValueError("Please enter a range as start-end in seconds, e.g. 12-20")
+        if start < 0 or end <= start:
+            raise ValueError("The range must start at 0 or later and end after it starts")
+        return start, end
+    try:
+        marker = int(window)
+    except ValueError:
+        raise ValueError("Please enter a marker number or a start-end range")
+    return video_creator.marker_window(marker)
+
 def main():
     setup_result_directory()
     
@@ -33,6 +50,31 @@ def main():
     # Get subtitle preferences
     subtitle_prefs = subtitle_handler.get_preferences()
     
+    # Optionally render just part of the timeline as a quick low-resolution check
+    while True:
+        window = input("Preview a marker number or a start-end range in seconds "
+                       "(Enter for the full video): ").strip()
+        if not window:
+            break
+        video_creator = VideoCreator(data, subtitle_prefs, render_mode='composite', use_render_cache=False,
+                                     profile='preview', report=False)
+        try:
+            start, end = parse_window(window, video_creator)
+            preview_path = os.path.join("Result", f"{output_name}_preview.mp4")
+            video_creator.create_preview(preview_path, start, end)
+        except ValueError as e:
+            print(e)
+            continue
+        
+        while True:
+            render_full = input("Render the full video now? (y/n): ").lower().strip()
+            if render_full in ['y', 'n']:
+                break
+            print("Please enter 'y' or 'n'")
+        if render_full == 'n':
+            return
+        break
+    
     # Create video
     video_creator = VideoCreator(data, subtitle_prefs)
     video_creator.create_video(output_path)
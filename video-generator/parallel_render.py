@@ -0,0 +1,101 @@
+import os
+
+from ffmpeg_tools import audio_codec_args, run_ffmpeg
+
+RENDER_WORKERS_ENV = "VIDEO_RENDER_WORKERS"
+
+# Chunks shorter than this cost more in process start-up than they save
+MIN_CHUNK_SECONDS = 10
+
+
+def configured_workers(workers=None):
+    """Worker processes for composite renders: the argument, else $VIDEO_RENDER_WORKERS, else 1
+
+    "auto" leaves one core free for the joining and the caller.
+    """
+    workers = workers or os.environ.get(RENDER_WORKERS_ENV) or 1
+    if workers == 'auto':
+        return max(1, (os.cpu_count() or 1) - 1)
+    return max(1, int(workers))
+
+
+def _chunks_on_grid(runs, duration, target, count):
+    """Cut [0, duration) near each multiple of target, preferring image changes
+
+    A cut goes on an image change when one lies within a quarter chunk of the
+    ideal cut, otherwise on the nearest whole second. Whole-second cuts start
+    every chunk on a frame boundary, so the joined chunks keep the original
+    frame timing.
+    """
+    changes = sorted({second for _, start, end in runs for second in (start, end)
+                      if 0 < second < duration})
+
+    cuts = []
+    for i in range(1, count):
+        ideal = i * target
+        nearest = min(changes, key=lambda c: abs(c - ideal), default=None)
+        if nearest is not None and abs(nearest - ideal) <= target / 4:
+            cut = nearest
+        else:
+            cut = round(ideal)
+        if 0 < cut < duration and (not cuts or cut > cuts[-1]):
+            cuts.append(cut)
+
+    bounds = [0] + cuts + [duration]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def plan_chunks(runs, duration, workers, min_seconds=MIN_CHUNK_SECONDS):
+    """Split [0, duration) into at most `workers` chunks of similar length"""
+    count = max(1, min(workers, int(duration // min_seconds)))
+    return _chunks_on_grid(runs, duration, duration / count, count)
+
+
+def plan_grid_chunks(runs, duration, chunk_seconds):
+    """Split [0, duration) into chunks of about chunk_seconds on a fixed grid
+
+    Each cut depends only on the image changes near its grid point, so editing
+    one image leaves the other chunks, and their cached encodes, unchanged.
+    """
+    count = max(1, round(duration / chunk_seconds))
+    return _chunks_on_grid(runs, duration, chunk_seconds, count)
+
+
+def window_runs(runs, start, end):
+    """The image runs overlapping [start, end), clipped and shifted to start at 0"""
+    return [(image_path, max(run_start, start) - start, min(run_end, end) - start)
+            for image_path, run_start, run_end in runs
+            if run_start < end and run_end > start]
+
+
+def shift_filters(video_filters, offset):
+    """Run timeline-based filters (like subtitles) as if the chunk started at offset"""
+    if not video_filters or not offset:
+        return list(video_filters or [])
+    return [f"setpts=PTS+{offset}/TB"] + list(video_filters) + ["setpts=PTS-STARTPTS"]
+
+
+def chunk_paths(work_dir, chunks):
+    return [os.path.join(work_dir, f"chunk_{i:04d}.mp4") for i in range(len(chunks))]
+
+
+def join_chunks(paths, audio_path, audio_codec, output_path, duration, work_dir,
+                audio_bitrate='192k', copy_audio=True):
+    """Concatenate the encoded chunks without re-encoding and mux the audio once"""
+    list_path = os.path.join(work_dir, "chunks.ffconcat")
+    with open(list_path, 'w', encoding='utf-8') as f:
+        f.write("ffconcat version 1.0\n")
+        for path in paths:
+            quoted = "'" + os.path.abspath(path).replace("'", "'\\''") + "'"
+            f.write(f"file {quoted}\n")
+
+    run_ffmpeg([
+        "-f", "concat", "-safe", "0", "-i", list_path,
+        "-i", audio_path,
+        "-map", "0:v:0", "-map", "1:a:0",
+        "-c:v", "copy",
+        *audio_codec_args(audio_codec, audio_bitrate, copy_audio),
+        "-t", f"{duration:.3f}",
+        "-movflags", "+faststart",
+        output_path
+    ], "Joining chunks")
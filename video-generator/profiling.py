@@ -0,0 +1,153 @@
+import json
+import os
+import platform
+import sys
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+REPORT_VERSION = 2
+PROFILERS = ('cprofile', 'pyinstrument')
+
+
+def peak_rss_mb(who=None):
+    """Highest resident set size in MB reached so far by this process, or by its largest waited-for child"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF if who is None else who).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _cpu_seconds():
+    """CPU time of this process plus the child processes it has waited for"""
+    if resource is None:
+        return time.process_time()
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+class RenderProfile:
+    """Wall time, CPU time, peak memory and frame rate per pipeline stage, plus counters
+
+    CPU time includes child processes (chunk workers, ffmpeg) once they have
+    exited, so parallel stages can show more CPU than wall time. Memory is
+    the operating system's high-water mark at the end of each stage, not
+    what the stage itself used: process_peak_rss_mb covers this process
+    since it started, children_peak_rss_mb its largest child so far.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self._start_wall = time.perf_counter()
+        self.stages = []
+        self.counters = {}
+        self.profiler_output = None
+
+    @contextmanager
+    def stage(self, name):
+        """Time the enclosed block; the yielded dict takes extra fields such as frames"""
+        details = {}
+        wall = time.perf_counter()
+        cpu = _cpu_seconds()
+        try:
+            yield details
+        finally:
+            record = {
+                "name": name,
+                "wall_seconds": round(time.perf_counter() - wall, 4),
+                "cpu_seconds": round(_cpu_seconds() - cpu, 4)
+            }
+            if resource is not None:
+                record["process_peak_rss_mb"] = round(peak_rss_mb(resource.RUSAGE_SELF), 1)
+                record["children_peak_rss_mb"] = round(peak_rss_mb(resource.RUSAGE_CHILDREN), 1)
+            record.update(details)
+            if details.get("frames") and record["wall_seconds"] > 0:
+                record["fps"] = round(details["frames"] / record["wall_seconds"], 2)
+            self.stages.append(record)
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def report(self, **extra):
+        """The whole run as a JSON-serialisable dict"""
+        report = {
+            "version": REPORT_VERSION,
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+            "total_wall_seconds": round(time.perf_counter() - self._start_wall, 4),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "stages": self.stages,
+            "counters": self.counters
+        }
+        if self.profiler_output:
+            report["profiler_output"] = self.profiler_output
+        report.update(extra)
+        return report
+
+    def write(self, report_path, **extra):
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(**extra), f, indent=2)
+        return report_path
+
+    @contextmanager
+    def profiler(self, kind, output_base):
+        """Run the enclosed block under cProfile or pyinstrument, if kind is set
+
+        cProfile writes <output_base>.prof (open with pstats or snakeviz);
+        pyinstrument writes <output_base>.profile.html.
+        """
+        if kind is None:
+            yield
+            return
+        if kind not in PROFILERS:
+            raise ValueError(f"Unknown profiler '{kind}' (choose from {', '.join(PROFILERS)})")
+
+        if kind == 'cprofile':
+            import cProfile
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+                self.profiler_output = f"{output_base}.prof"
+                profiler.dump_stats(self.profiler_output)
+            return
+
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            raise ValueError("The pyinstrument profiler needs the pyinstrument package (pip install pyinstrument)")
+        profiler = Profiler()
+        profiler.start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+            self.profiler_output = f"{output_base}.profile.html"
+            with open(self.profiler_output, 'w', encoding='utf-8') as f:
+                f.write(profiler.output_html())
+
+
+class FrameTimer:
+    """Wraps a clip's get_frame to measure time spent compositing frames"""
+
+    def __init__(self, clip):
+        self.frames = 0
+        self.seconds = 0.0
+        self._get_frame = clip.get_frame
+        clip.get_frame = self
+
+    def __call__(self, t):
+        start = time.perf_counter()
+        frame = self._get_frame(t)
+        self.seconds += time.perf_counter() - start
+        self.frames += 1
+        return frame
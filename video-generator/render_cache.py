@@ -0,0 +1,156 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+CACHE_DIR_ENV = "VIDEO_RENDER_CACHE_DIR"
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "video-generator", "chunks")
+DEFAULT_MAX_SIZE_MB = 2048
+
+# Chunk length used when rendering through the cache. Cuts are placed on a
+# fixed grid so an edit only moves the chunks around it, not every later one.
+CACHE_CHUNK_SECONDS = 30
+
+# Bump when the way chunks are encoded changes, to invalidate old segments
+CHUNK_FORMAT_VERSION = 1
+
+
+def _file_signature(path):
+    stat = os.stat(path)
+    return [os.path.abspath(path), stat.st_mtime_ns, stat.st_size]
+
+
+def chunk_key(window, runs, cues, backend, subtitle_prefs, encode_settings, canvas_size):
+    """Hash of everything that decides what a chunk's frames look like
+
+    runs and cues are the ones inside the window, already shifted to start at
+    0, so identical content at a different position still hashes the same.
+    """
+    start, end = window
+    description = {
+        "version": CHUNK_FORMAT_VERSION,
+        "length": end - start,
+        "images": [_file_signature(path) + [run_start, run_end] for path, run_start, run_end in runs],
+        "cues": [list(cue) for cue in cues] if backend in ('overlay', 'burn') else [],
+        "subtitles": subtitle_prefs if backend in ('overlay', 'burn') else None,
+        "encode": encode_settings,
+        "canvas": list(canvas_size)
+    }
+    raw = json.dumps(description, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class RenderCache:
+    """Encoded timeline chunks on disk, keyed by chunk_key and evicted least recently used first"""
+
+    def __init__(self, cache_dir=None, max_size_mb=DEFAULT_MAX_SIZE_MB):
+        self.cache_dir = cache_dir or os.environ.get(CACHE_DIR_ENV) or DEFAULT_CACHE_DIR
+        self.max_size = int(max_size_mb * 1024 * 1024)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def path_for(self, key):
+        return os.path.join(self.cache_dir, f"{key}.mp4")
+
+    def get(self, key):
+        """Path of the cached chunk for key, or None"""
+        path = self.path_for(key)
+        if not os.path.exists(path):
+            return None
+        # Touch the entry so eviction treats it as recently used
+        os.utime(path)
+        return path
+
+    def put(self, key, rendered_path):
+        """Move a freshly encoded chunk into the cache and return its cached path"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".mp4.tmp")
+        os.close(fd)
+        try:
+            shutil.move(rendered_path, tmp_path)
+            os.replace(tmp_path, self.path_for(key))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return self.path_for(key)
+
+    def entries(self):
+        """List cached chunks as dicts, most recently used first"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".mp4"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append({"key": name[:-len(".mp4")], "path": path,
+                            "size": stat.st_size, "last_used": stat.st_mtime})
+        entries.sort(key=lambda e: e["last_used"], reverse=True)
+        return entries
+
+    def prune(self, max_size=None, keep=()):
+        """Evict least recently used chunks until the cache fits max_size bytes
+
+        Keys in keep are never evicted, so a render can prune without
+        deleting the chunks it is about to join.
+        """
+        max_size = self.max_size if max_size is None else max_size
+        entries = self.entries()
+        total = sum(entry["size"] for entry in entries)
+        removed = []
+
+        for entry in reversed(entries):
+            if total <= max_size:
+                break
+            if entry["key"] in keep:
+                continue
+            try:
+                os.remove(entry["path"])
+            except FileNotFoundError:
+                pass
+            total -= entry["size"]
+            removed.append(entry)
+
+        return removed
+
+    def clear(self):
+        return self.prune(max_size=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or prune the rendered chunk cache")
+    parser.add_argument("--cache-dir", default=None,
+                        help=f"Cache directory (default: ${CACHE_DIR_ENV} or {DEFAULT_CACHE_DIR})")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("info", help="Show cache location and size")
+    prune_parser = subparsers.add_parser("prune", help="Evict least recently used chunks")
+    prune_parser.add_argument("--max-size-mb", type=float, default=DEFAULT_MAX_SIZE_MB)
+    subparsers.add_parser("clear", help="Remove every cached chunk")
+    args = parser.parse_args()
+
+    cache = RenderCache(args.cache_dir)
+
+    if args.command == "info":
+        entries = cache.entries()
+        total = sum(entry["size"] for entry in entries)
+        print(f"Cache directory: {cache.cache_dir}")
+        print(f"Chunks: {len(entries)}")
+        print(f"Size: {total / (1024 * 1024):.1f} MB")
+    elif args.command == "prune":
+        removed = cache.prune(int(args.max_size_mb * 1024 * 1024))
+        print(f"Removed {len(removed)} chunks")
+    elif args.command == "clear":
+        removed = cache.clear()
+        print(f"Removed {len(removed)} chunks")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except OSError as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,81 @@
+import os
+
+PROFILE_ENV = "VIDEO_RENDER_PROFILE"
+DEFAULT_PROFILE = "standard"
+
+# How subtitles get into the video: moviepy overlay clips, drawn by ffmpeg's
+# subtitles filter during encoding, or muxed as a selectable text track
+SUBTITLE_BACKENDS = ('overlay', 'burn', 'soft')
+
+# 'auto' uses the ffmpeg slideshow path whenever no frame needs Python compositing
+RENDER_MODES = ('auto', 'composite', 'slideshow')
+
+# How composite renders draw frames: a reused canvas piped to ffmpeg as raw
+# video (see compositor.py), or moviepy's CompositeVideoClip
+COMPOSITORS = ('native', 'moviepy')
+
+# height: output frame height (width follows 16:9); copy_audio: stream copy an
+# mp4-compatible source track instead of re-encoding it as AAC at audio_bitrate;
+# threads: encoder threads, None lets x264 use every core
+PROFILES = {
+    # Quick previews: small frames, few of them, fastest encoder settings
+    'draft': {
+        'height': 480, 'fps': 12, 'codec': 'libx264', 'preset': 'ultrafast', 'crf': 30,
+        'threads': None, 'copy_audio': True, 'audio_bitrate': '96k'
+    },
+    # The historical output: 1080p at 24 fps, 192k AAC unless the source can be copied
+    'standard': {
+        'height': 1080, 'fps': 24, 'codec': 'libx264', 'preset': 'medium', 'crf': 23,
+        'threads': None, 'copy_audio': True, 'audio_bitrate': '192k'
+    },
+    # Proxies of part of the timeline, for checking an image or subtitle in seconds;
+    # the audio is cut to the window, so it is always encoded
+    'preview': {
+        'height': 360, 'fps': 10, 'codec': 'libx264', 'preset': 'ultrafast', 'crf': 32,
+        'threads': None, 'copy_audio': False, 'audio_bitrate': '64k'
+    },
+    # Final masters: slower, higher-quality encode, audio always normalised to AAC
+    'archive': {
+        'height': 1080, 'fps': 24, 'codec': 'libx264', 'preset': 'slow', 'crf': 18,
+        'threads': None, 'copy_audio': False, 'audio_bitrate': '320k'
+    }
+}
+
+
+def get_profile(name=None):
+    """Encode settings for a profile name, else $VIDEO_RENDER_PROFILE, else 'standard'"""
+    name = name or os.environ.get(PROFILE_ENV) or DEFAULT_PROFILE
+    if name not in PROFILES:
+        raise ValueError(f"Unknown render profile '{name}' (choose from {', '.join(PROFILES)})")
+    return dict(PROFILES[name], name=name)
+
+
+def video_size_for(profile):
+    """16:9 frame size at the profile's height, rounded to even numbers"""
+    height = profile['height']
+    width = round(height * 16 / 9)
+    return (width - width % 2, height - height % 2)
+
+
+def encoder_args(profile):
+    """ffmpeg output arguments for the profile's video encoder settings"""
+    args = ["-c:v", profile['codec'], "-preset", profile['preset'], "-crf", str(profile['crf'])]
+    if profile['threads']:
+        args += ["-threads", str(profile['threads'])]
+    return args
+
+
+def moviepy_write_args(profile):
+    """Keyword arguments for write_videofile matching the profile"""
+    return {
+        'fps': profile['fps'],
+        'codec': profile['codec'],
+        'preset': profile['preset'],
+        'threads': profile['threads'],
+        'ffmpeg_params': ["-crf", str(profile['crf'])]
+    }
+
+
+def add_profile_argument(parser):
+    parser.add_argument("--profile", choices=sorted(PROFILES), default=None,
+                        help=f"Render profile (default: ${PROFILE_ENV} or {DEFAULT_PROFILE})")
@@ -0,0 +1,265 @@
+"""Compact columnar markers format, and conversion to and from the markers JSON
+
+    python segment_table.py transcription_markers.json            # -> transcription_markers.markers
+    python segment_table.py transcription_markers.markers out.json
+
+The JSON keeps one dict per second under a string key, filler seconds
+included. The compact file keeps only the seconds with content, as parallel
+fixed-width columns sorted by second, with text and image paths stored once
+in a string table. It is read through a memory map, so opening it costs the
+same for a ten-minute and a ten-hour recording.
+
+Layout, all little-endian: magic, format version and header length; a JSON
+header with the metadata and the offset, dtype and length of every column;
+then the columns, each aligned to 8 bytes.
+"""
+import argparse
+import json
+import os
+import struct
+import tempfile
+from collections.abc import Mapping
+
+import numpy as np
+
+MAGIC = b"MRKC"
+FORMAT_VERSION = 1
+COMPACT_EXTENSION = ".markers"
+
+# One int32 per non-empty second; -1 marks a missing value. text and image
+# index the string table.
+COLUMNS = ("second", "start_ms", "end_ms", "marker", "text", "image")
+
+_PREAMBLE = struct.Struct("<4sII")
+_ALIGN = 8
+
+
+def _aligned(size):
+    return -(-size // _ALIGN) * _ALIGN
+
+
+def _or_missing(value):
+    return -1 if value is None else value
+
+
+def is_compact(path):
+    """Whether the file starts with the compact format's magic bytes"""
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+class StringTable:
+    """Distinct strings as one UTF-8 blob plus offsets, each decoded on first access"""
+
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+        self._decoded = {}
+
+    @classmethod
+    def build(cls, strings):
+        encoded = [string.encode('utf-8') for string in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype='<u8')
+        offsets[1:] = np.cumsum([len(value) for value in encoded])
+        return cls(np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        value = self._decoded.get(index)
+        if value is None:
+            value = self.blob[int(self.offsets[index]):int(self.offsets[index + 1])].tobytes().decode('utf-8')
+            self._decoded[index] = value
+        return value
+
+
+class SegmentTable(Mapping):
+    """The non-empty seconds of a markers file as sorted parallel columns
+
+    Reads like the JSON's segments dict ({"<second>": entry}, in time order,
+    without filler seconds), so existing readers keep working, while the
+    renderer uses the columns directly.
+    """
+
+    def __init__(self, columns, strings):
+        self.columns = columns
+        self.strings = strings
+        self.second = columns["second"]
+        self.start_ms = columns["start_ms"]
+        self.end_ms = columns["end_ms"]
+        self.marker = columns["marker"]
+        self.text = columns["text"]
+        self.image = columns["image"]
+
+    @classmethod
+    def from_segments(cls, segments):
+        """Build from a segments dict, keeping the seconds with text, a marker or an image
+
+        A table is returned unchanged.
+        """
+        if isinstance(segments, cls):
+            return segments
+
+        rows = sorted((int(second), entry) for second, entry in segments.items()
+                      if entry.get("text") or entry.get("marker") is not None or entry.get("image_path"))
+
+        index = {}
+        values = {name: [] for name in COLUMNS}
+        for second, entry in rows:
+            values["second"].append(second)
+            values["start_ms"].append(_or_missing(entry.get("start_ms")))
+            values["end_ms"].append(_or_missing(entry.get("end_ms")))
+            values["marker"].append(_or_missing(entry.get("marker")))
+            values["text"].append(index.setdefault(entry.get("text") or "", len(index)))
+            image_path = entry.get("image_path")
+            values["image"].append(-1 if image_path is None else index.setdefault(image_path, len(index)))
+
+        columns = {name: np.asarray(values[name], dtype='<i4') for name in COLUMNS}
+        return cls(columns, StringTable.build(index))
+
+    def texts(self):
+        """Text of every row, in time order"""
+        return [self.strings[index] for index in self.text.tolist()]
+
+    def marker_span(self, marker):
+        """(first second, last second + 1) of a marker's rows, or None when it has none"""
+        rows = np.flatnonzero(self.marker == marker)
+        if len(rows) == 0:
+            return None
+        return int(self.second[rows[0]]), int(self.second[rows[-1]]) + 1
+
+    def entry(self, row):
+        """One row as a markers JSON entry"""
+        second = int(self.second[row])
+        entry = {"timestamp": f"{second // 60:02d}:{second % 60:02d}",
+                 "text": self.strings[int(self.text[row])],
+                 "marker": None if self.marker[row] < 0 else int(self.marker[row])}
+        if self.start_ms[row] >= 0:
+            entry["start_ms"] = int(self.start_ms[row])
+            entry["end_ms"] = int(self.end_ms[row])
+        if self.image[row] >= 0:
+            entry["image_path"] = self.strings[int(self.image[row])]
+        return entry
+
+    def to_segments(self, total_duration=None):
+        """The dense JSON segments dict, with filler entries for the seconds without content"""
+        last = int(self.second[-1]) + 1 if len(self) else 0
+        length = max(last, int(total_duration or 0))
+        segments = {str(second): {"timestamp": f"{second // 60:02d}:{second % 60:02d}",
+                                  "text": "", "marker": None}
+                    for second in range(length)}
+        for row in range(len(self)):
+            segments[str(int(self.second[row]))] = self.entry(row)
+        return segments
+
+    def __getitem__(self, key):
+        second = int(key)
+        row = int(np.searchsorted(self.second, second))
+        if row == len(self) or self.second[row] != second:
+            raise KeyError(key)
+        return self.entry(row)
+
+    def __iter__(self):
+        return (str(second) for second in self.second.tolist())
+
+    def __len__(self):
+        return len(self.second)
+
+    def __getstate__(self):
+        # Memory-mapped columns are copied, so tables can go to worker processes
+        return {"columns": {name: np.array(column) for name, column in self.columns.items()},
+                "blob": np.array(self.strings.blob), "offsets": np.array(self.strings.offsets)}
+
+    def __setstate__(self, state):
+        self.__init__(state["columns"], StringTable(state["blob"], state["offsets"]))
+
+
+def write_compact(data, path):
+    """Write markers data (segments as a dict or a SegmentTable) in the compact format"""
+    table = SegmentTable.from_segments(data["segments"])
+    arrays = [(name, table.columns[name]) for name in COLUMNS]
+    arrays += [("string_offsets", table.strings.offsets), ("string_blob", table.strings.blob)]
+
+    layout = {}
+    offset = 0
+    for name, array in arrays:
+        layout[name] = {"dtype": array.dtype.str, "offset": offset, "length": len(array)}
+        offset += _aligned(array.nbytes)
+
+    header = json.dumps({"metadata": data["metadata"], "columns": layout}, ensure_ascii=False).encode('utf-8')
+    data_start = _aligned(_PREAMBLE.size + len(header))
+
+    # Write through a temp file plus rename so readers never see half a file
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".markers-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header)))
+            f.write(header)
+            for name, array in arrays:
+                f.seek(data_start + layout[name]["offset"])
+                f.write(array.tobytes())
+            f.truncate(data_start + offset)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return path
+
+
+def read_compact(path):
+    """Memory-map a compact markers file as {"metadata": ..., "segments": SegmentTable}"""
+    raw = np.memmap(path, dtype=np.uint8, mode='r')
+    if len(raw) < _PREAMBLE.size:
+        raise ValueError(f"{path} is too short to be a compact markers file")
+    magic, version, header_length = _PREAMBLE.unpack(raw[:_PREAMBLE.size].tobytes())
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a compact markers file")
+    if version > FORMAT_VERSION:
+        raise ValueError(f"{path} uses compact format version {version}; "
+                         f"this reader supports up to {FORMAT_VERSION}")
+
+    header = json.loads(raw[_PREAMBLE.size:_PREAMBLE.size + header_length].tobytes().decode('utf-8'))
+    data_start = _aligned(_PREAMBLE.size + header_length)
+
+    def column(name):
+        spec = header["columns"][name]
+        dtype = np.dtype(spec["dtype"])
+        start = data_start + spec["offset"]
+        return raw[start:start + spec["length"] * dtype.itemsize].view(dtype)
+
+    strings = StringTable(column("string_blob"), column("string_offsets"))
+    table = SegmentTable({name: column(name) for name in COLUMNS}, strings)
+    return {"metadata": header["metadata"], "segments": table}
+
+
+def to_json_data(data):
+    """Markers data with the segments expanded back into the JSON's dense dict"""
+    table = SegmentTable.from_segments(data["segments"])
+    return {"metadata": data["metadata"], "segments": table.to_segments(data["metadata"].get("total_duration"))}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a markers file between the JSON and compact formats")
+    parser.add_argument("input", help="Markers JSON or compact markers file; the format is detected")
+    parser.add_argument("output", nargs="?",
+                        help=f"File to write (default: the input with {COMPACT_EXTENSION} or .json)")
+    args = parser.parse_args()
+
+    stem = os.path.splitext(args.input)[0]
+    if is_compact(args.input):
+        output = args.output or f"{stem}.json"
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(to_json_data(read_compact(args.input)), f, indent=2, ensure_ascii=False)
+    else:
+        output = args.output or f"{stem}{COMPACT_EXTENSION}"
+        with open(args.input, 'r', encoding='utf-8') as f:
+            write_compact(json.load(f), output)
+
+    print(f"{args.input} ({os.path.getsize(args.input)} bytes) -> {output} ({os.path.getsize(output)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import os
+
+import numpy as np
+from PIL import Image
+
+from ffmpeg_tools import audio_codec_args, run_ffmpeg
+from render_profiles import encoder_args
+
+
+def canvas_size_for(images, runs, video_size):
+    """Frame size matching the composite path: the first image's scaled size
+
+    CompositeVideoClip takes its size from the first clip, so the same rule
+    keeps both render modes interchangeable. Dimensions are rounded down to
+    even numbers for yuv420p.
+    """
+    if not runs:
+        width, height = video_size
+    else:
+        height, width = images[runs[0][0]].shape[:2]
+    return (width - width % 2, height - height % 2)
+
+
+def compose_on_canvas(array, canvas_size, out=None):
+    """Centre a scaled image on a black canvas, cropping it if it is wider
+
+    out, a canvas-sized uint8 array, is drawn into instead of a new one.
+    """
+    width, height = canvas_size
+    if out is None:
+        canvas = np.zeros((height, width, 3), dtype=np.uint8)
+    else:
+        canvas = out
+        canvas.fill(0)
+
+    img_h, img_w = array.shape[:2]
+    # Source and destination windows of the centred image
+    src_x = max(0, (img_w - width) // 2)
+    src_y = max(0, (img_h - height) // 2)
+    dst_x = max(0, (width - img_w) // 2)
+    dst_y = max(0, (height - img_h) // 2)
+    w = min(width, img_w)
+    h = min(height, img_h)
+
+    region = array[src_y:src_y + h, src_x:src_x + w]
+    if region.shape[2] == 4:
+        # Blend transparent images over black, as the compositor would
+        alpha = region[:, :, 3:4].astype(np.float32) / 255.0
+        region = (region[:, :, :3] * alpha).astype(np.uint8)
+    canvas[dst_y:dst_y + h, dst_x:dst_x + w] = region[:, :, :3]
+    return canvas
+
+
+def write_slides(runs, images, canvas_size, work_dir):
+    """Write each distinct image once as a canvas-sized PNG, plus a black slide
+
+    Giving the concat demuxer identically sized, identically encoded inputs
+    avoids filter reconfiguration between slides.
+    """
+    slides = {}
+    for i, image_path in enumerate(dict.fromkeys(path for path, start, end in runs)):
+        slide_path = os.path.join(work_dir, f"slide_{i:05d}.png")
+        Image.fromarray(compose_on_canvas(images[image_path], canvas_size)).save(slide_path, compress_level=1)
+        slides[image_path] = slide_path
+
+    black_path = os.path.join(work_dir, "black.png")
+    Image.new("RGB", canvas_size).save(black_path)
+    return slides, black_path
+
+
+def slideshow_entries(runs, duration, slides, black_path):
+    """(slide file, seconds on screen) for the whole timeline, black where no image is set"""
+    entries = []
+    position = 0
+    for image_path, start, end in runs:
+        if start > position:
+            entries.append((black_path, start - position))
+        entries.append((slides[image_path], end - start))
+        position = end
+
+    if position < duration:
+        entries.append((black_path, duration - position))
+    return entries
+
+
+def write_concat_script(entries, script_path):
+    """Write an ffmpeg concat demuxer script with one entry per slide"""
+    def quote(path):
+        return "'" + os.path.abspath(path).replace("'", "'\\''") + "'"
+
+    with open(script_path, 'w', encoding='utf-8') as f:
+        f.write("ffconcat version 1.0\n")
+        for path, seconds in entries:
+            f.write(f"file {quote(path)}\nduration {seconds:.3f}\n")
+        # The demuxer ignores the last duration unless the file is listed again
+        if entries:
+            f.write(f"file {quote(entries[-1][0])}\n")
+
+
+def render_slideshow(script_path, audio_path, audio_codec, output_path, duration, profile,
+                     video_filters=None):
+    """Encode the slideshow and audio in one native ffmpeg pass with the profile's settings"""
+    filters = [f"fps={profile['fps']}", "format=yuv420p"] + list(video_filters or [])
+
+    video_args = encoder_args(profile)
+    if profile['codec'] == 'libx264':
+        video_args += ["-tune", "stillimage"]
+
+    run_ffmpeg([
+        "-f", "concat", "-safe", "0", "-i", script_path,
+        "-i", audio_path,
+        "-map", "0:v:0", "-map", "1:a:0",
+        "-vf", ",".join(filters),
+        *video_args,
+        *audio_codec_args(audio_codec, profile['audio_bitrate'], profile['copy_audio']),
+        "-t", f"{duration:.3f}",
+        "-movflags", "+faststart",
+        output_path
+    ], "Rendering slideshow")
@@ -0,0 +1,92 @@
+import os
+
+from ffmpeg_tools import escape_filter_path, run_ffmpeg
+from subtitle_renderer import build_cues
+
+
+def _srt_time(seconds):
+    ms = int(round(seconds * 1000))
+    hours, ms = divmod(ms, 3600000)
+    minutes, ms = divmod(ms, 60000)
+    secs, ms = divmod(ms, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d},{ms:03d}"
+
+
+def _ass_time(seconds):
+    cs = int(round(seconds * 100))
+    hours, cs = divmod(cs, 360000)
+    minutes, cs = divmod(cs, 6000)
+    secs, cs = divmod(cs, 100)
+    return f"{hours:d}:{minutes:02d}:{secs:02d}.{cs:02d}"
+
+
+def write_srt(cues, srt_path):
+    """Write cues as an SRT file"""
+    with open(srt_path, 'w', encoding='utf-8') as f:
+        for i, cue in enumerate(cues, start=1):
+            f.write(f"{i}\n{_srt_time(cue.start)} --> {_srt_time(cue.end)}\n{cue.text}\n\n")
+
+
+def write_ass(cues, ass_path, subtitle_prefs, video_size, font="Arial", stroke_width=2):
+    """Write cues as an ASS file styled from the subtitle preferences"""
+    fontsize = subtitle_prefs['fontsize']
+    if subtitle_prefs['position'] == 'bottom':
+        # The overlay renderer puts the top of the text `margin` pixels above the
+        # bottom edge; ASS measures to the bottom of the text instead
+        alignment = 2
+        margin_v = max(0, subtitle_prefs['margin'] - fontsize)
+    else:
+        alignment = 5
+        margin_v = 0
+
+    with open(ass_path, 'w', encoding='utf-8') as f:
+        f.write("[Script Info]\n")
+        f.write("ScriptType: v4.00+\n")
+        f.write(f"PlayResX: {video_size[0]}\n")
+        f.write(f"PlayResY: {video_size[1]}\n")
+        f.write("WrapStyle: 0\n\n")
+
+        f.write("[V4+ Styles]\n")
+        f.write("Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, "
+                "BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, "
+                "BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding\n")
+        f.write(f"Style: Default,{font},{fontsize},&H00FFFFFF,&H00FFFFFF,&H00000000,&H00000000,"
+                f"0,0,0,0,100,100,0,0,1,{stroke_width},0,{alignment},0,0,{margin_v},1\n\n")
+
+        f.write("[Events]\n")
+        f.write("Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text\n")
+        for cue in cues:
+            text = cue.text.replace("\n", "\\N").replace("{", "(").replace("}", ")")
+            f.write(f"Dialogue: 0,{_ass_time(cue.start)},{_ass_time(cue.end)},Default,,0,0,0,,{text}\n")
+
+
+def export_subtitles(data, subtitle_path, subtitle_prefs=None, video_size=(1920, 1080)):
+    """Export the markers JSON segments as .srt or .ass, chosen by extension"""
+    cues = build_cues(data["segments"])
+    if subtitle_path.lower().endswith('.ass'):
+        write_ass(cues, subtitle_path, subtitle_prefs, video_size)
+    else:
+        write_srt(cues, subtitle_path)
+    return cues
+
+
+def subtitles_filter(ass_path):
+    """Video filter that burns an ASS/SRT file into the frames"""
+    return f"subtitles={escape_filter_path(ass_path)}"
+
+
+def mux_soft_subtitles(video_path, srt_path, output_path):
+    """Add the subtitles as a selectable text track without re-encoding"""
+    run_ffmpeg([
+        "-i", video_path,
+        "-i", srt_path,
+        "-map", "0", "-map", "1",
+        "-c", "copy",
+        "-c:s", "mov_text",
+        "-metadata:s:s:0", "language=eng",
+        output_path
+    ], "Muxing subtitles")
+
+
+def sidecar_subtitle_path(output_path, extension):
+    return f"{os.path.splitext(output_path)[0]}{extension}"
@@ -33,9 +33,26 @@ class SubtitleHandler:
                 break
             print("Please enter 'small' or 'big'")
         
+        # Get rendering preference (overlay keeps the previous behaviour)
+        while True:
+            backend = input("How should subtitles be added? (overlay/burn/soft) [overlay]: ").lower().strip() or 'overlay'
+            if backend in ['overlay', 'burn', 'soft']:
+                break
+            print("Please enter 'overlay', 'burn' or 'soft'")
+        
+        return self.build_preferences(position, size, backend)
+    
+    def build_preferences(self, position='bottom', size='big', backend='overlay'):
+        """Subtitle preferences from explicit choices, without prompting"""
+        if position not in ('center', 'bottom'):
+            raise ValueError(f"Unknown subtitle position '{position}'")
+        if size not in self.FONT_SIZES:
+            raise ValueError(f"Unknown subtitle size '{size}'")
+        
         return {
             'show_subtitles': True,
             'fontsize': self.FONT_SIZES[size],
             'position': position,
-            'margin': 100 if position == 'bottom' else 0  # 100 pixels from bottom
+            'margin': 100 if position == 'bottom' else 0,  # 100 pixels from bottom
+            'backend': backend
         }
\ No newline at end of file
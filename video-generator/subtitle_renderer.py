@@ -0,0 +1,225 @@
+import os
+import threading
+from bisect import bisect_right
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from segment_table import SegmentTable
+
+Cue = namedtuple("Cue", ["start", "end", "text"])
+
+# Fonts tried when the requested one is not installed under that name
+FALLBACK_FONTS = ("DejaVuSans.ttf", "LiberationSans-Regular.ttf", "FreeSans.ttf")
+
+# Cues rendered inline below this count; a process pool only pays off for more
+POOL_THRESHOLD = 16
+
+SENTENCE_ENDINGS = ('.', '!', '?', '…')
+
+# Rendered cue images are reused across renders in a process (previews, the
+# worker); least recently used ones are evicted once they pass this size
+IMAGE_CACHE_MAX_MB = 64
+
+_image_cache = OrderedDict()
+_image_cache_size = 0
+_image_cache_lock = threading.Lock()
+
+
+def build_cues(segments, max_chars=60, max_duration=5):
+    """Merge the per-second segments (a dict or SegmentTable) into timed cues
+
+    Consecutive seconds with identical text become one longer cue, and a
+    sentence that continues into the next second is joined onto the same cue
+    until it ends, reaches max_chars or lasts max_duration seconds.
+    """
+    table = SegmentTable.from_segments(segments)
+    cues = []
+    for start, text in zip(table.second.tolist(), table.texts()):
+        text = text.strip()
+        if not text:
+            continue
+
+        if cues:
+            last = cues[-1]
+            contiguous = last.end == start
+            if contiguous and last.text == text:
+                cues[-1] = last._replace(end=start + 1)
+                continue
+
+            joined = f"{last.text} {text}"
+            if (contiguous
+                    and not last.text.endswith(SENTENCE_ENDINGS)
+                    and len(joined) <= max_chars
+                    and start + 1 - last.start <= max_duration):
+                cues[-1] = Cue(last.start, start + 1, joined)
+                continue
+
+        cues.append(Cue(start, start + 1, text))
+
+    return cues
+
+
+def window_cues(cues, start, end):
+    """The cues overlapping [start, end), clipped and shifted to start at 0"""
+    return [Cue(max(cue.start, start) - start, min(cue.end, end) - start, cue.text)
+            for cue in cues if cue.start < end and cue.end > start]
+
+
+@lru_cache(maxsize=None)
+def load_font(font, fontsize):
+    """Load a TrueType font by name or path, falling back to common system fonts"""
+    candidates = [font, f"{font}.ttf", f"{font.lower()}.ttf"] + list(FALLBACK_FONTS)
+    for candidate in candidates:
+        try:
+            return ImageFont.truetype(candidate, fontsize)
+        except OSError:
+            continue
+    return ImageFont.load_default()
+
+
+def _text_width(draw, text, font, stroke_width):
+    left, top, right, bottom = draw.textbbox((0, 0), text, font=font, stroke_width=stroke_width)
+    return right - left
+
+
+def _wrap(draw, text, font, stroke_width, max_width):
+    """Greedy word wrap to max_width pixels, like TextClip's caption method"""
+    lines = []
+    current = ""
+    for word in text.split():
+        candidate = f"{current} {word}" if current else word
+        if current and _text_width(draw, candidate, font, stroke_width) > max_width:
+            lines.append(current)
+            current = word
+        else:
+            current = candidate
+    if current:
+        lines.append(current)
+    return lines
+
+
+def render_cue_image(text, font="Arial", fontsize=70, stroke_width=2, width=1920,
+                     color="white", stroke_color="black"):
+    """Rasterize one cue to an RGBA array, centred on a canvas of the given width"""
+    pil_font = load_font(font, fontsize)
+    measure = ImageDraw.Draw(Image.new("RGBA", (1, 1)))
+    lines = _wrap(measure, text, pil_font, stroke_width, width - 2 * stroke_width)
+
+    ascent, descent = pil_font.getmetrics()
+    line_height = ascent + descent + 2 * stroke_width
+    height = max(1, line_height * len(lines))
+
+    img = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(img)
+    for i, line in enumerate(lines):
+        x = (width - _text_width(draw, line, pil_font, stroke_width)) / 2
+        draw.text((x, i * line_height + stroke_width), line, font=pil_font, fill=color,
+                  stroke_width=stroke_width, stroke_fill=stroke_color)
+
+    return np.asarray(img)
+
+
+def _render_cue_job(job):
+    return render_cue_image(*job)
+
+
+def _remember_image(key, image):
+    """Add a rendered image to the cache and evict past IMAGE_CACHE_MAX_MB; call with the lock held"""
+    global _image_cache_size
+    if key in _image_cache:
+        _image_cache.move_to_end(key)
+        return
+    _image_cache[key] = image
+    _image_cache_size += image.nbytes
+    # Always keep the newest image
+    while _image_cache_size > IMAGE_CACHE_MAX_MB * 1024 * 1024 and len(_image_cache) > 1:
+        _, evicted = _image_cache.popitem(last=False)
+        _image_cache_size -= evicted.nbytes
+
+
+def render_cue_images(texts, font, fontsize, stroke_width, width, workers=None):
+    """Rasterize each distinct text once, reusing earlier renders with the same style"""
+    keys = {text: (text, font, fontsize, stroke_width, width) for text in dict.fromkeys(texts)}
+
+    images = {}
+    with _image_cache_lock:
+        for text, key in keys.items():
+            image = _image_cache.get(key)
+            if image is not None:
+                _image_cache.move_to_end(key)
+                images[text] = image
+    missing = [key for text, key in keys.items() if text not in images]
+
+    if len(missing) >= POOL_THRESHOLD:
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            rendered = list(pool.map(_render_cue_job, missing, chunksize=8))
+    else:
+        rendered = [_render_cue_job(job) for job in missing]
+
+    # The returned images stay valid however many of them the cache evicts
+    with _image_cache_lock:
+        for key, image in zip(missing, rendered):
+            _remember_image(key, image)
+            images[key[0]] = image
+    return {text: images[text] for text in keys}
+
+
+class SubtitleTrack:
+    """All cues as one clip whose frame is looked up by time
+
+    Cue start times are kept sorted, so finding the active cue is a binary
+    search and each frame costs the same however many cues the video has.
+    """
+
+    def __init__(self, cues, images):
+        self.cues = cues
+        self.starts = [cue.start for cue in cues]
+        self.rgb = {text: np.ascontiguousarray(image[:, :, :3]) for text, image in images.items()}
+        self.alpha = {text: image[:, :, 3] / 255.0 for text, image in images.items()}
+        self._empty_rgb = np.zeros((1, 1, 3), dtype=np.uint8)
+        self._empty_alpha = np.zeros((1, 1))
+
+    def cue_at(self, t):
+        i = bisect_right(self.starts, t) - 1
+        if i >= 0 and t < self.cues[i].end:
+            return self.cues[i]
+        return None
+
+    def make_frame(self, t):
+        cue = self.cue_at(t)
+        return self.rgb[cue.text] if cue else self._empty_rgb
+
+    def make_mask_frame(self, t):
+        cue = self.cue_at(t)
+        return self.alpha[cue.text] if cue else self._empty_alpha
+
+    def to_clip(self, position):
+        from moviepy.video.VideoClip import VideoClip
+
+        duration = self.cues[-1].end if self.cues else 0
+        mask = VideoClip(self.make_mask_frame, ismask=True, duration=duration)
+        return (VideoClip(self.make_frame, duration=duration)
+                .set_mask(mask)
+                .set_position(position))
+
+
+def create_subtitle_track(segments, fontsize, position, font="Arial", stroke_width=2,
+                          width=1920, max_chars=60, max_duration=5, window=None):
+    """Build cues from the segments and return them as a single overlay clip
+
+    With window=(start, end) only that part of the timeline is built, shifted
+    to start at 0.
+    """
+    cues = build_cues(segments, max_chars, max_duration)
+    if window is not None:
+        cues = window_cues(cues, *window)
+    if not cues:
+        return None, cues
+
+    images = render_cue_images([cue.text for cue in cues], font, fontsize, stroke_width, width)
+    return SubtitleTrack(cues, images).to_clip(position), cues
@@ -0,0 +1,68 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from compositor import FrameCompositor, IntervalIndex, Overlay
+from subtitle_renderer import Cue
+
+
+def rgba(height, width, color, alpha):
+    image = np.zeros((height, width, 4), dtype=np.uint8)
+    image[:, :, :3] = color
+    image[:, :, 3] = alpha
+    return image
+
+
+def test_interval_index_looks_up_by_time():
+    index = IntervalIndex([(5, 8, "b"), (0, 2, "a")])
+    assert [index.at(t) for t in (-1, 0, 1.99, 2, 4, 5, 7.9, 8)] == [None, "a", "a", None, None, "b", "b", None]
+    assert IntervalIndex([]).at(0) is None
+
+
+def test_overlay_blends_premultiplied_colour():
+    image = rgba(2, 2, (200, 100, 0), 0)
+    image[1, 1, 3] = 255
+    image[0, 1, 3] = 51
+    overlay = Overlay(image, (1, 1), (4, 4))
+    # Cropped to the columns and rows with visible pixels
+    assert overlay.box == (slice(1, 3), slice(2, 3))
+
+    base = np.full((4, 4, 3), 50, dtype=np.uint8)
+    frame = base.copy()
+    overlay.blend(frame, base)
+    assert frame[2, 2].tolist() == [200, 100, 0]
+    # 20% of the colour over 80% of the base
+    assert frame[1, 2].tolist() == [80, 60, 40]
+    assert (frame[:, :2] == 50).all() and (frame[:, 3] == 50).all()
+
+    overlay.restore(frame, base)
+    assert (frame == base).all()
+
+
+def test_overlay_is_centred_and_clipped_to_the_canvas():
+    overlay = Overlay(rgba(2, 6, 255, 255), ('center', 'center'), (4, 4))
+    assert overlay.box == (slice(1, 3), slice(0, 4))
+    assert Overlay(rgba(2, 2, 255, 255), (5, 0), (4, 4)).empty
+    assert Overlay(rgba(2, 2, 255, 0), (0, 0), (4, 4)).empty
+
+
+def test_frames_are_redrawn_blended_or_reused():
+    images = {"red.png": np.full((4, 4, 3), (255, 0, 0), dtype=np.uint8),
+              "blue.png": np.full((4, 4, 3), (0, 0, 255), dtype=np.uint8)}
+    cue_images = {"hi": rgba(1, 4, 255, 255)}
+    compositor = FrameCompositor((4, 4), [("red.png", 0, 2), ("blue.png", 2, 4)], images,
+                                 [Cue(1, 3, "hi")], cue_images, position=('center', 3))
+
+    frames = [compositor.frame_at(t).copy() for t in (0, 0.5, 1, 1.5, 2, 3, 4)]
+    assert (frames[0] == (255, 0, 0)).all()
+    assert frames[1].tolist() == frames[0].tolist()
+    assert (frames[2][3] == 255).all() and (frames[2][:3] == (255, 0, 0)).all()
+    # The new image is drawn with the cue still on it
+    assert (frames[4][3] == 255).all() and (frames[4][:3] == (0, 0, 255)).all()
+    assert (frames[5] == (0, 0, 255)).all()
+    # Past the last image the canvas is black
+    assert (frames[6] == 0).all()
+    assert (compositor.redrawn, compositor.blended, compositor.reused) == (3, 2, 2)
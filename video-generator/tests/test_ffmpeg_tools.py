@@ -0,0 +1,33 @@
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from ffmpeg_tools import escape_filter_path
+
+AWKWARD_NAME = "it's [one], two; x:y\\z.srt"
+
+
+def test_plain_path_is_quoted():
+    assert escape_filter_path("/tmp/talk.srt") == r"\'/tmp/talk.srt\'"
+
+
+def test_quotes_and_colons_are_escaped():
+    assert escape_filter_path("C:/it's.srt") == r"\'C\:/it\'\\\'\'s.srt\'"
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg is not installed")
+def test_ffmpeg_opens_the_escaped_path(tmp_path):
+    path = tmp_path / AWKWARD_NAME
+    path.write_text("1\n00:00:00,000 --> 00:00:01,000\nHi\n", encoding="utf-8")
+    result = subprocess.run(
+        ["ffmpeg", "-hide_banner", "-loglevel", "error", "-f", "lavfi", "-i", "color=s=64x64:d=1",
+         "-vf", f"subtitles={escape_filter_path(str(path))}", "-f", "null", "-"],
+        capture_output=True, text=True)
+    if "No such filter: 'subtitles'" in result.stderr:
+        pytest.skip("ffmpeg is built without libass")
+    assert result.returncode == 0, result.stderr
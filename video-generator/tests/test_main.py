@@ -0,0 +1,31 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from main import parse_window
+
+
+class Creator:
+    def marker_window(self, marker):
+        if marker != 2:
+            raise ValueError(f"No entries found for marker {marker}")
+        return 9, 14
+
+
+def test_ranges_and_markers_are_parsed():
+    assert parse_window("12-20.5", Creator()) == (12.0, 20.5)
+    assert parse_window("2", Creator()) == (9, 14)
+
+
+@pytest.mark.parametrize("window", ["abc", "12-", "-5", "1.5", "20-12", "3-3", "x-4"])
+def test_invalid_windows_are_rejected(window):
+    with pytest.raises(ValueError):
+        parse_window(window, Creator())
+
+
+def test_unknown_marker_is_rejected():
+    with pytest.raises(ValueError, match="marker 7"):
+        parse_window("7", Creator())
@@ -0,0 +1,72 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import parallel_render
+from parallel_render import (chunk_paths, configured_workers, join_chunks, plan_chunks, plan_grid_chunks,
+                             shift_filters, window_runs)
+
+RUNS = [("a.png", 0, 23), ("b.png", 23, 61), ("c.png", 61, 100)]
+
+
+def test_chunks_cut_on_nearby_image_changes():
+    # Ideal cuts at 25, 50 and 75: 23 is close enough to move the first one
+    assert plan_chunks(RUNS, 100, 4) == [(0, 23), (23, 50), (50, 75), (75, 100)]
+
+
+def test_chunks_without_nearby_changes_cut_on_whole_seconds():
+    assert plan_chunks([("a.png", 0, 100)], 100, 3) == [(0, 33), (33, 67), (67, 100)]
+
+
+def test_short_timelines_use_fewer_chunks():
+    assert plan_chunks(RUNS, 25, 8) == [(0, 12), (12, 25)]
+    assert plan_chunks(RUNS, 9, 8) == [(0, 9)]
+
+
+def test_grid_chunks_only_move_near_their_grid_point():
+    chunks = plan_grid_chunks(RUNS, 100, 20)
+    assert chunks == [(0, 23), (23, 40), (40, 61), (61, 80), (80, 100)]
+    # Changing the last image leaves the earlier cuts where they were
+    edited = RUNS[:2] + [("c.png", 61, 90), ("d.png", 90, 100)]
+    assert plan_grid_chunks(edited, 100, 20)[:3] == chunks[:3]
+
+
+def test_window_runs_clip_and_shift():
+    assert window_runs(RUNS, 20, 30) == [("a.png", 0, 3), ("b.png", 3, 10)]
+
+
+def test_shift_filters():
+    assert shift_filters(["subtitles=x"], 0) == ["subtitles=x"]
+    assert shift_filters(None, 5) == []
+    assert shift_filters(["subtitles=x"], 12) == ["setpts=PTS+12/TB", "subtitles=x", "setpts=PTS-STARTPTS"]
+
+
+def test_configured_workers(monkeypatch):
+    monkeypatch.delenv(parallel_render.RENDER_WORKERS_ENV, raising=False)
+    assert configured_workers() == 1
+    assert configured_workers("3") == 3
+    monkeypatch.setenv(parallel_render.RENDER_WORKERS_ENV, "0")
+    assert configured_workers() == 1
+    monkeypatch.setattr(os, "cpu_count", lambda: 8)
+    assert configured_workers("auto") == 7
+
+
+def test_join_writes_a_concat_list_and_copies_the_video(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(parallel_render, "run_ffmpeg", lambda args, description: calls.append(args))
+    work_dir = tmp_path / "it's"
+    work_dir.mkdir()
+    paths = chunk_paths(str(work_dir), [(0, 10), (10, 20)])
+
+    join_chunks(paths, "talk.mp3", "mp3", "out.mp4", 19.5, str(work_dir))
+
+    with open(work_dir / "chunks.ffconcat", encoding="utf-8") as f:
+        assert f.read() == ("ffconcat version 1.0\n"
+                            f"file '{tmp_path}/it'\\''s/chunk_0000.mp4'\n"
+                            f"file '{tmp_path}/it'\\''s/chunk_0001.mp4'\n")
+    args = calls[0]
+    assert args[args.index("-c:v") + 1] == "copy"
+    assert args[args.index("-c:a") + 1] == "copy"
+    assert args[args.index("-t") + 1] == "19.500"
+    assert args[-1] == "out.mp4"
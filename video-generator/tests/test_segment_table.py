@@ -0,0 +1,123 @@
+import json
+import os
+import pickle
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import segment_table
+from segment_table import SegmentTable, is_compact, read_compact, to_json_data, write_compact
+
+
+def filler(second):
+    return {"timestamp": f"{second // 60:02d}:{second % 60:02d}", "text": "", "marker": None}
+
+
+def sample_data():
+    segments = {str(second): filler(second) for second in range(64)}
+    segments["0"] = {"timestamp": "00:00", "text": "Grüße aus Köln", "marker": 1,
+                     "start_ms": 120, "end_ms": 980, "image_path": "images/köln.png"}
+    segments["1"] = {"timestamp": "00:01", "text": "東京の夜", "marker": 1, "start_ms": 1000, "end_ms": 1900}
+    # An image with no speech, and a marker whose words have no timestamps
+    segments["5"] = dict(filler(5), image_path="images/köln.png")
+    segments["61"] = {"timestamp": "01:01", "text": "emoji 🎬 end", "marker": 2}
+    return {"metadata": {"audio_file": "talk.mp3", "total_duration": 64,
+                         "processed_date": "2024-01-01 00:00:00", "timestamp_precision": "ms"},
+            "segments": segments}
+
+
+def round_trip(data, tmp_path):
+    path = str(tmp_path / "talk.markers")
+    write_compact(data, path)
+    return read_compact(path)
+
+
+def test_round_trip_restores_the_json(tmp_path):
+    data = sample_data()
+    loaded = round_trip(data, tmp_path)
+    assert loaded["metadata"] == data["metadata"]
+    assert to_json_data(loaded) == data
+    # The JSON written back out is the same document
+    assert json.dumps(to_json_data(loaded), ensure_ascii=False) == json.dumps(data, ensure_ascii=False)
+
+
+def test_only_seconds_with_content_are_stored(tmp_path):
+    table = round_trip(sample_data(), tmp_path)["segments"]
+    assert list(table) == ["0", "1", "5", "61"]
+    assert table["5"] == dict(filler(5), image_path="images/köln.png")
+    # Repeated strings are stored once
+    assert len(table.strings) == 5
+
+
+def test_empty_table_round_trips(tmp_path):
+    data = {"metadata": {"audio_file": "silence.mp3", "total_duration": 3}, "segments": {}}
+    loaded = round_trip(data, tmp_path)
+    assert len(loaded["segments"]) == 0
+    assert loaded["segments"].marker_span(1) is None
+    assert to_json_data(loaded)["segments"] == {str(second): filler(second) for second in range(3)}
+
+
+def test_compact_files_are_detected(tmp_path):
+    path = str(tmp_path / "talk.markers")
+    write_compact(sample_data(), path)
+    json_path = str(tmp_path / "talk.json")
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(sample_data(), f)
+    assert is_compact(path)
+    assert not is_compact(json_path)
+
+
+def test_newer_format_version_is_rejected(tmp_path, monkeypatch):
+    path = str(tmp_path / "talk.markers")
+    monkeypatch.setattr(segment_table, "FORMAT_VERSION", segment_table.FORMAT_VERSION + 1)
+    write_compact(sample_data(), path)
+    monkeypatch.undo()
+
+    with pytest.raises(ValueError, match="version"):
+        read_compact(path)
+
+
+def test_other_files_are_rejected(tmp_path):
+    path = str(tmp_path / "talk.markers")
+    with open(path, 'wb') as f:
+        f.write(b"not a markers file at all")
+    with pytest.raises(ValueError, match="not a compact markers file"):
+        read_compact(path)
+
+    with open(path, 'wb') as f:
+        f.write(b"MR")
+    with pytest.raises(ValueError, match="too short"):
+        read_compact(path)
+
+
+def test_lookups_by_second(tmp_path):
+    table = round_trip(sample_data(), tmp_path)["segments"]
+    assert table["1"]["text"] == "東京の夜"
+    assert table[61] == {"timestamp": "01:01", "text": "emoji 🎬 end", "marker": 2}
+    assert "2" not in table
+    with pytest.raises(KeyError):
+        table["64"]
+    assert table.get("3") is None
+    assert table.texts() == ["Grüße aus Köln", "東京の夜", "", "emoji 🎬 end"]
+
+
+def test_marker_span(tmp_path):
+    table = round_trip(sample_data(), tmp_path)["segments"]
+    assert table.marker_span(1) == (0, 2)
+    assert table.marker_span(2) == (61, 62)
+    assert table.marker_span(3) is None
+
+
+def test_from_segments_matches_the_loaded_table(tmp_path):
+    data = sample_data()
+    built = SegmentTable.from_segments(data["segments"])
+    assert SegmentTable.from_segments(built) is built
+    assert dict(built) == dict(round_trip(data, tmp_path)["segments"])
+
+
+def test_loaded_table_survives_pickling(tmp_path):
+    table = round_trip(sample_data(), tmp_path)["segments"]
+    copy = pickle.loads(pickle.dumps(table))
+    assert dict(copy) == dict(table)
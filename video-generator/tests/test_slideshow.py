@@ -0,0 +1,57 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from slideshow import canvas_size_for, compose_on_canvas, slideshow_entries, write_concat_script
+
+SLIDES = {"a.png": "slide_a.png", "b.png": "slide_b.png"}
+
+
+def test_entries_fill_gaps_with_black():
+    runs = [("a.png", 2, 5), ("b.png", 5, 9.5), ("a.png", 12, 14)]
+    assert slideshow_entries(runs, 16, SLIDES, "black.png") == [
+        ("black.png", 2), ("slide_a.png", 3), ("slide_b.png", 4.5), ("black.png", 2.5), ("slide_a.png", 2),
+        ("black.png", 2)]
+    assert slideshow_entries([], 3, SLIDES, "black.png") == [("black.png", 3)]
+
+
+def test_concat_script_repeats_the_last_file(tmp_path):
+    script = tmp_path / "slides.ffconcat"
+    write_concat_script([(str(tmp_path / "one.png"), 2), (str(tmp_path / "it's.png"), 1.25)], str(script))
+    with open(script, encoding="utf-8") as f:
+        assert f.read() == ("ffconcat version 1.0\n"
+                            f"file '{tmp_path}/one.png'\nduration 2.000\n"
+                            f"file '{tmp_path}/it'\\''s.png'\nduration 1.250\n"
+                            f"file '{tmp_path}/it'\\''s.png'\n")
+
+
+def test_narrow_images_are_centred_and_wide_ones_cropped():
+    narrow = np.full((4, 2, 3), 9, dtype=np.uint8)
+    canvas = compose_on_canvas(narrow, (6, 4))
+    assert (canvas[:, 2:4] == 9).all()
+    assert (canvas[:, :2] == 0).all() and (canvas[:, 4:] == 0).all()
+
+    wide = np.zeros((2, 8, 3), dtype=np.uint8)
+    wide[:, :, 0] = np.arange(8)
+    canvas = compose_on_canvas(wide, (4, 4))
+    assert canvas[1, :, 0].tolist() == [2, 3, 4, 5]
+    assert (canvas[0] == 0).all() and (canvas[3] == 0).all()
+
+
+def test_transparent_images_are_blended_over_black():
+    image = np.zeros((2, 2, 4), dtype=np.uint8)
+    image[:, :, :3] = 200
+    image[:, :, 3] = [[255, 0], [51, 255]]
+    out = np.full((2, 2, 3), 77, dtype=np.uint8)
+    canvas = compose_on_canvas(image, (2, 2), out=out)
+    assert canvas is out
+    assert canvas[:, :, 0].tolist() == [[200, 0], [40, 200]]
+
+
+def test_canvas_size_follows_the_first_image_rounded_to_even():
+    images = {"a.png": np.zeros((405, 721, 3), dtype=np.uint8)}
+    assert canvas_size_for(images, [("a.png", 0, 1)], (1920, 1080)) == (720, 404)
+    assert canvas_size_for(images, [], (1920, 1080)) == (1920, 1080)
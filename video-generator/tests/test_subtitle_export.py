@@ -0,0 +1,53 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from subtitle_export import export_subtitles, sidecar_subtitle_path, write_ass, write_srt
+from subtitle_renderer import Cue
+
+CUES = [Cue(0, 2, "Hello there."), Cue(61, 3725.5, "A {brace} and\na break")]
+
+
+def read(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def test_srt_numbers_cues_with_millisecond_times(tmp_path):
+    path = tmp_path / "talk.srt"
+    write_srt(CUES, str(path))
+    assert read(path) == ("1\n00:00:00,000 --> 00:00:02,000\nHello there.\n\n"
+                          "2\n00:01:01,000 --> 01:02:05,500\nA {brace} and\na break\n\n")
+
+
+def test_ass_events_and_bottom_style(tmp_path):
+    path = tmp_path / "talk.ass"
+    prefs = {"fontsize": 70, "position": "bottom", "margin": 100}
+    write_ass(CUES, str(path), prefs, (1280, 720), stroke_width=3)
+    text = read(path)
+    assert "PlayResX: 1280\nPlayResY: 720\n" in text
+    # Bottom-centred, with the text's bottom edge where the overlay's top edge margin puts it
+    assert ("Style: Default,Arial,70,&H00FFFFFF,&H00FFFFFF,&H00000000,&H00000000,"
+            "0,0,0,0,100,100,0,0,1,3,0,2,0,0,30,1\n") in text
+    assert text.endswith("Dialogue: 0,0:00:00.00,0:00:02.00,Default,,0,0,0,,Hello there.\n"
+                         "Dialogue: 0,0:01:01.00,1:02:05.50,Default,,0,0,0,,A (brace) and\\Na break\n")
+
+
+def test_ass_centre_style(tmp_path):
+    path = tmp_path / "talk.ass"
+    write_ass(CUES[:1], str(path), {"fontsize": 40, "position": "center", "margin": 0}, (1920, 1080))
+    assert ",1,2,0,5,0,0,0,1\n" in read(path)
+
+
+def test_export_picks_the_format_by_extension(tmp_path):
+    data = {"segments": {"0": {"timestamp": "00:00", "text": "Hi", "marker": 1},
+                         "1": {"timestamp": "00:01", "text": "Hi", "marker": 1}}}
+    srt_path = sidecar_subtitle_path(str(tmp_path / "video.mp4"), ".srt")
+    assert srt_path == str(tmp_path / "video.srt")
+    assert export_subtitles(data, srt_path) == [Cue(0, 2, "Hi")]
+    assert read(srt_path).startswith("1\n00:00:00,000 --> 00:00:02,000\nHi")
+
+    ass_path = str(tmp_path / "video.ASS")
+    export_subtitles(data, ass_path, {"fontsize": 40, "position": "center", "margin": 0})
+    assert read(ass_path).startswith("[Script Info]")
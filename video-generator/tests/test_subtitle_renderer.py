@@ -0,0 +1,70 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import subtitle_renderer
+from subtitle_renderer import Cue, build_cues, render_cue_images, window_cues
+
+
+def segments(texts):
+    """Per-second segments from {second: text}, with empty seconds in between"""
+    last = max(texts)
+    return {str(second): {"timestamp": f"00:{second:02d}", "text": texts.get(second, ""),
+                          "marker": 1 if texts.get(second) else None}
+            for second in range(last + 1)}
+
+
+def test_repeated_text_extends_one_cue():
+    assert build_cues(segments({2: "Hello", 3: "Hello", 4: "Hello "})) == [Cue(2, 5, "Hello")]
+
+
+def test_unfinished_sentences_are_joined():
+    cues = build_cues(segments({0: "We went", 1: "to the park.", 2: "It rained."}))
+    assert cues == [Cue(0, 2, "We went to the park."), Cue(2, 3, "It rained.")]
+
+
+def test_gaps_split_cues():
+    assert build_cues(segments({0: "one", 2: "two"})) == [Cue(0, 1, "one"), Cue(2, 3, "two")]
+
+
+def test_joining_stops_at_max_chars_and_max_duration():
+    texts = {second: f"w{second}" for second in range(7)}
+    assert build_cues(segments(texts), max_chars=8) == [Cue(0, 3, "w0 w1 w2"), Cue(3, 6, "w3 w4 w5"),
+                                                      Cue(6, 7, "w6")]
+    assert build_cues(segments(texts), max_duration=2) == [Cue(0, 2, "w0 w1"), Cue(2, 4, "w2 w3"),
+                                                          Cue(4, 6, "w4 w5"), Cue(6, 7, "w6")]
+
+
+def test_window_clips_and_shifts_cues():
+    cues = [Cue(0, 4, "a"), Cue(5, 8, "b"), Cue(9, 12, "c")]
+    assert window_cues(cues, 3, 10) == [Cue(0, 1, "a"), Cue(2, 5, "b"), Cue(6, 7, "c")]
+    assert window_cues(cues, 4, 5) == []
+
+
+def test_cue_images_are_reused(monkeypatch):
+    monkeypatch.setattr(subtitle_renderer, "_image_cache", subtitle_renderer.OrderedDict())
+    monkeypatch.setattr(subtitle_renderer, "_image_cache_size", 0)
+    first = render_cue_images(["one", "two", "one"], "Arial", 20, 1, 200)
+    assert list(first) == ["one", "two"]
+    assert first["one"].shape[1] == 200
+    again = render_cue_images(["two"], "Arial", 20, 1, 200)
+    assert again["two"] is first["two"]
+
+
+def test_cue_image_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(subtitle_renderer, "_image_cache", subtitle_renderer.OrderedDict())
+    monkeypatch.setattr(subtitle_renderer, "_image_cache_size", 0)
+    size = render_cue_images(["a"], "Arial", 20, 1, 200)["a"].nbytes
+    # Room for three images of this size
+    monkeypatch.setattr(subtitle_renderer, "IMAGE_CACHE_MAX_MB", 3.5 * size / (1024 * 1024))
+
+    images = render_cue_images(["b", "c", "d", "e"], "Arial", 20, 1, 200)
+    assert len(images) == 4
+    assert [key[0] for key in subtitle_renderer._image_cache] == ["c", "d", "e"]
+    assert subtitle_renderer._image_cache_size == 3 * size
+
+    # A hit moves the image to the back of the eviction order
+    render_cue_images(["c"], "Arial", 20, 1, 200)
+    render_cue_images(["f"], "Arial", 20, 1, 200)
+    assert [key[0] for key in subtitle_renderer._image_cache] == ["e", "c", "f"]
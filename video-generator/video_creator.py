@@ -1,152 +1,535 @@
-from moviepy.editor import *
 import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from compositor import FrameCompositor, encode_frames
+from ffmpeg_tools import mux_audio_window, probe_media
+from image_cache import ImageCache
+from parallel_render import (chunk_paths, configured_workers, join_chunks, plan_chunks,
+                             plan_grid_chunks, shift_filters, window_runs)
+from render_cache import CACHE_CHUNK_SECONDS, RenderCache, chunk_key
+from profiling import FrameTimer, RenderProfile, peak_rss_mb
+from render_profiles import (COMPOSITORS, RENDER_MODES, SUBTITLE_BACKENDS, get_profile, moviepy_write_args,
+                             video_size_for)
+from segment_table import SegmentTable
+from slideshow import (canvas_size_for, render_slideshow, slideshow_entries, write_concat_script,
+                       write_slides)
+from subtitle_export import (export_subtitles, mux_soft_subtitles, sidecar_subtitle_path,
+                             subtitles_filter)
+from subtitle_renderer import build_cues, create_subtitle_track, render_cue_images, window_cues
+
+# Seconds shown before and after a marker in its preview
+PREVIEW_PADDING_SECONDS = 1
+
+
+def _render_chunk(job):
+    """Process pool entry point: encode one window of the timeline without audio, returning its stats"""
+    (data, subtitle_prefs, profile_name, compositor, duration, canvas_size, backend, window, video_filters,
+     path) = job
+    creator = VideoCreator(data, None, render_mode='composite', workers=1,
+                           use_render_cache=False, profile=profile_name, compositor=compositor)
+    # The preferences were already scaled to the profile by the parent
+    creator.subtitle_prefs = subtitle_prefs
+    return creator._write_frames(duration, canvas_size, backend, window, video_filters, path)
+
 
 class VideoCreator:
-    def __init__(self, data, subtitle_prefs):
-        self.data = data
-        self.subtitle_prefs = subtitle_prefs
-        self.video_size = (1920, 1080)
+    def __init__(self, data, subtitle_prefs, render_mode='auto', workers=None, use_render_cache=True,
+                 profile=None, report=True, profiler=None, compositor='native'):
+        # Segments are read through sorted columns instead of re-sorting the JSON's string keys
+        self.data = dict(data, segments=SegmentTable.from_segments(data["segments"]))
+        self.render_mode = render_mode
+        if compositor not in COMPOSITORS:
+            raise ValueError(f"Unknown compositor '{compositor}' (choose from {', '.join(COMPOSITORS)})")
+        self.compositor = compositor
+        self.workers = configured_workers(workers)
+        # Resolution, frame rate and encoder settings come from the render profile
+        self.encode_settings = get_profile(profile)
+        self.video_size = video_size_for(self.encode_settings)
+        self.subtitle_prefs = self._scaled_subtitle_prefs(subtitle_prefs)
+        self.image_cache = ImageCache(target_height=self.video_size[1])
+        # Encoded chunks are reused across renders, so re-rendering after an
+        # edit only encodes the parts of the timeline that changed
+        self.render_cache = RenderCache() if use_render_cache else None
+        # Per-stage timings are written to <output>.render.json after each run;
+        # profiler ('cprofile' or 'pyinstrument') also profiles the whole run
+        self.report = report
+        self.profiler = profiler
+        self.timings = RenderProfile()
     
     def create_video(self, output_path):
         """Create the video with all components"""
         try:
             print("Starting video creation...")
+            self.timings = RenderProfile()
+            output_base = os.path.splitext(output_path)[0]
             
-            # Get audio
-            audio_path = self.data["metadata"]["audio_file"]
-            print(f"Loading audio: {audio_path}")
-            audio = AudioFileClip(audio_path)
-            duration = audio.duration
-            
-            # Create image clips
-            print("Creating image clips...")
-            image_clips = self._create_image_clips(duration)
-            
-            # Create subtitle clips if wanted
-            subtitle_clips = []
-            if self.subtitle_prefs and self.subtitle_prefs.get('show_subtitles'):
-                print("Creating subtitle clips...")
-                subtitle_clips = self._create_subtitle_clips()
-                print(f"Created {len(subtitle_clips)} subtitle clips")
+            backend = self._subtitle_backend()
+            use_slideshow = self._use_slideshow(backend)
+            with self.timings.profiler(self.profiler, output_base):
+                if use_slideshow:
+                    self._create_slideshow(output_path, backend)
+                else:
+                    self._create_composite(output_path, backend)
             
-            # If no images, create black background
-            if not image_clips:
-                print("No images found, creating black background...")
-                bg_clip = ColorClip(self.video_size, color=(0,0,0)).set_duration(duration)
-                image_clips.append(bg_clip)
+            if self.report:
+                report_path = self.timings.write(
+                    f"{output_base}.render.json",
+                    output=os.path.abspath(output_path),
+                    render_path='slideshow' if use_slideshow else 'composite',
+                    render_profile=self.encode_settings['name'],
+                    subtitle_backend=backend,
+                    compositor=None if use_slideshow else self.compositor,
+                    workers=self.workers
+                )
+                print(f"Render report written to: {report_path}")
             
-            # Combine everything
-            print("Compositing final video...")
-            # First create the base video with images
-            base_video = CompositeVideoClip(image_clips)
+            print("Video creation completed!")
             
-            # If we have subtitles, add them as overlays
-            if subtitle_clips:
-                final_video = CompositeVideoClip([base_video] + subtitle_clips)
-            else:
-                final_video = base_video
+        except Exception as e:
+            raise Exception(f"Error creating video: {str(e)}")
+    
+    def marker_window(self, marker, padding=PREVIEW_PADDING_SECONDS):
+        """(start, end) in seconds around the seconds a marker covers"""
+        span = self.data["segments"].marker_span(marker)
+        if span is None:
+            raise ValueError(f"No entries found for marker {marker}")
+        return max(0, span[0] - padding), span[1] + padding
+    
+    def create_preview(self, output_path, start=0, end=None):
+        """Render only [start, end) of the timeline (default end: the audio's end), with its audio
+        
+        Only the images and cues overlapping the window are loaded and drawn,
+        the audio is seeked to start, and subtitles are drawn as overlays so no
+        subtitle file is needed. Use the 'preview' profile for a proxy in seconds.
+        """
+        self.timings = RenderProfile()
+        with self.timings.stage("probe_audio"):
+            audio_path, audio_info = self._audio_input()
+            duration = audio_info["duration"]
+        
+        start = max(0, start)
+        end = duration if end is None else min(end, duration)
+        if end <= start:
+            raise ValueError(f"Preview window {start}s to {end}s is outside the {duration:.1f}s of audio")
+        print(f"Rendering preview of {start:.1f}s to {end:.1f}s...")
+        
+        with self.timings.stage("load_images"):
+            # The same frame size as the full render, so the preview shows the real framing
+            canvas_size = self._canvas_size(duration)
+        
+        backend = 'overlay' if self._subtitle_backend() else None
+        with tempfile.TemporaryDirectory(prefix="preview-") as work_dir:
+            video_path = os.path.join(work_dir, "preview.mp4")
+            with self.timings.stage("encode") as stage:
+                stats = self._write_frames(duration, canvas_size, backend, (start, end), None, video_path)
+                stage["frames"] = stats["frames"]
             
-            # Set the audio
-            final_video = final_video.set_audio(audio)
+            with self.timings.stage("mux_audio"):
+                mux_audio_window(video_path, audio_path, start, end - start, output_path,
+                                 self.encode_settings['audio_bitrate'])
+        
+        print(f"Preview written to: {output_path}")
+        return output_path
+    
+    def _scaled_subtitle_prefs(self, subtitle_prefs):
+        """Subtitle sizes are chosen for 1080p; scale them to the profile's height"""
+        scale = self.video_size[1] / 1080
+        if not subtitle_prefs or not subtitle_prefs.get('show_subtitles') or scale == 1:
+            return subtitle_prefs
+        return dict(subtitle_prefs,
+                    fontsize=max(1, round(subtitle_prefs['fontsize'] * scale)),
+                    margin=round(subtitle_prefs['margin'] * scale))
+    
+    def _use_slideshow(self, backend):
+        """Whether the still-image ffmpeg path can produce this video"""
+        if self.render_mode not in RENDER_MODES:
+            raise ValueError(f"Unknown render mode '{self.render_mode}'")
+        if self.render_mode == 'slideshow' and backend == 'overlay':
+            raise ValueError("Slideshow mode cannot draw overlay subtitles; use the burn or soft backend")
+        # Only overlay subtitles need frames to pass through Python
+        return self.render_mode == 'slideshow' or (self.render_mode == 'auto' and backend != 'overlay')
+    
+    def _prepare_subtitles(self, output_path, backend):
+        """Export subtitles for the ffmpeg backends
+        
+        Returns (video filters, path to encode to, subtitle file); the path to
+        encode to differs from output_path when a subtitle track is muxed in after.
+        """
+        if backend == 'burn':
+            # Let ffmpeg draw the subtitles while it encodes the frames
+            subtitle_path = sidecar_subtitle_path(output_path, '.ass')
+            print(f"Exporting subtitles to: {subtitle_path}")
+            cues = export_subtitles(self.data, subtitle_path, self.subtitle_prefs, self.video_size)
+            self.timings.count("subtitle_cues", len(cues))
+            return [subtitles_filter(subtitle_path)], output_path, subtitle_path
+        
+        if backend == 'soft':
+            # Encode without subtitles, then add them as a text track
+            subtitle_path = sidecar_subtitle_path(output_path, '.srt')
+            print(f"Exporting subtitles to: {subtitle_path}")
+            cues = export_subtitles(self.data, subtitle_path)
+            self.timings.count("subtitle_cues", len(cues))
+            return [], sidecar_subtitle_path(output_path, '.nosubs.mp4'), subtitle_path
+        
+        return [], output_path, None
+    
+    def _finish_subtitles(self, video_path, output_path, subtitle_path):
+        if video_path != output_path:
+            print("Adding subtitle track...")
+            mux_soft_subtitles(video_path, subtitle_path, output_path)
+            os.remove(video_path)
+    
+    def _audio_input(self):
+        """The audio file to mux and its probe: the recorded AAC artifact when it still matches the source
+        
+        Stream copying the artifact spares every render from re-encoding a
+        source an MP4 cannot hold. Profiles that re-encode anyway use the
+        source, which has the better quality.
+        """
+        metadata = self.data["metadata"]
+        audio_path = metadata["audio_file"]
+        artifact = metadata.get("audio_artifact") or {}
+        if self.encode_settings['copy_audio'] and artifact.get("aac") and os.path.exists(artifact["aac"]):
+            # A missing source is fine; a changed one makes the artifact stale
+            stat = os.stat(audio_path) if os.path.exists(audio_path) else None
+            if stat is None or (stat.st_size, stat.st_mtime) == (artifact["source_size"],
+                                                                  artifact["source_mtime"]):
+                audio_path = artifact["aac"]
+        
+        print(f"Probing audio: {audio_path}")
+        return audio_path, probe_media(audio_path)
+    
+    def _create_slideshow(self, output_path, backend):
+        """Render still images and audio with one ffmpeg concat pass, no per-frame Python"""
+        with self.timings.stage("probe_audio"):
+            audio_path, audio_info = self._audio_input()
+            duration = audio_info["duration"]
+        
+        with self.timings.stage("load_images"):
+            print("Preparing slides...")
+            runs = self._image_runs(duration)
+            images = self.image_cache.preload(image_path for image_path, start, end in runs)
+            canvas_size = canvas_size_for(images, runs, self.video_size)
+            self.timings.count("image_runs", len(runs))
+            self.timings.count("distinct_images", len(images))
+        
+        with self.timings.stage("export_subtitles"):
+            video_filters, video_path, subtitle_path = self._prepare_subtitles(output_path, backend)
+        
+        with tempfile.TemporaryDirectory(prefix="slideshow-") as work_dir:
+            with self.timings.stage("write_slides"):
+                slides, black_path = write_slides(runs, images, canvas_size, work_dir)
+                entries = slideshow_entries(runs, duration, slides, black_path)
+                script_path = os.path.join(work_dir, "slides.ffconcat")
+                write_concat_script(entries, script_path)
+                self.timings.count("slides", len(entries))
             
-            # Write video file
-            print(f"Writing video to: {output_path}")
-            final_video.write_videofile(
-                output_path,
-                fps=24,
-                codec='libx264',
-                audio_codec='aac',
-                audio_bitrate='192k'
-            )
+            with self.timings.stage("encode") as stage:
+                print(f"Writing slideshow ({len(entries)} slides) to: {output_path}")
+                render_slideshow(script_path, audio_path, audio_info["audio_codec"], video_path, duration,
+                                 self.encode_settings, video_filters=video_filters)
+                stage["frames"] = int(duration * self.encode_settings['fps'])
+        
+        with self.timings.stage("mux_subtitles"):
+            self._finish_subtitles(video_path, output_path, subtitle_path)
+    
+    def _create_composite(self, output_path, backend):
+        """Render every frame through the compositor, in chunks joined without re-encoding
+        
+        Chunks are encoded in separate processes when there are several
+        workers, and taken from the render cache when nothing in them changed.
+        The audio is muxed once, when the chunks are joined.
+        """
+        with self.timings.stage("probe_audio"):
+            audio_path, audio_info = self._audio_input()
+            duration = audio_info["duration"]
+        
+        with self.timings.stage("load_images"):
+            # Every chunk must share one frame size for the stream copy to work
+            canvas_size = self._canvas_size(duration)
+        
+        with self.timings.stage("export_subtitles"):
+            video_filters, video_path, subtitle_path = self._prepare_subtitles(output_path, backend)
+        
+        with tempfile.TemporaryDirectory(prefix="chunks-") as work_dir:
+            with self.timings.stage("plan_chunks"):
+                runs = self._image_runs(duration)
+                if self.render_cache is not None:
+                    chunks = plan_grid_chunks(runs, duration, CACHE_CHUNK_SECONDS)
+                else:
+                    chunks = plan_chunks(runs, duration, self.workers)
+                cues = build_cues(self.data["segments"]) if backend in ('overlay', 'burn') else []
+                
+                paths = chunk_paths(work_dir, chunks)
+                keys = [None] * len(chunks)
+                jobs = []
+                for i, ((start, end), path) in enumerate(zip(chunks, paths)):
+                    if self.render_cache is not None:
+                        keys[i] = chunk_key((start, end), window_runs(runs, start, end),
+                                            window_cues(cues, start, end), backend, self.subtitle_prefs,
+                                            dict(self.encode_settings, compositor=self.compositor),
+                                            canvas_size)
+                        cached_path = self.render_cache.get(keys[i])
+                        if cached_path is not None:
+                            paths[i] = cached_path
+                            continue
+                    jobs.append((i, (self.data, self.subtitle_prefs, self.encode_settings['name'],
+                                     self.compositor, duration, canvas_size, backend, (start, end),
+                                     shift_filters(video_filters, start), path)))
+                
+                self.timings.count("image_runs", len(runs))
+                self.timings.count("chunks", len(chunks))
+                self.timings.count("chunks_cached", len(chunks) - len(jobs))
+                if self.render_cache is not None:
+                    print(f"Reusing {len(chunks) - len(jobs)} of {len(chunks)} cached chunks")
             
-            # Cleanup
-            print("Cleaning up resources...")
-            self._cleanup_clips(final_video, audio, image_clips + subtitle_clips)
-            print("Video creation completed!")
+            with self.timings.stage("encode") as stage:
+                chunk_stats = []
+                workers = min(self.workers, len(jobs))
+                if workers > 1:
+                    print(f"Rendering {len(jobs)} chunks with {workers} workers...")
+                    with ProcessPoolExecutor(max_workers=workers) as pool:
+                        for stats in pool.map(_render_chunk, [job for i, job in jobs]):
+                            print(f"Finished chunk: {os.path.basename(stats['path'])}")
+                            chunk_stats.append(stats)
+                elif jobs:
+                    print(f"Rendering {len(jobs)} chunks...")
+                    for i, job in jobs:
+                        chunk_stats.append(_render_chunk(job))
+                        print(f"Finished chunk: {os.path.basename(paths[i])}")
+                
+                # Where the chunk time went, summed over every chunk encoded
+                for key in ('frames', 'build_seconds', 'compose_seconds', 'encode_seconds'):
+                    stage[key] = round(sum(stats[key] for stats in chunk_stats), 4)
+                # A process-lifetime peak, so it bounds rather than measures one chunk's memory
+                if chunk_stats and chunk_stats[0]['process_peak_rss_mb'] is not None:
+                    stage['renderer_process_peak_rss_mb'] = round(
+                        max(stats['process_peak_rss_mb'] for stats in chunk_stats), 1)
+                for key in ('frames_redrawn', 'frames_blended', 'frames_reused'):
+                    if any(key in stats for stats in chunk_stats):
+                        self.timings.count(key, sum(stats.get(key, 0) for stats in chunk_stats))
+                self.timings.count("clips", sum(stats['clips'] for stats in chunk_stats))
+                self.timings.count("frames", stage['frames'])
+                
+                if self.render_cache is not None:
+                    for i, job in jobs:
+                        paths[i] = self.render_cache.put(keys[i], paths[i])
             
-        except Exception as e:
-            raise Exception(f"Error creating video: {str(e)}")
+            with self.timings.stage("join"):
+                print(f"Joining chunks into: {output_path}")
+                join_chunks(paths, audio_path, audio_info["audio_codec"], video_path, duration, work_dir,
+                            audio_bitrate=self.encode_settings['audio_bitrate'],
+                            copy_audio=self.encode_settings['copy_audio'])
+        
+        if self.render_cache is not None:
+            self.render_cache.prune(keep=set(keys))
+        
+        with self.timings.stage("mux_subtitles"):
+            self._finish_subtitles(video_path, output_path, subtitle_path)
     
-    def _create_image_clips(self, duration):
-        """Create clips for images"""
-        image_clips = []
+    def _write_frames(self, duration, canvas_size, backend, window, video_filters, path):
+        """Encode the frames of one window of the timeline, without audio
+        
+        Returns the chunk's path, frame and clip counts, the seconds spent
+        building clips, compositing frames and encoding them, and the memory
+        high-water mark of the process that drew them. That is a lifetime
+        peak: in a reused pool worker it covers earlier chunks too, and
+        without workers it is the parent's, models and all.
+        """
+        if self.compositor == 'native':
+            build_start = time.perf_counter()
+            compositor, clips = self._build_compositor(duration, canvas_size, backend, window)
+            build_seconds = time.perf_counter() - build_start
+            start, end = window or (0, duration)
+            print(f"Compositing frames into: {os.path.basename(path)}")
+            stats = encode_frames(compositor, end - start, self.encode_settings['fps'], path,
+                                  self.encode_settings, video_filters)
+            return dict(stats, path=path, clips=clips, build_seconds=build_seconds,
+                        process_peak_rss_mb=peak_rss_mb())
+        
+        build_start = time.perf_counter()
+        final_video, clips = self._build_frames(duration, canvas_size, backend, window)
+        build_seconds = time.perf_counter() - build_start
+        
+        write_args = moviepy_write_args(self.encode_settings)
+        if video_filters:
+            # setpts drops the stream's frame rate; pin it so chunks keep the same timing
+            write_args['ffmpeg_params'] += ['-vf', ','.join(video_filters), '-r', str(write_args['fps'])]
+        frame_timer = FrameTimer(final_video)
+        write_start = time.perf_counter()
+        final_video.write_videofile(path, audio=False, logger=None, **write_args)
+        write_seconds = time.perf_counter() - write_start
+        
+        final_video.close()
+        for clip in clips:
+            clip.close()
+        
+        return {
+            "path": path,
+            "frames": frame_timer.frames,
+            "clips": len(clips),
+            "build_seconds": build_seconds,
+            "compose_seconds": frame_timer.seconds,
+            "encode_seconds": write_seconds - frame_timer.seconds,
+            "process_peak_rss_mb": peak_rss_mb()
+        }
+    
+    def _canvas_size(self, duration):
+        """Frame size of the whole video, taken from the first image"""
+        runs = self._image_runs(duration)
+        images = self.image_cache.preload(image_path for image_path, start, end in runs[:1])
+        return canvas_size_for(images, runs, self.video_size)
+    
+    def _build_frames(self, duration, canvas_size, backend, window=None):
+        """Composite the image and overlay subtitle clips of the window (default: everything)
+        
+        Returns (video clip, clips to close); the clip starts at 0 even when
+        the window does not.
+        """
+        # moviepy is imported only when frames are composited, so slideshow
+        # renders and scripts that just need the constants start quickly
+        from moviepy.video.VideoClip import ColorClip
+        from moviepy.video.compositing.CompositeVideoClip import CompositeVideoClip
+        
+        start, end = window or (0, duration)
+        
+        # Create image clips
+        print("Creating image clips...")
+        image_clips = self._create_image_clips(duration, window)
+        
+        # Create subtitle clips if wanted
+        subtitle_clips = []
+        if backend == 'overlay':
+            print("Creating subtitle clips...")
+            subtitle_clips = self._create_subtitle_clips(window)
+        
+        # If no images, create black background
+        if not image_clips:
+            print("No images found, creating black background...")
+            bg_clip = ColorClip(canvas_size, color=(0,0,0)).set_duration(end - start)
+            image_clips.append(bg_clip)
+        
+        # Combine everything
+        print("Compositing final video...")
+        # First create the base video with images
+        base_video = CompositeVideoClip(image_clips, size=canvas_size).set_duration(end - start)
+        
+        # If we have subtitles, add them as overlays
+        if subtitle_clips:
+            final_video = CompositeVideoClip([base_video] + subtitle_clips).set_duration(end - start)
+        else:
+            final_video = base_video
+        
+        return final_video, image_clips + subtitle_clips
+    
+    def _build_compositor(self, duration, canvas_size, backend, window=None):
+        """A FrameCompositor for the window (default: everything), starting at 0
+        
+        Returns it with the number of image runs and cues it draws, the
+        counterpart of the moviepy path's clips.
+        """
+        runs = self._image_runs(duration)
+        if window is not None:
+            runs = window_runs(runs, *window)
+        images = self.image_cache.preload(image_path for image_path, start, end in runs)
+        
+        cues = []
+        cue_images = {}
+        position = ('center', 'center')
+        if backend == 'overlay':
+            position = self._subtitle_position()
+            cues = build_cues(self.data["segments"])
+            if window is not None:
+                cues = window_cues(cues, *window)
+            cue_images = render_cue_images([cue.text for cue in cues], 'Arial',
+                                           self.subtitle_prefs['fontsize'], 2, self.video_size[0])
+            print(f"Rendered {len(cues)} subtitle cues")
+        
+        compositor = FrameCompositor(canvas_size, runs, images, cues, cue_images, position)
+        return compositor, len(runs) + len(cues)
+    
+    def _image_runs(self, duration):
+        """List (image_path, start, end) for each run of seconds showing the same image"""
+        segments = self.data["segments"]
+        runs = []
         current_image = None
         current_start = 0
+        exists = {}
         
-        for second, segment in sorted(self.data["segments"].items(), key=lambda x: int(x[0])):
-            second = int(second)
+        # Images are string table indices, so each distinct path is checked once
+        for second, image in zip(segments.second.tolist(), segments.image.tolist()):
+            if image < 0:
+                continue
+            if image not in exists:
+                exists[image] = os.path.exists(segments.strings[image])
+            if not exists[image]:
+                continue
             
-            if "image_path" in segment and os.path.exists(segment["image_path"]):
-                if current_image is not None:
-                    img_clip = (ImageClip(current_image)
-                              .set_start(current_start)
-                              .set_duration(second - current_start)
-                              .resize(height=self.video_size[1])
-                              .set_position('center'))
-                    image_clips.append(img_clip)
-                
-                current_image = segment["image_path"]
-                current_start = second
+            # Consecutive seconds with the same image extend the current run
+            if image == current_image:
+                continue
+            
+            if current_image is not None:
+                runs.append((segments.strings[current_image], current_start, second))
+            
+            current_image = image
+            current_start = second
         
         # Add final image if exists
         if current_image is not None:
-            img_clip = (ImageClip(current_image)
-                       .set_start(current_start)
-                       .set_duration(duration - current_start)
-                       .resize(height=self.video_size[1])
+            runs.append((segments.strings[current_image], current_start, duration))
+        
+        return runs
+    
+    def _create_image_clips(self, duration, window=None):
+        """Create clips for images, limited to window=(start, end) if given"""
+        runs = self._image_runs(duration)
+        if window is not None:
+            runs = window_runs(runs, *window)
+        
+        # Decode and scale each distinct image once, in parallel
+        images = self.image_cache.preload(image_path for image_path, start, end in runs)
+        
+        from moviepy.video.VideoClip import ImageClip
+        image_clips = []
+        for image_path, start, end in runs:
+            img_clip = (ImageClip(images[image_path])
+                       .set_start(start)
+                       .set_duration(end - start)
                        .set_position('center'))
             image_clips.append(img_clip)
         
         return image_clips
     
-    def _create_subtitle_clips(self):
-        """Create subtitle clips"""
-        subtitle_clips = []
-        
-        # Sort segments by time
-        sorted_segments = sorted(self.data["segments"].items(), key=lambda x: int(x[0]))
+    def _subtitle_backend(self):
+        """'overlay', 'burn' or 'soft' when subtitles are wanted, otherwise None"""
+        if not (self.subtitle_prefs and self.subtitle_prefs.get('show_subtitles')):
+            return None
+        backend = self.subtitle_prefs.get('backend', 'overlay')
+        if backend not in SUBTITLE_BACKENDS:
+            raise ValueError(f"Unknown subtitle backend '{backend}'")
+        return backend
+    
+    def _subtitle_position(self):
+        """Where subtitle overlays are placed, from the subtitle preferences"""
+        if self.subtitle_prefs['position'] == 'bottom':
+            y_pos = self.video_size[1] - self.subtitle_prefs['margin']
+            return ('center', y_pos)
+        return ('center', 'center')
+    
+    def _create_subtitle_clips(self, window=None):
+        """Create one overlay clip holding every subtitle cue"""
+        track, cues = create_subtitle_track(
+            self.data["segments"],
+            fontsize=self.subtitle_prefs['fontsize'],
+            position=self._subtitle_position(),
+            font='Arial',
+            stroke_width=2,
+            width=self.video_size[0],  # Allow height to be automatic
+            window=window
+        )
         
-        for second, segment in sorted_segments:
-            if segment["text"].strip():
-                second = int(second)
-                
-                # Calculate position
-                if self.subtitle_prefs['position'] == 'bottom':
-                    y_pos = self.video_size[1] - self.subtitle_prefs['margin']
-                    position = ('center', y_pos)
-                else:
-                    position = ('center', 'center')
-                
-                try:
-                    txt_clip = (TextClip(
-                        segment["text"],
-                        fontsize=self.subtitle_prefs['fontsize'],
-                        color='white',
-                        stroke_color='black',
-                        stroke_width=2,
-                        font='Arial',
-                        size=(self.video_size[0], None),  # Allow height to be automatic
-                        method='caption'
-                    )
-                    .set_start(second)
-                    .set_duration(1)
-                    .set_position(position))
-                    
-                    subtitle_clips.append(txt_clip)
-                    
-                except Exception as e:
-                    print(f"Warning: Could not create subtitle for text: {segment['text']}")
-                    print(f"Error: {str(e)}")
-                    continue
-        
-        return subtitle_clips
-    
-    def _cleanup_clips(self, final_video, audio, clips):
-        """Clean up all clips"""
-        try:
-            final_video.close()
-            audio.close()
-            for clip in clips:
-                clip.close()
-        except Exception as e:
-            print(f"Warning: Error during cleanup: {str(e)}")
\ No newline at end of file
+        print(f"Rendered {len(cues)} subtitle cues")
+        return [track] if track is not None else []